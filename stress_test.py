@@ -1,19 +1,59 @@
-import json
+import argparse
+import contextlib
 import time
 import os
-from tooling.deep_research import execute_research_protocol
+from tooling.pipeline import build_research_pipeline
+from tooling.lib import metrics
+from tooling.lib.cassette import Cassette, RECORD, REPLAY
+
+# Credentials are redacted from cassettes, so replay only needs placeholders
+# that get the tools past their configuration checks.
+REPLAY_PLACEHOLDER_ENV = (
+    "GOOGLE_SEARCH_API_KEY", "GOOGLE_SEARCH_CX", "AZURE_SUB_KEY", "EXA_API_KEY",
+    "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY", "DEEPSEEK_API_KEY", "OPENROUTER_API_KEY",
+)
 
 def log_step(title, start_time, data_size=None):
     """Logs the completion of a step, its duration, and optional data size."""
-    duration = time.time() - start_time
+    duration = time.monotonic() - start_time
     size_log = f"| Data Size: {data_size / 1024:.2f} KB" if data_size is not None else ""
     print(f"--- Step Complete: {title} | Duration: {duration:.2f}s {size_log} ---")
 
+STAGE_TITLES = {
+    "optimize": "Optimize Research (L5)",
+    "search": "Web Search (L3)",
+    "fetch": "Fetch Content (L4)",
+    "sources": "Collect Sources",
+    "dedup": "Near-Duplicate Removal",
+    "analyze": "Analyze Results (L5)",
+    "report": "Generate Final Report (L5)",
+    "export_docx": "Export Report as DOCX (L1)",
+    "export_pdf": "Export Report as PDF (L1)",
+}
+
+def log_stage(title, duration, data_size=None):
+    """Logs the completion of a pipeline stage, its duration, and optional data size."""
+    size_log = f"| Data Size: {data_size / 1024:.2f} KB" if data_size is not None else ""
+    print(f"--- Stage Complete: {title} | Duration: {duration:.2f}s {size_log} ---")
+
+def log_metrics():
+    """Prints per-task call counts, latency estimates and payload sizes recorded by the dispatcher."""
+    print("\n--- Task Metrics ---")
+    for task, data in metrics.snapshot()["tasks"].items():
+        latency = data["latency_seconds"]
+        errors = sum(data["errors"].values())
+        print(f"{task}: {data['calls']} calls, {errors} errors | p50 <= {latency['p50']}s, p99 <= {latency['p99']}s "
+              f"| in {data['request_bytes'] / 1024:.2f} KB, out {data['response_bytes'] / 1024:.2f} KB")
+
 def run_stress_test():
     """
     Orchestrates a comprehensive, multi-step research task to stress test
     the entire ported toolchain.
 
+    The workflow runs as a pipeline DAG (see `tooling/pipeline.py`), so the
+    per-source fetches, analysis and report generation, and the DOCX and PDF
+    exports each run in parallel where their inputs allow.
+
     Note: To run this test with real results, ensure all necessary
     environment variables (e.g., OPENAI_API_KEY, GOOGLE_SEARCH_API_KEY) are set.
     The script is designed to fail gracefully if keys are missing.
@@ -23,133 +63,68 @@ def run_stress_test():
     research_task = "Conduct a comprehensive analysis of the current state of autonomous AI software engineering agents, their core architectural patterns, and the primary challenges they face."
     print(f"\nResearch Task: {research_task}")
 
-    start_time = time.time()
-
-    # --- Step 1: Optimize Research (L5) ---
-    print("\n--- Step 1: Optimizing Research Prompt (L5) ---")
-    optimize_constraints = {
-        "task": "optimize_research",
-        "prompt": research_task,
-        "platform_model": "openai__gpt-4" # Using a powerful model for optimization
-    }
-    optimized_json = execute_research_protocol(optimize_constraints)
-    optimized_data = json.loads(optimized_json)
-
-    if "error" in optimized_data:
-        print(f"Error in Step 1: {optimized_data['error']}. Aborting.")
-        return
-
-    optimized_query = optimized_data.get("query", research_task)
-    final_report_prompt = optimized_data.get("optimizedPrompt", research_task)
-    log_step("Optimize Research", start_time)
-    print(f"Optimized Query: {optimized_query}")
-
-    # --- Step 2: Web Search (L3) ---
-    start_time = time.time()
-    print("\n--- Step 2: Performing Web Search (L3) ---")
-    search_constraints = {
-        "task": "search",
-        "query": optimized_query,
-        "provider": "google"
-    }
-    search_results_json = execute_research_protocol(search_constraints)
-    search_results = json.loads(search_results_json)
-
-    if "error" in search_results:
-        print(f"Error in Step 2: {search_results['error']}. Aborting.")
-        return
-
-    web_pages = search_results.get("webPages", {}).get("value", [])
-    log_step("Web Search", start_time, len(search_results_json.encode('utf-8')))
-    print(f"Found {len(web_pages)} search results.")
-
-    # --- Step 3: Fetch Content (L4) ---
-    start_time = time.time()
-    print(f"\n--- Step 3: Fetching Content for Top {min(3, len(web_pages))} Results (L4) ---")
-    fetched_content = []
-    total_fetched_size = 0
-    for result in web_pages[:3]: # Limit to top 3 for the stress test
-        url = result.get("url")
-        if not url:
+    pipeline = build_research_pipeline(
+        research_task,
+        platform_model="openai__gpt-4", # Using a powerful model for every LLM stage
+        provider="google",
+        max_sources=3, # Limit to top 3 for the stress test
+        file_formats=("docx", "pdf"),
+    )
+
+    start_time = time.monotonic()
+    outcome = pipeline.run()
+
+    for name in pipeline.order:
+        title = STAGE_TITLES.get(name, name)
+        if name in outcome.errors:
+            print(f"Error in {title}: {outcome.errors[name]}")
+        elif name in outcome.durations:
+            log_stage(title, outcome.durations[name], metrics.payload_size(outcome.results[name]))
+
+    log_step("Research Pipeline", start_time)
+
+    for file_format in ("docx", "pdf"):
+        download_data = outcome.results.get(f"export_{file_format}")
+        if not download_data:
             continue
-        print(f"Fetching: {url}")
-        fetch_constraints = {"task": "fetch_content", "url": url}
-        content_json = execute_research_protocol(fetch_constraints)
-        content_data = json.loads(content_json)
-
-        if "content" in content_data:
-            content = content_data["content"]
-            fetched_content.append({"url": url, "title": result.get("name"), "content": content})
-            total_fetched_size += len(content.encode('utf-8'))
-        else:
-            print(f"Warning: Could not fetch content for {url}. Reason: {content_data.get('error')}")
-
-    log_step("Fetch Content", start_time, total_fetched_size)
-    print(f"Fetched content for {len(fetched_content)} sources.")
-
-    # --- Step 4: Analyze Results (L5) ---
-    start_time = time.time()
-    print("\n--- Step 4: Analyzing Results (L5) ---")
-    analysis_constraints = {
-        "task": "analyze_results",
-        "prompt": final_report_prompt,
-        "results": fetched_content,
-        "platform_model": "openai__gpt-4"
-    }
-    analysis_json = execute_research_protocol(analysis_constraints)
-    analysis_data = json.loads(analysis_json)
-
-    if "error" in analysis_data:
-        print(f"Error in Step 4: {analysis_data['error']}. Aborting.")
-        return
-
-    log_step("Analyze Results", start_time, len(analysis_json.encode('utf-8')))
-    print("Analysis complete. Top ranked source:", analysis_data.get("rankings", [{}])[0].get("url"))
-
-    # --- Step 5: Generate Final Report (L5) ---
-    start_time = time.time()
-    print("\n--- Step 5: Generating Final Report (L5) ---")
-    report_constraints = {
-        "task": "generate_final_report",
-        "selected_results": fetched_content,
-        "sources": web_pages, # Pass original search results for citation
-        "prompt": final_report_prompt,
-        "platform_model": "openai__gpt-4"
-    }
-    final_report_json = execute_research_protocol(report_constraints)
-    final_report_data = json.loads(final_report_json)
-
-    if "error" in final_report_data:
-        print(f"Error in Step 5: {final_report_data['error']}. Aborting.")
-        return
-
-    log_step("Generate Final Report", start_time, len(final_report_json.encode('utf-8')))
-    print("Final report generated successfully.")
-
-    # --- Step 6: Save Report as DOCX (L1) ---
-    start_time = time.time()
-    print("\n--- Step 6: Saving Report as DOCX (L1) ---")
-    download_constraints = {
-        "task": "download_report",
-        "report": final_report_data,
-        "file_format": "docx"
-    }
-    download_json = execute_research_protocol(download_constraints)
-    download_data = json.loads(download_json)
-
-    if "error" in download_data:
-        print(f"Error in Step 6: {download_data['error']}. Aborting.")
-        return
-
-    output_filename = "stress_test_report.docx"
-    docx_content = download_data["content"].encode('latin1') # Content is returned as a string, must be encoded back to bytes
-    with open(output_filename, 'wb') as f:
-        f.write(docx_content)
-
-    log_step("Save Report", start_time, len(docx_content))
-    print(f"Report saved to '{output_filename}'")
-
-    print("\n--- Stress Test Complete ---")
+        output_filename = f"stress_test_report.{file_format}"
+        file_content = download_data["content"] # Pipeline results are native objects, so this is already bytes
+        with open(output_filename, 'wb') as f:
+            f.write(file_content)
+        print(f"Report saved to '{output_filename}' ({len(file_content) / 1024:.2f} KB)")
+
+    log_metrics()
+
+    if outcome.ok:
+        print("\n--- Stress Test Complete ---")
+    else:
+        print("\n--- Stress Test Finished With Errors ---")
+
+def parse_latency(value):
+    """Parses the --latency option: 'recorded', 'none' or a number of seconds."""
+    if value == "recorded":
+        return value
+    if value == "none":
+        return None
+    return float(value)
 
 if __name__ == "__main__":
-    run_stress_test()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the toolchain stress test, optionally against a cassette.")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE", help="Record all outbound HTTP traffic to this file.")
+    cassette_group.add_argument("--replay", metavar="CASSETTE", help="Serve all HTTP traffic from this file, without network access.")
+    parser.add_argument("--latency", type=parse_latency, default="recorded",
+                        help="Replay latency: 'recorded' (default), 'none' or a fixed number of seconds.")
+    args = parser.parse_args()
+
+    if args.replay:
+        for name in REPLAY_PLACEHOLDER_ENV:
+            os.environ.setdefault(name, "replay")
+        cassette = Cassette(args.replay, REPLAY, latency=args.latency)
+    elif args.record:
+        cassette = Cassette(args.record, RECORD)
+    else:
+        cassette = contextlib.nullcontext()
+
+    with cassette:
+        run_stress_test()
\ No newline at end of file
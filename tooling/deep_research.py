@@ -1,36 +1,434 @@
-import json
-from typing import Dict, Any
-
-# --- Import all the ported tools from their new locations ---
-from tooling.local import parse_document as local_parse_document
-from tooling.local import documents as local_documents
-from tooling.local import download as local_download
-from tooling.remote import search as remote_search
-from tooling.remote import fetch_content as remote_fetch_content
-from tooling.remote import optimize_research as remote_optimize_research
-from tooling.remote import analyze_results as remote_analyze_results
-from tooling.remote import consolidate_report as remote_consolidate_report
-from tooling.remote import generate_final_report as remote_generate_final_report
-from tooling.remote import generate_question as remote_generate_question
-
-# A mapping from task names to their corresponding functions, now clearly separated
-TASK_DISPATCHER = {
+import asyncio
+import functools
+import importlib
+import inspect
+import os
+import sqlite3
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from tooling.lib.artifacts import Artifact, publish
+from tooling.lib.cache import ResultCache, cache_key
+from tooling.lib.metrics import TASK_METRICS, payload_size
+from tooling.lib.ratelimit import RateLimiter, get_limiter
+from tooling.lib.serialization import encode_json
+from tooling.lib.singleflight import SingleFlight, AsyncSingleFlight
+
+# The result object returned by every tool: a JSON-compatible dictionary that
+# carries a 'status' code and, on failure, an 'error' message.
+TaskResult = Dict[str, Any]
+
+
+class LazyTaskRegistry(dict):
+    """
+    A mapping from task names to tool functions that defers importing each
+    tool module until the task is first dispatched.
+
+    Values may be given as ``"package.module:function"`` import paths; on
+    first lookup the path is imported and replaced by the function itself.
+    Plain callables are stored and returned as-is, so the registry can be
+    patched or extended like a normal dictionary.
+    """
+
+    def __getitem__(self, task: str) -> Callable[..., Any]:
+        value = super().__getitem__(task)
+        if isinstance(value, str):
+            module_name, _, function_name = value.partition(":")
+            value = getattr(importlib.import_module(module_name), function_name)
+            super().__setitem__(task, value)
+        return value
+
+    def get(self, task: str, default: Any = None) -> Any:
+        return self[task] if task in self else default
+
+    def values(self) -> List[Callable[..., Any]]:
+        return [self[task] for task in self]
+
+    def items(self) -> List[Tuple[str, Callable[..., Any]]]:
+        return [(task, self[task]) for task in self]
+
+
+# A mapping from task names to their corresponding functions, now clearly separated.
+# Tool modules are only imported when their task is first dispatched, so a run
+# that only searches never loads python-docx, markdown_pdf or officeparserpy.
+TASK_DISPATCHER = LazyTaskRegistry({
     # --- Local Tools ---
-    "parse_document": local_parse_document.parse_document,
-    "generate_docx": local_documents.generate_docx,
-    "generate_pdf": local_documents.generate_pdf,
-    "download_report": local_download.download_report,
+    "parse_document": "tooling.local.parse_document:parse_document",
+    "generate_docx": "tooling.local.documents:generate_docx",
+    "generate_pdf": "tooling.local.documents:generate_pdf",
+    "download_report": "tooling.local.download:download_report",
 
     # --- Remote Tools ---
-    "search": remote_search.search,
-    "fetch_content": remote_fetch_content.fetch_content,
-    "optimize_research": remote_optimize_research.optimize_research,
-    "analyze_results": remote_analyze_results.analyze_results,
-    "consolidate_report": remote_consolidate_report.consolidate_report,
-    "generate_final_report": remote_generate_final_report.generate_final_report,
-    "generate_question": remote_generate_question.generate_question,
+    "search": "tooling.remote.search:search",
+    "fetch_content": "tooling.remote.fetch_content:fetch_content",
+    "optimize_research": "tooling.remote.optimize_research:optimize_research",
+    "analyze_results": "tooling.remote.analyze_results:analyze_results",
+    "consolidate_report": "tooling.remote.consolidate_report:consolidate_report",
+    "generate_final_report": "tooling.remote.generate_final_report:generate_final_report",
+    "generate_question": "tooling.remote.generate_question:generate_question",
+})
+
+# Maximum number of concurrent calls per task type in the async engine.
+# Network-bound tools can run wide; LLM-backed and CPU-bound document tools
+# are kept narrow so one batch cannot exhaust provider quotas or the CPU.
+TASK_CONCURRENCY_LIMITS = {
+    "parse_document": 2,
+    "generate_docx": 2,
+    "generate_pdf": 2,
+    "download_report": 2,
+    "search": 8,
+    "fetch_content": 16,
+    "optimize_research": 4,
+    "analyze_results": 4,
+    "consolidate_report": 2,
+    "generate_final_report": 2,
+    "generate_question": 4,
+}
+DEFAULT_TASK_CONCURRENCY = 4
+
+# Seconds a successful result stays cached, per task. Tasks that are not listed
+# (LLM report generation, document export, ...) are never cached.
+CACHE_TTLS = {
+    "optimize_research": 7 * 24 * 60 * 60,
+}
+
+# Constraint keys that control the dispatcher and are not passed to the tool.
+# Set "use_cache": False to bypass the result cache for a single call, and
+# "coalesce": False to opt out of sharing an identical in-flight call.
+# "rate_limit": True makes the call wait for its budget in `TASK_RATE_LIMITS`.
+CONTROL_KEYS = ("task", "use_cache", "coalesce", "rate_limit")
+
+# Tasks that keep their own, more specific cache (search caches per normalized
+# query, with TTLs that depend on the time filter; fetch_content keeps pages in
+# a content store and revalidates them with the origin). They are not cached by
+# the dispatcher and receive "use_cache" as an argument instead.
+SELF_CACHING_TASKS = ("search", "fetch_content")
+
+# The rate limit category (see tooling/lib/ratelimit.py) each task draws on,
+# following the limits the web app applies to the same API routes.
+TASK_RATE_LIMITS = {
+    "search": "search",
+    "fetch_content": "content_fetch",
+    "optimize_research": "report_generation",
+    "consolidate_report": "report_generation",
+    "generate_final_report": "report_generation",
+    "analyze_results": "agent_optimizations",
+    "generate_question": "agent_optimizations",
 }
 
+# Tasks that apply their rate limit themselves (search only spends budget on
+# cache misses, per provider) and receive "rate_limit" as an argument instead.
+SELF_LIMITING_TASKS = ("search",)
+
+# Worker threads used to run the synchronous tools from the event loop.
+MAX_WORKER_THREADS = int(os.environ.get("DEEP_RESEARCH_MAX_WORKERS", "32"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_result_cache: Optional[ResultCache] = None
+_result_cache_configured = False
+
+# Concurrent identical calls (same task and arguments) share one execution.
+_single_flight = SingleFlight()
+_async_single_flight = AsyncSingleFlight()
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the shared thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS, thread_name_prefix="deep-research")
+    return _executor
+
+
+def _get_semaphore(task: str) -> asyncio.Semaphore:
+    """
+    Returns the concurrency limiter for a task type on the running event loop.
+    Semaphores are created lazily per loop, so limits changed in
+    `TASK_CONCURRENCY_LIMITS` take effect for the next event loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphores = _loop_semaphores.setdefault(loop, {})
+    if task not in semaphores:
+        limit = TASK_CONCURRENCY_LIMITS.get(task, DEFAULT_TASK_CONCURRENCY)
+        semaphores[task] = asyncio.Semaphore(limit)
+    return semaphores[task]
+
+
+def _prepare_task(constraints: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any], Optional[TaskResult]]:
+    """Validates the constraints and splits them into a task name and its arguments."""
+    task = constraints.get("task")
+    if not task:
+        return None, {}, {"error": "A 'task' must be specified in the constraints", "status": 400}
+
+    if task not in TASK_DISPATCHER:
+        return None, {}, {"error": f"Unknown task: {task}", "status": 400}
+
+    task_args = {k: v for k, v in constraints.items() if k not in CONTROL_KEYS}
+    if task in SELF_CACHING_TASKS and "use_cache" in constraints:
+        task_args["use_cache"] = constraints["use_cache"]
+    if task in SELF_LIMITING_TASKS and "rate_limit" in constraints:
+        task_args["rate_limit"] = constraints["rate_limit"]
+    return task, task_args, None
+
+
+def configure_result_cache(cache: Optional[ResultCache]):
+    """Installs the result cache used by the dispatcher, or disables caching with `None`."""
+    global _result_cache, _result_cache_configured
+    _result_cache, _result_cache_configured = cache, True
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Returns the dispatcher's result cache. Unless one was configured
+    explicitly, it is created on first use in `DEEP_RESEARCH_CACHE_DIR`;
+    caching is off when that variable is not set.
+    """
+    global _result_cache, _result_cache_configured
+    if not _result_cache_configured:
+        cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR")
+        _result_cache = ResultCache(os.path.join(cache_dir, "results.sqlite3")) if cache_dir else None
+        _result_cache_configured = True
+    return _result_cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss statistics of the result cache, or an empty dict when caching is off."""
+    cache = get_result_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _cache_for(task: str, constraints: Dict[str, Any]) -> Optional[ResultCache]:
+    """Returns the cache to use for a call, or `None` if the call must not be cached."""
+    if task not in CACHE_TTLS or not constraints.get("use_cache", True):
+        return None
+    return get_result_cache()
+
+
+def coalescing_stats() -> Dict[str, int]:
+    """Counts of calls, executions and calls coalesced onto an identical in-flight call."""
+    totals = {}
+    for flight in (_single_flight, _async_single_flight):
+        for name, value in flight.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def _cache_get(cache: ResultCache, task: str, key: str) -> Optional[TaskResult]:
+    # A broken cache must never fail the task itself.
+    try:
+        cached = cache.get(key, namespace=task)
+    except (sqlite3.Error, ValueError):
+        cached = None
+    TASK_METRICS.record_cache(task, cached is not None)
+    return cached
+
+
+def _cache_put(cache: ResultCache, task: str, key: str, result: TaskResult):
+    # Only successful results are cached, so failures are retried next time.
+    if not isinstance(result, dict) or "error" in result:
+        return
+    try:
+        cache.set(key, result, ttl=CACHE_TTLS[task], namespace=task)
+    except (sqlite3.Error, TypeError, ValueError):
+        pass
+
+
+# Content types for tools that return a bare document instead of a result dictionary.
+_DOCUMENT_TASKS = {
+    "generate_docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "report.docx"),
+    "generate_pdf": ("application/pdf", "report.pdf"),
+}
+_BINARY_TYPES = (bytes, bytearray, memoryview)
+
+
+def _encode_result(task: str, result: TaskResult) -> str:
+    """Serializes a tool result into the JSON string returned by the orchestrator."""
+    # Binary content is not smuggled through JSON: it is published as an
+    # artifact and replaced by a small handle (see tooling/lib/artifacts.py).
+    if isinstance(result, _BINARY_TYPES):
+        content_type, filename = _DOCUMENT_TASKS.get(task, ("application/octet-stream", None))
+        result = {"artifact": publish(Artifact.from_bytes(result, content_type, filename)), "status": 200}
+    elif isinstance(result, dict) and isinstance(result.get("content"), _BINARY_TYPES):
+        # Copied so that in-process callers keep the original bytes.
+        result = dict(result)
+        artifact = Artifact.from_bytes(
+            result.pop("content"),
+            result.get("content_type", "application/octet-stream"),
+            result.get("filename"),
+        )
+        result["artifact"] = publish(artifact)
+    return encode_json(result)
+
+
+def _limiter_for(task: str, task_args: Dict[str, Any], constraints: Dict[str, Any]) -> Optional[RateLimiter]:
+    """Returns the rate limiter a call must wait for, or `None` if the call is not rate limited."""
+    if not constraints.get("rate_limit") or task not in TASK_RATE_LIMITS or task in SELF_LIMITING_TASKS:
+        return None
+    # LLM-backed tasks are limited per platform, e.g. "openai" for "openai__gpt-4o".
+    platform = str(task_args.get("platform_model") or "").split("__")[0]
+    return get_limiter(TASK_RATE_LIMITS[task], platform or None)
+
+
+def _rate_limited(task: str) -> TaskResult:
+    return {"error": f"Rate limit exceeded for task '{task}'. Please try again later.", "status": 429}
+
+
+def _task_error(task: str, e: Exception) -> TaskResult:
+    return {"error": f"An error occurred while executing task '{task}': {e}", "status": 500}
+
+
+def _observe(task: str, task_args: Dict[str, Any], result: TaskResult, start: float) -> TaskResult:
+    """Records a completed call in `TASK_METRICS` and passes its result through."""
+    is_dict = isinstance(result, dict)
+    TASK_METRICS.record_call(
+        task,
+        time.monotonic() - start,
+        status=result.get("status") if is_dict else None,
+        error=is_dict and "error" in result,
+        request_bytes=payload_size(task_args),
+        response_bytes=payload_size(result),
+    )
+    return result
+
+
+def run_task(constraints: Dict[str, Any]) -> TaskResult:
+    """
+    Dispatches a task in-process and returns the tool's result object as-is.
+
+    This is the native counterpart of `execute_research_protocol`: nothing is
+    serialized, so large results (fetched pages, generated documents) are
+    passed back without copies. Validation and tool failures are returned as
+    ``{"error": ..., "status": ...}`` dictionaries rather than raised.
+
+    Concurrent calls with the same task and arguments share one execution
+    and receive the same result object, which callers must not mutate.
+
+    Args:
+        constraints: A dictionary containing the task and its arguments.
+    """
+    start = time.monotonic()
+    task, task_args, error = _prepare_task(constraints)
+    if error:
+        return error
+
+    key = cache_key(task, task_args)
+    cache = _cache_for(task, constraints)
+    if cache is not None:
+        cached = _cache_get(cache, task, key)
+        if cached is not None:
+            return _observe(task, task_args, cached, start)
+
+    limiter = _limiter_for(task, task_args, constraints)
+
+    def execute() -> TaskResult:
+        if limiter is not None and not limiter.acquire():
+            return _rate_limited(task)
+        try:
+            task_function = TASK_DISPATCHER[task]
+            result = task_function(**task_args)
+        except Exception as e:
+            return _task_error(task, e)
+
+        if cache is not None:
+            _cache_put(cache, task, key, result)
+        return result
+
+    if not constraints.get("coalesce", True):
+        result = execute()
+    else:
+        result = _single_flight.do(key, execute)
+    return _observe(task, task_args, result, start)
+
+
+async def run_task_async(constraints: Dict[str, Any]) -> TaskResult:
+    """
+    Asynchronous counterpart of `run_task`.
+
+    Coroutine tools are awaited directly; synchronous tools run on a shared
+    thread pool so that blocking network and LLM calls do not stall the
+    event loop. Each task type is bounded by `TASK_CONCURRENCY_LIMITS`.
+    """
+    start = time.monotonic()
+    task, task_args, error = _prepare_task(constraints)
+    if error:
+        return error
+
+    key = cache_key(task, task_args)
+    cache = _cache_for(task, constraints)
+    if cache is not None:
+        cached = _cache_get(cache, task, key)
+        if cached is not None:
+            return _observe(task, task_args, cached, start)
+
+    limiter = _limiter_for(task, task_args, constraints)
+
+    async def execute() -> TaskResult:
+        if limiter is not None and not await limiter.acquire_async():
+            return _rate_limited(task)
+        try:
+            task_function = TASK_DISPATCHER[task]
+            async with _get_semaphore(task):
+                if inspect.iscoroutinefunction(task_function):
+                    result = await task_function(**task_args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        _get_executor(), functools.partial(task_function, **task_args)
+                    )
+        except Exception as e:
+            return _task_error(task, e)
+
+        if cache is not None:
+            _cache_put(cache, task, key, result)
+        return result
+
+    if not constraints.get("coalesce", True):
+        result = await execute()
+    else:
+        result = await _async_single_flight.do(key, execute)
+    return _observe(task, task_args, result, start)
+
+
+def _with_rate_limit(constraints_list: List[Dict[str, Any]], rate_limit: bool) -> List[Dict[str, Any]]:
+    if not rate_limit:
+        return constraints_list
+    return [{"rate_limit": True, **constraints} for constraints in constraints_list]
+
+
+async def run_many_async(constraints_list: List[Dict[str, Any]], rate_limit: bool = False) -> List[TaskResult]:
+    """
+    Runs a batch of independent tasks concurrently on the running event loop.
+
+    With ``rate_limit=True``, calls are scheduled through the limits in
+    `TASK_RATE_LIMITS` (unless their constraints set "rate_limit" themselves).
+
+    Returns:
+        The result objects, in the same order as `constraints_list`. A failing
+        task yields an error result without affecting the rest of the batch.
+    """
+    constraints_list = _with_rate_limit(constraints_list, rate_limit)
+    return list(await asyncio.gather(*(run_task_async(constraints) for constraints in constraints_list)))
+
+
+def run_many(constraints_list: List[Dict[str, Any]], rate_limit: bool = False) -> List[TaskResult]:
+    """
+    Synchronous entry point for `run_many_async`. Must not be called from
+    inside a running event loop.
+    """
+    return asyncio.run(run_many_async(constraints_list, rate_limit))
+
+
+def _to_json(constraints: Dict[str, Any], result: TaskResult) -> str:
+    task = constraints.get("task")
+    try:
+        return _encode_result(task, result)
+    except Exception as e:
+        return encode_json(_task_error(task, e))
+
+
 def execute_research_protocol(constraints: Dict[str, Any]) -> str:
     """
     Orchestrates the research workflow by dispatching tasks to the
@@ -40,30 +438,49 @@ def execute_research_protocol(constraints: Dict[str, Any]) -> str:
     determines which tool to run. The rest of the keys in `constraints`
     are passed as keyword arguments to the selected tool.
 
+    This is the JSON boundary of the toolchain; in-process callers should
+    use `run_task` to avoid a serialize/parse round-trip.
+
     Args:
         constraints: A dictionary containing the task and its arguments.
 
     Returns:
         A JSON string representing the result from the executed tool.
     """
-    task = constraints.get("task")
-    if not task:
-        return json.dumps({"error": "A 'task' must be specified in the constraints", "status": 400})
+    return _to_json(constraints, run_task(constraints))
 
-    if task not in TASK_DISPATCHER:
-        return json.dumps({"error": f"Unknown task: {task}", "status": 400})
 
-    task_function = TASK_DISPATCHER[task]
-    task_args = {k: v for k, v in constraints.items() if k != 'task'}
+async def execute_research_protocol_async(constraints: Dict[str, Any]) -> str:
+    """
+    Asynchronous counterpart of `execute_research_protocol`, built on
+    `run_task_async`.
 
-    try:
-        result = task_function(**task_args)
-        # The download tool returns bytes, which are not directly JSON serializable.
-        # We handle this by not double-encoding the result if it's already a dict with bytes.
-        if task == "download_report" and isinstance(result.get("content"), bytes):
-            # For simplicity in the toolchain, we'll encode bytes to a string for the JSON wrapper.
-            # A more robust system might handle binary data differently.
-            result["content"] = result["content"].decode('latin1')
-        return json.dumps(result)
-    except Exception as e:
-        return json.dumps({"error": f"An error occurred while executing task '{task}': {e}", "status": 500})
\ No newline at end of file
+    Args:
+        constraints: A dictionary containing the task and its arguments.
+
+    Returns:
+        A JSON string representing the result from the executed tool.
+    """
+    return _to_json(constraints, await run_task_async(constraints))
+
+
+async def execute_many_async(constraints_list: List[Dict[str, Any]], rate_limit: bool = False) -> List[str]:
+    """
+    Runs a batch of independent tasks concurrently on the running event loop,
+    optionally rate limited as in `run_many_async`.
+
+    Returns:
+        The JSON results, in the same order as `constraints_list`. A failing
+        task yields an error result without affecting the rest of the batch.
+    """
+    results = await run_many_async(constraints_list, rate_limit)
+    return [_to_json(constraints, result) for constraints, result in zip(constraints_list, results)]
+
+
+def execute_many(constraints_list: List[Dict[str, Any]], rate_limit: bool = False) -> List[str]:
+    """
+    Synchronous entry point for running a batch of independent tasks
+    concurrently. Must not be called from inside a running event loop;
+    use `execute_many_async` there instead.
+    """
+    return asyncio.run(execute_many_async(constraints_list, rate_limit))
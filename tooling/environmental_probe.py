@@ -4,6 +4,14 @@ import uuid
 import requests
 import datetime
 
+try:
+    from tooling.lib.http import get_session
+except ImportError:  # run as a script (e.g. `python3 tooling/environmental_probe.py`), outside the package
+    _session = requests.Session()
+
+    def get_session() -> requests.Session:
+        return _session
+
 def probe_filesystem():
     """
     Tests file system write/read/delete capabilities and measures latency.
@@ -44,7 +52,7 @@ def probe_network():
     url = "https://www.google.com"
     try:
         start_time = time.monotonic()
-        response = requests.head(url, timeout=5)
+        response = get_session().head(url, timeout=5)
         end_time = time.monotonic()
 
         latency_ms = (end_time - start_time) * 1000
@@ -0,0 +1,101 @@
+"""
+Measures the startup cost of importing a toolchain module.
+
+Runs a fresh interpreter with ``python -X importtime``, parses the per-module
+timings it writes to stderr, and reports the slowest imports. The script
+exits non-zero if the import exceeds a time budget or pulls in any of the
+forbidden heavy modules, so it can be used to catch startup regressions.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List, Sequence
+
+# Tool dependencies that must only be loaded when their task is dispatched.
+HEAVY_TOOL_MODULES = ["docx", "markdown_pdf", "officeparserpy", "requests"]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parses `-X importtime` output into a list of per-module timing entries."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def measure_import(module: str, python: str = sys.executable) -> List[Dict[str, Any]]:
+    """Imports `module` in a fresh interpreter and returns its import timings."""
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def benchmark_import(module: str, runs: int = 5, forbidden: Sequence[str] = HEAVY_TOOL_MODULES) -> Dict[str, Any]:
+    """
+    Imports `module` `runs` times and summarizes the results.
+
+    Returns:
+        A report with the median total import time in milliseconds, the
+        slowest modules of the last run, and any forbidden modules loaded.
+    """
+    totals, entries = [], []
+    for _ in range(runs):
+        entries = measure_import(module)
+        top_level = [entry for entry in entries if entry["depth"] == 0]
+        totals.append(sum(entry["cumulative_us"] for entry in top_level) / 1000)
+
+    loaded = {entry["module"] for entry in entries}
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(totals),
+        "slowest": sorted(entries, key=lambda entry: entry["self_us"], reverse=True),
+        "forbidden_loaded": sorted(name for name in forbidden if name in loaded),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report the import time of a toolchain module.")
+    parser.add_argument("--module", default="tooling.deep_research", help="The module to import.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list.")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median import time exceeds this budget.")
+    parser.add_argument("--forbid", nargs="*", default=HEAVY_TOOL_MODULES, help="Modules that must not be imported.")
+    args = parser.parse_args()
+
+    report = benchmark_import(args.module, runs=args.runs, forbidden=args.forbid)
+
+    print(f"--- Import Time Report: {report['module']} ---")
+    print(f"Median over {report['runs']} runs: {report['median_ms']:.2f} ms")
+    print(f"{'self [us]':>10} | {'cumulative':>10} | module")
+    for entry in report["slowest"][:args.top]:
+        print(f"{entry['self_us']:>10} | {entry['cumulative_us']:>10} | {'  ' * entry['depth']}{entry['module']}")
+
+    failed = False
+    if report["forbidden_loaded"]:
+        print(f"FAIL: forbidden modules imported: {', '.join(report['forbidden_loaded'])}")
+        failed = True
+    if args.max_ms is not None and report["median_ms"] > args.max_ms:
+        print(f"FAIL: median import time {report['median_ms']:.2f} ms exceeds budget of {args.max_ms:.2f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
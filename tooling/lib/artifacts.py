@@ -0,0 +1,244 @@
+"""
+Binary artifacts produced by tools (generated DOCX/PDF files, downloads).
+
+Rather than smuggling bytes through JSON, a result carries a small handle to
+an `Artifact`. The artifact is backed by the original buffer (viewed through
+a `memoryview`, so it is never copied), a spooled temporary file, or a file
+on disk, and can be streamed to a path, file object or socket in chunks.
+"""
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Union, IO
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Artifacts larger than this are kept in memory only up to this size when
+# written through `Artifact.spooled`; the rest spills to a temporary file.
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# When set, artifacts published through the JSON boundary are written to this
+# directory so that other processes can open them by path.
+ARTIFACT_DIR = os.environ.get("DEEP_RESEARCH_ARTIFACT_DIR")
+
+
+class Artifact:
+    """A handle to a binary blob with its content type and filename."""
+
+    def __init__(
+        self,
+        content_type: str = "application/octet-stream",
+        filename: Optional[str] = None,
+        buffer: Optional[Union[bytes, bytearray, memoryview]] = None,
+        path: Optional[str] = None,
+        fileobj: Optional[IO[bytes]] = None,
+    ):
+        if sum(source is not None for source in (buffer, path, fileobj)) != 1:
+            raise ValueError("An artifact needs exactly one of buffer, path or fileobj")
+        self.id = uuid.uuid4().hex
+        self.content_type = content_type
+        self.filename = filename
+        self.path = path
+        self._buffer = memoryview(buffer).cast("B") if buffer is not None else None
+        self._file = fileobj
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview], content_type: str = "application/octet-stream",
+                   filename: Optional[str] = None) -> "Artifact":
+        """Wraps an existing buffer without copying it."""
+        return cls(content_type, filename, buffer=data)
+
+    @classmethod
+    def from_path(cls, path: str, content_type: str = "application/octet-stream",
+                  filename: Optional[str] = None) -> "Artifact":
+        """Wraps a file that already exists on disk."""
+        return cls(content_type, filename or os.path.basename(path), path=path)
+
+    @classmethod
+    def spooled(cls, content_type: str = "application/octet-stream", filename: Optional[str] = None,
+                max_memory: int = SPOOL_MAX_MEMORY) -> "Artifact":
+        """
+        Creates an empty artifact backed by a spooled temporary file, for
+        producers that write their output incrementally via `write`.
+        """
+        return cls(content_type, filename, fileobj=tempfile.SpooledTemporaryFile(max_size=max_memory))
+
+    @property
+    def closed(self) -> bool:
+        """Whether `close` released the artifact's in-memory or temporary storage."""
+        return self._buffer is None and self._file is None and self.path is None
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError("artifact is closed")
+
+    @property
+    def size(self) -> int:
+        self._check_open()
+        if self._buffer is not None:
+            return self._buffer.nbytes
+        if self._file is not None:
+            position = self._file.tell()
+            size = self._file.seek(0, os.SEEK_END)
+            self._file.seek(position)
+            return size
+        return os.path.getsize(self.path)
+
+    def write(self, data: Union[bytes, memoryview]) -> int:
+        """Appends data to a spooled artifact."""
+        self._check_open()
+        if self._file is None:
+            raise TypeError("Only spooled artifacts can be written to")
+        self._file.seek(0, os.SEEK_END)
+        return self._file.write(data)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Union[bytes, memoryview]]:
+        """Yields the content in chunks; in-memory artifacts yield zero-copy views."""
+        self._check_open()
+        if self._buffer is not None:
+            for start in range(0, self._buffer.nbytes, chunk_size):
+                yield self._buffer[start:start + chunk_size]
+            return
+
+        if self._file is not None:
+            self._file.seek(0)
+            while chunk := self._file.read(chunk_size):
+                yield chunk
+            return
+
+        with open(self.path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def read(self) -> bytes:
+        """Returns the full content as bytes. This copies; prefer `write_to` for large artifacts."""
+        if self._buffer is not None:
+            return self._buffer.tobytes()
+        return b"".join(self.iter_chunks())
+
+    def write_to(self, target: Union[str, os.PathLike, IO[bytes], socket.socket],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Streams the content to a filesystem path, a binary file object or a
+        connected socket.
+
+        Returns:
+            The number of bytes written.
+        """
+        self._check_open()
+        if isinstance(target, (str, os.PathLike)):
+            if self.path is not None:
+                shutil.copyfile(self.path, target)
+                return self.size
+            with open(target, "wb") as f:
+                return self.write_to(f, chunk_size)
+
+        if isinstance(target, socket.socket):
+            if self.path is not None:
+                # Let the kernel copy straight from the file to the socket.
+                with open(self.path, "rb") as f:
+                    return target.sendfile(f)
+            written = 0
+            for chunk in self.iter_chunks(chunk_size):
+                target.sendall(chunk)
+                written += len(chunk)
+            return written
+
+        written = 0
+        for chunk in self.iter_chunks(chunk_size):
+            target.write(chunk)
+            written += len(chunk)
+        return written
+
+    def persist(self, directory: str) -> str:
+        """Writes the artifact into `directory` (if not already on disk) and switches to the file backing."""
+        if self.path is None:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.id}-{self.filename or 'artifact'}")
+            self.write_to(path)
+            self.close()
+            self.path, self._buffer, self._file = path, None, None
+        return self.path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # Outstanding chunk views keep the underlying buffer alive on their own.
+        self._buffer = None
+
+    def to_json(self) -> Dict[str, Any]:
+        """The small, JSON-serializable handle that replaces the content in a result."""
+        handle = {
+            "artifact_id": self.id,
+            "size": self.size,
+            "content_type": self.content_type,
+            "filename": self.filename,
+        }
+        if self.path is not None:
+            handle["path"] = self.path
+        return handle
+
+
+class ArtifactStore:
+    """
+    An in-process registry of published artifacts, looked up by id. The
+    oldest in-memory artifacts are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._artifacts: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, artifact: Artifact) -> Artifact:
+        with self._lock:
+            self._artifacts[artifact.id] = artifact
+            self._evict()
+        return artifact
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        with self._lock:
+            return self._artifacts.get(artifact_id)
+
+    def release(self, artifact_id: str):
+        """Drops an artifact from the store and frees its in-memory or temporary storage."""
+        with self._lock:
+            artifact = self._artifacts.pop(artifact_id, None)
+        if artifact is not None:
+            artifact.close()
+
+    def _evict(self):
+        in_memory = [a for a in self._artifacts.values() if a.path is None]
+        total = sum(a.size for a in in_memory)
+        for artifact in in_memory:
+            if total <= self.max_bytes or len(self._artifacts) == 1:
+                break
+            total -= artifact.size
+            del self._artifacts[artifact.id]
+            artifact.close()
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+
+ARTIFACTS = ArtifactStore()
+
+
+def publish(artifact: Artifact) -> Dict[str, Any]:
+    """
+    Registers an artifact and returns its JSON handle. Artifacts are written
+    to `ARTIFACT_DIR` first when it is configured.
+    """
+    if ARTIFACT_DIR:
+        artifact.persist(ARTIFACT_DIR)
+    return ARTIFACTS.put(artifact).to_json()
+
+
+def get_artifact(artifact_id: str) -> Optional[Artifact]:
+    """Looks up a published artifact by the id from its JSON handle."""
+    return ARTIFACTS.get(artifact_id)
@@ -0,0 +1,155 @@
+"""
+A content-addressed, disk-backed cache for tool results.
+
+Entries are keyed by a stable hash of a namespace (usually the task name)
+and its canonicalized arguments, stored compressed in a SQLite database so
+they survive restarts and can be shared by several processes, and bounded
+by an LRU limit on the number of entries and their total size.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+from .records import Record
+
+
+def _canonical_default(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__bytes_sha256__": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def canonicalize(value: Any) -> str:
+    """Serializes arguments deterministically: sorted keys, no whitespace, bytes by digest."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonical_default)
+
+
+def cache_key(namespace: str, args: Dict[str, Any]) -> str:
+    """Returns the stable cache key for a namespace and its arguments."""
+    return hashlib.sha256(f"{namespace}\0{canonicalize(args)}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    A persistent LRU cache of JSON-serializable values with per-entry TTLs.
+
+    Args:
+        path: The SQLite database file; created if it does not exist.
+        max_entries: Maximum number of entries before the least recently used are evicted.
+        max_bytes: Maximum total size of the stored (compressed) values.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, max_bytes: int = 512 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._namespace_stats: Dict[str, Dict[str, int]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _count(self, namespace: str, stat: str):
+        self._stats[stat] += 1
+        counters = self._namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0, "stores": 0})
+        if stat in counters:
+            counters[stat] += 1
+
+    def get(self, key: str, namespace: str = "default", default: Any = None) -> Any:
+        """Returns the cached value, or `default` if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count(namespace, "misses")
+                return default
+            try:
+                value = json.loads(zlib.decompress(row[0]))
+            except (zlib.error, ValueError):
+                # A corrupt or truncated entry is dropped and reported as a miss.
+                with self._conn:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count(namespace, "misses")
+                return default
+            with self._conn:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count(namespace, "hits")
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, namespace: str = "default"):
+        """Stores a value; `ttl` is in seconds, and `None` means it never expires."""
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, blob, len(blob), expires_at, now),
+            )
+            self._count(namespace, "stores")
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            self._stats["evictions"] += 1
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/store/eviction counters for this process, plus the current store size."""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": count,
+                "bytes": total,
+                "namespaces": {name: dict(counters) for name, counters in self._namespace_stats.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
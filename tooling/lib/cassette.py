@@ -0,0 +1,295 @@
+"""
+Record and replay of outbound HTTP traffic, for offline benchmarks and tests.
+
+A `Cassette` patches `requests.Session.send` (which every module-level
+`requests.get`/`requests.post` goes through) and, when `httpx` is installed,
+`httpx.Client.send` and `httpx.AsyncClient.send`, which the OpenAI and
+Anthropic SDKs use. In record mode every request is sent for real and the
+exchange is appended to a JSON cassette file; in replay mode responses are
+served from the cassette without touching the network, optionally after the
+recorded or a synthetic latency.
+
+Credentials are never written: authorization headers are dropped and API
+key query parameters are redacted before a request is recorded or matched.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Union, Callable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is optional
+    httpx = None
+
+RECORD, REPLAY = "record", "replay"
+CASSETTE_VERSION = 1
+
+REDACTED = "REDACTED"
+SENSITIVE_HEADERS = {"authorization", "x-api-key", "ocp-apim-subscription-key", "x-goog-api-key", "cookie"}
+# `cx` identifies a Google search engine rather than authenticating, but is
+# redacted too so that a cassette replays with placeholder credentials.
+SENSITIVE_PARAMS = {"key", "api_key", "apikey", "token", "cx"}
+
+# Headers that describe the wire encoding; bodies are stored decoded.
+_TRANSPORT_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+Latency = Union[None, str, float, Callable[[Dict[str, Any]], float]]
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that is not in the cassette."""
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, REDACTED if k.lower() in SENSITIVE_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit(parts._replace(query=urlencode(sorted(query))))
+
+
+def _encode_body(body: Optional[Union[str, bytes]]) -> Dict[str, Any]:
+    if body is None:
+        return {"body": None, "encoding": None}
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        return {"body": body.decode("utf-8"), "encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "encoding": "base64"}
+
+
+def _decode_body(stored: Dict[str, Any]) -> bytes:
+    if stored.get("body") is None:
+        return b""
+    if stored.get("encoding") == "base64":
+        return base64.b64decode(stored["body"])
+    return stored["body"].encode("utf-8")
+
+
+def _body_bytes(body: Any) -> bytes:
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    # Generators and file-like bodies are not replayable; match them by method and URL only.
+    return b""
+
+
+def request_key(method: str, url: str, body: Any) -> str:
+    """The identity of a request for replay: method, redacted URL and a digest of the body."""
+    digest = hashlib.sha256(_body_bytes(body)).hexdigest()
+    return f"{method.upper()} {_redact_url(url)} {digest}"
+
+
+def _httpx_body(request: "httpx.Request") -> bytes:
+    try:
+        return request.content
+    except httpx.RequestNotRead:
+        return b""
+
+
+def _clean_headers(headers: Any, drop: set) -> Dict[str, str]:
+    return {k: v for k, v in dict(headers).items() if k.lower() not in drop}
+
+
+class Cassette:
+    """
+    A recording of HTTP exchanges, used as a context manager.
+
+    Args:
+        path: The cassette file. Written on exit in record mode; must exist in replay mode.
+        mode: ``"record"`` or ``"replay"``.
+        latency: In replay mode, ``"recorded"`` sleeps for each exchange's
+            recorded duration, a number sleeps for that many seconds, a
+            callable receives the interaction and returns the delay, and
+            ``None`` serves responses immediately.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency: Latency = None):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.interactions: List[Dict[str, Any]] = []
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._queues: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._played: Dict[str, int] = defaultdict(int)
+        self._patches: List[tuple] = []
+        if mode == REPLAY:
+            self.load()
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.interactions = data.get("interactions", [])
+        self._queues.clear()
+        self._played.clear()
+        for interaction in self.interactions:
+            self._queues[interaction["key"]].append(interaction)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions)}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    # --- Recording ---
+
+    def _record(self, method: str, url: str, request_headers: Any, request_body: Any,
+                status: int, reason: str, response_headers: Any, content: bytes, elapsed: float):
+        interaction = {
+            "key": request_key(method, url, request_body),
+            "request": {
+                "method": method.upper(),
+                "url": _redact_url(url),
+                "headers": _clean_headers(request_headers, SENSITIVE_HEADERS),
+                **_encode_body(_body_bytes(request_body) or None),
+            },
+            "response": {
+                "status": status,
+                "reason": reason,
+                "headers": _clean_headers(response_headers, _TRANSPORT_HEADERS | {"set-cookie"}),
+                **_encode_body(content),
+            },
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    # --- Replay ---
+
+    def _next(self, method: str, url: str, body: Any) -> Dict[str, Any]:
+        """Returns the next recorded exchange for a request; the last one repeats once exhausted."""
+        key = request_key(method, url, body)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for {method.upper()} {_redact_url(url)}")
+            index = min(self._played[key], len(queue) - 1)
+            self._played[key] += 1
+            return queue[index]
+
+    def _delay(self, interaction: Dict[str, Any]) -> float:
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return interaction.get("elapsed", 0.0)
+        if callable(self.latency):
+            return self.latency(interaction)
+        return float(self.latency)
+
+    def _replay_requests(self, request: requests.PreparedRequest) -> requests.Response:
+        try:
+            interaction = self._next(request.method, request.url, request.body)
+        except CassetteMiss as e:
+            raise requests.exceptions.ConnectionError(str(e), request=request)
+        time.sleep(self._delay(interaction))
+
+        stored = interaction["response"]
+        response = requests.Response()
+        response.status_code = stored["status"]
+        response.reason = stored.get("reason", "")
+        response.headers = CaseInsensitiveDict(stored["headers"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = _decode_body(stored)
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction.get("elapsed", 0.0))
+        return response
+
+    def _httpx_response(self, request: "httpx.Request", interaction: Dict[str, Any]) -> "httpx.Response":
+        stored = interaction["response"]
+        return httpx.Response(stored["status"], headers=stored["headers"], content=_decode_body(stored), request=request)
+
+    # --- Patching ---
+
+    def _patch(self, owner: Any, name: str, replacement: Callable):
+        self._patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def __enter__(self) -> "Cassette":
+        cassette = self
+        original_send = requests.Session.send
+
+        def requests_send(session, request, **kwargs):
+            if cassette.mode == REPLAY:
+                return cassette._replay_requests(request)
+            start = time.monotonic()
+            response = original_send(session, request, **kwargs)
+            content = response.content
+            cassette._record(request.method, request.url, request.headers, request.body, response.status_code,
+                             response.reason, response.headers, content, time.monotonic() - start)
+            return response
+
+        self._patch(requests.Session, "send", requests_send)
+
+        if httpx is not None:
+            original_client_send = httpx.Client.send
+            original_async_send = httpx.AsyncClient.send
+
+            def httpx_send(client, request, **kwargs):
+                if cassette.mode == REPLAY:
+                    try:
+                        interaction = cassette._next(request.method, str(request.url), _httpx_body(request))
+                    except CassetteMiss as e:
+                        raise httpx.ConnectError(str(e), request=request)
+                    time.sleep(cassette._delay(interaction))
+                    return cassette._httpx_response(request, interaction)
+                start = time.monotonic()
+                response = original_client_send(client, request, **kwargs)
+                content = response.read()
+                cassette._record(request.method, str(request.url), request.headers, _httpx_body(request),
+                                 response.status_code, response.reason_phrase, response.headers, content,
+                                 time.monotonic() - start)
+                return response
+
+            async def httpx_async_send(client, request, **kwargs):
+                if cassette.mode == REPLAY:
+                    try:
+                        interaction = cassette._next(request.method, str(request.url), _httpx_body(request))
+                    except CassetteMiss as e:
+                        raise httpx.ConnectError(str(e), request=request)
+                    await asyncio.sleep(cassette._delay(interaction))
+                    return cassette._httpx_response(request, interaction)
+                start = time.monotonic()
+                response = await original_async_send(client, request, **kwargs)
+                content = await response.aread()
+                cassette._record(request.method, str(request.url), request.headers, _httpx_body(request),
+                                 response.status_code, response.reason_phrase, response.headers, content,
+                                 time.monotonic() - start)
+                return response
+
+            self._patch(httpx.Client, "send", httpx_send)
+            self._patch(httpx.AsyncClient, "send", httpx_async_send)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._patches:
+            owner, name, original = self._patches.pop()
+            setattr(owner, name, original)
+        if self.mode == RECORD:
+            self.save()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"interactions": len(self.interactions), "replayed": sum(self._played.values()), "misses": self.misses}
+
@@ -0,0 +1,199 @@
+"""
+An on-disk store of fetched page content with HTTP revalidation.
+
+Pages are keyed by their normalized URL (and how they were fetched: through
+the reader service or directly) and stored compressed in a SQLite file. A
+stored page is served as is until it expires (after the origin's
+``Cache-Control: max-age`` or `DEFAULT_CONTENT_TTL`); after that it is
+revalidated with ``If-None-Match``/``If-Modified-Since`` when the origin sent
+an ``ETag`` or ``Last-Modified`` header, and re-downloaded otherwise. The
+least recently used pages are evicted once the store exceeds its size limit.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, Mapping, Optional
+
+from .urls import normalize_url
+
+# Seconds a page is served without revalidation, unless the origin says otherwise.
+DEFAULT_CONTENT_TTL = float(os.environ.get("DEEP_RESEARCH_CONTENT_TTL", str(24 * 60 * 60)))
+
+# Total size of the stored (compressed) pages before the least recently used are evicted.
+DEFAULT_STORE_BYTES = int(os.environ.get("DEEP_RESEARCH_CONTENT_STORE_BYTES", str(1024 * 1024 * 1024)))
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def ttl_from_headers(headers: Mapping[str, str], default: float = DEFAULT_CONTENT_TTL) -> Optional[float]:
+    """
+    How long a response may be served without revalidation: its
+    ``max-age``, `default` without one, and `None` if it must not be stored.
+    """
+    cache_control = headers.get("Cache-Control") or ""
+    if "no-store" in cache_control.lower():
+        return None
+    match = _MAX_AGE.search(cache_control)
+    return float(match.group(1)) if match else default
+
+
+def conditional_headers(entry: Mapping[str, Any]) -> Dict[str, str]:
+    """The request headers that revalidate a stored page."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+class ContentStore:
+    """
+    A persistent, size-bounded store of page content.
+
+    Args:
+        path: The SQLite database file; created if it does not exist.
+        max_bytes: Maximum total size of the stored (compressed) content.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_STORE_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidations": 0, "stores": 0, "evictions": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    truncated INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+
+    @staticmethod
+    def key(url: str, mode: str = "reader") -> str:
+        return f"{mode}:{normalize_url(url) or url}"
+
+    def get(self, url: str, mode: str = "reader") -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored page with its `content`, `truncated` flag,
+        validators and whether it is still `fresh`, or `None`. Expired pages
+        without validators are dropped, since they cannot be revalidated.
+        """
+        key = self.key(url, mode)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, truncated, etag, last_modified, expires_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[4] <= now and not (row[2] or row[3])):
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+        return {
+            "content": zlib.decompress(row[0]).decode("utf-8"), "truncated": bool(row[1]),
+            "etag": row[2], "last_modified": row[3], "fresh": row[4] > now,
+        }
+
+    def put(self, url: str, content: str, mode: str = "reader", ttl: float = DEFAULT_CONTENT_TTL,
+            etag: Optional[str] = None, last_modified: Optional[str] = None, truncated: bool = False):
+        """Stores a page, replacing any previous version."""
+        blob = zlib.compress(content.encode("utf-8"))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, content, size, truncated, etag, last_modified, fetched_at, "
+                "expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(url, mode), url, blob, len(blob), int(truncated), etag, last_modified, now, now + ttl, now),
+            )
+            self._stats["stores"] += 1
+            self._evict()
+
+    def revalidated(self, url: str, mode: str = "reader", ttl: float = DEFAULT_CONTENT_TTL,
+                    etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Marks a stored page as confirmed unchanged by the origin (a 304), extending its lifetime."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, accessed_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now + ttl, now, etag, last_modified, self.key(url, mode)),
+            )
+            self._stats["revalidations"] += 1
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def delete(self, url: str, mode: str = "reader"):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (self.key(url, mode),))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/revalidation/store/eviction counters for this process, plus the current store size."""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            return {**self._stats, "pages": count, "bytes": total}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_content_store: Optional[ContentStore] = None
+_content_store_configured = False
+_content_store_lock = threading.Lock()
+
+
+def configure_content_store(store: Optional[ContentStore]):
+    """Installs the content store used by `fetch_content`, or disables it with `None`."""
+    global _content_store, _content_store_configured
+    with _content_store_lock:
+        _content_store, _content_store_configured = store, True
+
+
+def get_content_store() -> Optional[ContentStore]:
+    """
+    Returns the content store. Unless one was configured explicitly, it is
+    created on first use in `DEEP_RESEARCH_CACHE_DIR`; it is off when that
+    variable is not set.
+    """
+    global _content_store, _content_store_configured
+    with _content_store_lock:
+        if not _content_store_configured:
+            cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR")
+            _content_store = ContentStore(os.path.join(cache_dir, "content.sqlite3")) if cache_dir else None
+            _content_store_configured = True
+        return _content_store
@@ -0,0 +1,176 @@
+"""
+Near-duplicate detection for fetched documents.
+
+Search results often include syndicated copies and mirrors of one article,
+and every copy costs LLM tokens to analyze and cite. Each document gets a
+64-bit SimHash of its word shingles; two documents are near duplicates when
+their fingerprints agree on at least `threshold` of the bits. Candidate pairs
+are found by splitting the fingerprints into bands (fingerprints within k
+bits of each other match exactly in at least one of k + 1 bands), so the work
+grows with the number of documents rather than with its square. numpy, when
+installed, computes fingerprints and distances in bulk.
+"""
+import hashlib
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .records import DocumentLike
+from .search_index import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+FINGERPRINT_BITS = 64
+
+# Words per shingle; longer shingles make reordered or rewritten text look less alike.
+SHINGLE_SIZE = 3
+
+# Fraction of fingerprint bits two documents must share to count as copies.
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get("DEEP_RESEARCH_DEDUP_THRESHOLD", "0.9"))
+
+
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def _mix(value: int) -> int:
+    """The splitmix64 finalizer: spreads every input bit over the whole word."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def _mix_array(values):
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _token_hashes(text: str, cache: Dict[str, int]) -> List[int]:
+    tokens = tokenize(text)
+    for token in set(tokens).difference(cache):
+        cache[token] = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+    return list(map(cache.__getitem__, tokens))
+
+
+def _fingerprint(tokens: List[int], size: int) -> Optional[int]:
+    """
+    The SimHash of a document's shingles, from its token hashes: each shingle
+    hashes to the mix of its tokens' hashes, and each fingerprint bit is the
+    majority vote of that bit across the distinct shingle hashes.
+    """
+    if not tokens:
+        return None
+    count = max(1, len(tokens) - size + 1)
+    if np is not None:
+        values = np.array(tokens, dtype=np.uint64)
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(min(size, len(tokens))):
+            shingles = _mix_array(shingles ^ values[offset:offset + count])
+        shingles = np.unique(shingles)
+        positions = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+        bits = (shingles[:, None] >> positions) & np.uint64(1)
+        majority = (bits.sum(axis=0) * 2 > len(shingles)).astype(np.uint64)
+        return int(np.bitwise_or.reduce(majority << positions))
+    shingles = set()
+    for start in range(count):
+        value = 0
+        for token in tokens[start:start + size]:
+            value = _mix(value ^ token)
+        shingles.add(value)
+    fingerprint = 0
+    # Column j of the binary strings is bit 63 - j, most significant first.
+    for column in zip(*(format(value, "064b") for value in shingles)):
+        fingerprint = (fingerprint << 1) | (column.count("1") * 2 > len(shingles))
+    return fingerprint
+
+
+def simhash(text: str, size: int = SHINGLE_SIZE) -> Optional[int]:
+    """The 64-bit SimHash of a text's `size`-word shingles; `None` for text without words."""
+    return _fingerprint(_token_hashes(text, {}), size)
+
+
+def _max_distance(threshold: float) -> int:
+    if not 0.0 < threshold <= 1.0:
+        raise ValueError(f"The similarity threshold must be in (0, 1], got {threshold}")
+    return int((1.0 - threshold) * FINGERPRINT_BITS + 1e-9)
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    """(shift, mask) of `max_distance + 1` bands covering the fingerprint."""
+    count = min(max_distance + 1, FINGERPRINT_BITS)
+    bounds = [round(i * FINGERPRINT_BITS / count) for i in range(count + 1)]
+    return [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+
+def _distances(pairs: List[Tuple[int, int]], fingerprints: List[Optional[int]]) -> List[int]:
+    if np is not None and hasattr(np, "bitwise_count"):
+        left = np.array([fingerprints[i] for i, _ in pairs], dtype=np.uint64)
+        right = np.array([fingerprints[j] for _, j in pairs], dtype=np.uint64)
+        return np.bitwise_count(left ^ right).tolist()
+    return [bin(fingerprints[i] ^ fingerprints[j]).count("1") for i, j in pairs]
+
+
+def near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> Dict[int, int]:
+    """
+    Finds near-duplicate texts.
+
+    Args:
+        texts: The texts, in order of preference.
+        threshold: The fraction of SimHash bits two texts must share, in (0, 1].
+
+    Returns:
+        A mapping from the index of each duplicate to the index of the first
+        text of its group (copies of copies are grouped together). Texts
+        without words are never duplicates.
+    """
+    max_distance = _max_distance(threshold)
+    cache: Dict[str, int] = {}
+    fingerprints = [_fingerprint(_token_hashes(text, cache), SHINGLE_SIZE) if text else None for text in texts]
+    parent = list(range(len(texts)))
+
+    def root(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def union(a: int, b: int):
+        a, b = root(a), root(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    # Exact copies are grouped directly; only distinct fingerprints are banded.
+    first_with: Dict[int, int] = {}
+    for index, fingerprint in enumerate(fingerprints):
+        if fingerprint is not None:
+            union(first_with.setdefault(fingerprint, index), index)
+
+    bands = _bands(max_distance)
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for fingerprint, index in first_with.items():
+        for band, (shift, mask) in enumerate(bands):
+            buckets[(band, (fingerprint >> shift) & mask)].append(index)
+    pairs = sorted({
+        (first, other)
+        for members in buckets.values() if len(members) > 1
+        for position, first in enumerate(members) for other in members[position + 1:]
+    })
+    if pairs:
+        for (first, other), distance in zip(pairs, _distances(pairs, fingerprints)):
+            if distance <= max_distance:
+                union(first, other)
+
+    return {index: root(index) for index in range(len(texts)) if root(index) != index}
+
+
+def dedup_documents(documents: Sequence[DocumentLike],
+                    threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[DocumentLike]:
+    """
+    Drops near-duplicate documents by their ``content``, keeping the first
+    (highest-ranked) copy of each. Documents without content are kept.
+    """
+    duplicates = near_duplicates([document.get("content") or "" for document in documents], threshold)
+    return [document for index, document in enumerate(documents) if index not in duplicates]
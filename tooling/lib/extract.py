@@ -0,0 +1,464 @@
+"""
+Local extraction of a web page's main content as markdown.
+
+`fetch_content(url, mode='direct')` fetches the origin page itself instead of
+going through the Jina reader, and uses `extract` to turn the HTML into the
+same kind of markdown. The extractor follows the readability approach: it
+drops scripts, navigation, footers and other boilerplate, scores the
+remaining blocks by the amount of prose they hold (penalizing link-heavy
+ones), and renders the best-scoring container with its related siblings.
+
+Parsing is CPU-bound pure Python, so larger pages are extracted in a process
+pool where they do not hold the GIL against the threads doing I/O.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+# Processes in the extraction pool; 0 extracts in the calling thread.
+EXTRACT_WORKERS = int(os.environ.get("DEEP_RESEARCH_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Pages shorter than this (in characters) are extracted inline, where the pool's overhead would dominate.
+EXTRACT_INLINE_CHARS = 16 * 1024
+
+# Elements whose content is never part of the text.
+SKIP_TAGS = frozenset((
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+    "form", "button", "select", "input", "textarea", "head", "link", "meta",
+))
+
+# Elements that hold page furniture rather than content.
+BOILERPLATE_TAGS = frozenset(("nav", "header", "footer", "aside", "menu", "dialog"))
+
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+))
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+BLOCK_TAGS = frozenset(HEADING_TAGS + (
+    "address", "article", "blockquote", "body", "dd", "details", "div", "dl", "dt", "figcaption", "figure",
+    "hr", "html", "li", "main", "ol", "p", "pre", "section", "summary", "table", "ul",
+))
+
+# Blocks whose text is scored as a paragraph of the page.
+PARAGRAPH_TAGS = frozenset(("p", "pre", "td", "blockquote"))
+
+# Class/id patterns of boilerplate, and of content (which overrides them).
+UNLIKELY = re.compile(
+    r"comment|sidebar|footer|masthead|\bnav|menu|share|social|related|promo|advert|\bads?\b|sponsor|cookie|"
+    r"banner|subscribe|newsletter|breadcrumb|popup|modal|pagination|widget|outbrain|taboola",
+    re.IGNORECASE,
+)
+LIKELY = re.compile(r"article|content|main|post|entry|story|body|text|blog", re.IGNORECASE)
+
+# Text shorter than this (in characters) does not count as a paragraph.
+MIN_PARAGRAPH_CHARS = 25
+
+# Deeper elements are flattened into their ancestor, which bounds recursion.
+MAX_DEPTH = 200
+
+_HTML = re.compile(r"<(?:!doctype\s+html|html|head|body|p|div|article|main)\b", re.IGNORECASE)
+
+
+def looks_like_html(text: str) -> bool:
+    """Whether a response body is an HTML document (as opposed to text, markdown or JSON)."""
+    return bool(_HTML.search(text[:4096]))
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: Optional[Dict[str, str]] = None, parent: Optional["_Node"] = None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children: List[Union["_Node", str]] = []
+        self.parent = parent
+
+
+class _TreeBuilder(HTMLParser):
+    """Builds a forgiving element tree: unmatched end tags are ignored, open elements closed by their ancestors'."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#root")
+        self.current = self.root
+        self.depth = 0
+        self.title = ""
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag in ("p", "li", "tr", "td", "th", "dt", "dd") and self.current.tag == tag:
+            self._close(self.current)  # An unclosed <p> or <li> ends at the next one.
+        node = _Node(tag, {name: value or "" for name, value in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS and self.depth < MAX_DEPTH:
+            self.current = node
+            self.depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(_Node(tag, {name: value or "" for name, value in attrs}, self.current))
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+            return
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self._close(node)
+
+    def _close(self, node: _Node):
+        while self.current is not node:
+            self.current = self.current.parent
+            self.depth -= 1
+        self.current = node.parent
+        self.depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        else:
+            self.current.children.append(data)
+
+
+def _class_and_id(node: _Node) -> str:
+    return f"{node.attrs.get('class', '')} {node.attrs.get('id', '')}"
+
+
+def _is_boilerplate(node: _Node) -> bool:
+    if node.tag in SKIP_TAGS or node.tag in BOILERPLATE_TAGS:
+        return True
+    if "hidden" in node.attrs or node.attrs.get("aria-hidden") == "true":
+        return True
+    if re.search(r"display\s*:\s*none", node.attrs.get("style", "")):
+        return True
+    if node.tag in ("html", "body", "article", "main"):
+        return False
+    names = _class_and_id(node)
+    return bool(UNLIKELY.search(names)) and not LIKELY.search(names)
+
+
+def _prune(node: _Node):
+    node.children = [
+        child for child in node.children
+        if isinstance(child, str) or not _is_boilerplate(child)
+    ]
+    for child in node.children:
+        if isinstance(child, _Node):
+            _prune(child)
+
+
+def _text(node: _Node) -> str:
+    parts = []
+    for child in node.children:
+        parts.append(child if isinstance(child, str) else _text(child))
+    return "".join(parts)
+
+
+def _text_lengths(node: _Node, lengths: Dict[int, tuple]) -> tuple:
+    """Records (text length, link text length) for each element, keyed by id."""
+    text = links = 0
+    for child in node.children:
+        if isinstance(child, str):
+            text += len(child.strip())
+        else:
+            child_text, child_links = _text_lengths(child, lengths)
+            text += child_text
+            links += child_text if child.tag == "a" else child_links
+    lengths[id(node)] = (text, links)
+    return text, links
+
+
+def _has_block_children(node: _Node) -> bool:
+    return any(isinstance(child, _Node) and child.tag in BLOCK_TAGS for child in node.children)
+
+
+def _initial_score(node: _Node) -> float:
+    score = {"article": 10.0, "main": 10.0, "div": 5.0, "section": 3.0, "pre": 3.0, "td": 3.0, "blockquote": 3.0,
+             "ol": -3.0, "ul": -3.0, "dl": -3.0, "li": -3.0, "th": -5.0}.get(node.tag, 0.0)
+    if node.tag in HEADING_TAGS:
+        score -= 5.0
+    if LIKELY.search(_class_and_id(node)):
+        score += 25.0
+    return score
+
+
+def _iter_nodes(node: _Node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed([child for child in node.children if isinstance(child, _Node)]))
+
+
+def _main_content(root: _Node) -> List[_Node]:
+    """The best-scoring content container and the siblings that belong with it."""
+    lengths: Dict[int, tuple] = {}
+    _text_lengths(root, lengths)
+    scores: Dict[int, float] = {}
+    candidates: Dict[int, _Node] = {}
+
+    for node in _iter_nodes(root):
+        if node.tag not in PARAGRAPH_TAGS and not (node.tag == "div" and not _has_block_children(node)):
+            continue
+        text = " ".join(_text(node).split())
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1.0 + text.count(",") + min(len(text) // 100, 3)
+        for ancestor, share in ((node.parent, 1.0), (node.parent.parent if node.parent else None, 0.5)):
+            if ancestor is None or ancestor is root:
+                continue
+            if id(ancestor) not in scores:
+                scores[id(ancestor)] = _initial_score(ancestor)
+                candidates[id(ancestor)] = ancestor
+            scores[id(ancestor)] += score * share
+
+    if not candidates:
+        body = next((node for node in _iter_nodes(root) if node.tag == "body"), root)
+        return [body]
+
+    def final_score(key: int) -> float:
+        text, links = lengths[key]
+        return scores[key] * (1.0 - (links / text if text else 0.0))
+
+    best_key = max(candidates, key=final_score)
+    best = candidates[best_key]
+    if best.parent is None or best.parent is root:
+        return [best]
+
+    threshold = max(10.0, final_score(best_key) * 0.2)
+    selected = []
+    for sibling in best.parent.children:
+        if sibling is best:
+            selected.append(sibling)
+        elif isinstance(sibling, _Node):
+            key = id(sibling)
+            text, links = lengths[key]
+            if key in candidates and final_score(key) >= threshold:
+                selected.append(sibling)
+            elif sibling.tag == "p" and text > 80 and links < 0.25 * text:
+                selected.append(sibling)
+    return selected
+
+
+# --- Rendering ---
+
+def _clean(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _inline(node: Union[_Node, str], base_url: Optional[str]) -> str:
+    if isinstance(node, str):
+        return re.sub(r"\s+", " ", node)
+    tag = node.tag
+    if tag == "br":
+        return "\n"
+    if tag == "img":
+        return ""
+    text = "".join(_inline(child, base_url) for child in node.children)
+    if tag == "a":
+        label = text.strip()
+        href = node.attrs.get("href", "")
+        if not label or not href or href.startswith(("#", "javascript:", "mailto:")):
+            return text
+        return f" [{label}]({urljoin(base_url, href) if base_url else href}) "
+    if tag in ("strong", "b") and text.strip():
+        return f" **{text.strip()}** "
+    if tag in ("em", "i") and text.strip():
+        return f" *{text.strip()}* "
+    if tag == "code" and text.strip():
+        return f" `{text.strip()}` "
+    return text
+
+
+def _rows(table: _Node) -> List[_Node]:
+    rows = []
+    for child in table.children:
+        if isinstance(child, _Node):
+            if child.tag == "tr":
+                rows.append(child)
+            elif child.tag in ("thead", "tbody", "tfoot"):
+                rows.extend(_rows(child))
+    return rows
+
+
+def _render_table(table: _Node, base_url: Optional[str], out: List[str]):
+    rows = [
+        [_clean(_inline(cell, base_url)).replace("\n", " ").replace("|", "\\|")
+         for cell in row.children if isinstance(cell, _Node) and cell.tag in ("td", "th")]
+        for row in _rows(table)
+    ]
+    rows = [row for row in rows if any(row)]
+    if not rows or max(len(row) for row in rows) < 2:
+        # A layout table: render its cells as ordinary blocks.
+        for row in _rows(table):
+            for cell in row.children:
+                if isinstance(cell, _Node):
+                    _render_blocks(cell, base_url, out)
+        return
+    width = max(len(row) for row in rows)
+    lines = []
+    for index, row in enumerate(rows):
+        lines.append("| " + " | ".join(row + [""] * (width - len(row))) + " |")
+        if index == 0:
+            lines.append("|" + " --- |" * width)
+    out.append("\n".join(lines))
+
+
+def _render_list(node: _Node, base_url: Optional[str], out: List[str]):
+    items = []
+    number = 0
+    for child in node.children:
+        if not isinstance(child, _Node) or child.tag != "li":
+            continue
+        number += 1
+        marker = f"{number}." if node.tag == "ol" else "-"
+        blocks: List[str] = []
+        _render_blocks(child, base_url, blocks)
+        lines = "\n".join(blocks).split("\n")
+        if lines and lines[0]:
+            items.append("\n".join([f"{marker} {lines[0]}"] + ["   " + line for line in lines[1:]]))
+    if items:
+        out.append("\n".join(items))
+
+
+def _render_blocks(node: _Node, base_url: Optional[str], out: List[str]):
+    """Appends the markdown blocks of an element's children to `out`."""
+    inline: List[str] = []
+
+    def flush():
+        text = _clean("".join(inline))
+        if text:
+            out.append(text)
+        inline.clear()
+
+    for child in node.children:
+        if isinstance(child, str) or child.tag not in BLOCK_TAGS:
+            inline.append(_inline(child, base_url))
+            continue
+        flush()
+        tag = child.tag
+        if tag in HEADING_TAGS:
+            text = _clean(_inline(child, base_url)).replace("\n", " ")
+            if text:
+                out.append("#" * int(tag[1]) + " " + text)
+        elif tag == "pre":
+            code = _text(child).strip("\n")
+            if code.strip():
+                out.append(f"```\n{code}\n```")
+        elif tag in ("ul", "ol"):
+            _render_list(child, base_url, out)
+        elif tag == "table":
+            _render_table(child, base_url, out)
+        elif tag == "blockquote":
+            blocks: List[str] = []
+            _render_blocks(child, base_url, blocks)
+            if blocks:
+                out.append("\n".join(f"> {line}" if line else ">" for line in "\n\n".join(blocks).split("\n")))
+        elif tag == "hr":
+            out.append("---")
+        else:
+            _render_blocks(child, base_url, out)
+    flush()
+
+
+def extract_markdown(html: str, url: Optional[str] = None) -> Dict[str, str]:
+    """
+    Extracts the main content of an HTML page.
+
+    Args:
+        html: The page source.
+        url: The page's URL, against which relative links are resolved.
+
+    Returns:
+        The page's ``title`` and its main ``content`` as markdown.
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    _prune(builder.root)
+
+    container = _Node("#content")
+    container.children = _main_content(builder.root)
+    blocks: List[str] = []
+    _render_blocks(container, url, blocks)
+
+    title = " ".join(builder.title.split())
+    if not title:
+        heading = next((node for node in _iter_nodes(builder.root) if node.tag == "h1"), None)
+        title = " ".join(_text(heading).split()) if heading is not None else ""
+    return {"title": title, "content": "\n\n".join(blocks)}
+
+
+# --- The extraction pool ---
+
+_executor: Optional[Executor] = None
+_executor_configured = False
+_executor_lock = threading.Lock()
+
+
+def configure_extraction_executor(executor: Optional[Executor]):
+    """Installs the executor extraction runs in, or `None` to extract in the calling thread."""
+    global _executor, _executor_configured
+    with _executor_lock:
+        _executor, _executor_configured = executor, True
+
+
+def get_extraction_executor() -> Optional[Executor]:
+    """
+    Returns the extraction executor. Unless one was configured explicitly, a
+    process pool of `EXTRACT_WORKERS` is created on first use (started with
+    forkserver where available, so workers do not inherit the caller's threads).
+    """
+    global _executor, _executor_configured
+    with _executor_lock:
+        if not _executor_configured:
+            if EXTRACT_WORKERS > 0:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+                _executor = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS,
+                                                mp_context=multiprocessing.get_context(method))
+            _executor_configured = True
+        return _executor
+
+
+def _pool_for(html: str) -> Optional[Executor]:
+    return get_extraction_executor() if len(html) >= EXTRACT_INLINE_CHARS else None
+
+
+def extract(html: str, url: Optional[str] = None) -> Dict[str, str]:
+    """
+    `extract_markdown` in the extraction pool, blocking until it is done.
+    Small pages, and any page when the pool is unavailable, are extracted inline.
+    """
+    executor = _pool_for(html)
+    if executor is not None:
+        try:
+            return executor.submit(extract_markdown, html, url).result()
+        except (BrokenProcessPool, OSError, RuntimeError):
+            pass
+    return extract_markdown(html, url)
+
+
+async def extract_async(html: str, url: Optional[str] = None) -> Dict[str, str]:
+    """Like `extract`, but awaits the pool (or a worker thread) instead of blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    executor = _pool_for(html)
+    if executor is not None:
+        try:
+            return await loop.run_in_executor(executor, extract_markdown, html, url)
+        except (BrokenProcessPool, OSError, RuntimeError):
+            pass
+    return await asyncio.to_thread(extract_markdown, html, url)
@@ -0,0 +1,144 @@
+"""
+Shared, pooled HTTP sessions for the remote tools.
+
+Module-level `requests.get` opens a new connection (and TLS handshake) for
+every call. The tools instead use `get_session()`, a process-wide
+`requests.Session` whose connection pools keep connections to each host
+alive between calls. Pool sizes can be set per host, responses are
+transparently decompressed (including brotli and zstd when the optional
+decoders are installed), and HTTP/2 can be enabled through urllib3 when the
+`h2` package is available.
+"""
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+# Connections kept alive per host, unless overridden in `HOST_POOL_SIZES`.
+DEFAULT_POOL_SIZE = int(os.environ.get("DEEP_RESEARCH_HTTP_POOL_SIZE", "16"))
+
+# Hosts the toolchain talks to most, sized after the dispatcher's per-task
+# concurrency limits (see TASK_CONCURRENCY_LIMITS in tooling/deep_research.py).
+HOST_POOL_SIZES: Dict[str, int] = {
+    "r.jina.ai": 32,
+    "customsearch.googleapis.com": 16,
+    "api.bing.microsoft.com": 16,
+    "api.exa.ai": 16,
+}
+
+# Number of distinct hosts whose pools are kept before the least recently used is closed.
+MAX_HOST_POOLS = 64
+
+HTTP2_ENABLED = os.environ.get("DEEP_RESEARCH_HTTP2", "").lower() in ("1", "true", "yes")
+
+USER_AGENT = "open-deep-research-toolchain"
+
+
+class HostPoolAdapter(HTTPAdapter):
+    """An `HTTPAdapter` whose connection pool size depends on the target host."""
+
+    def __init__(self, host_pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = DEFAULT_POOL_SIZE):
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.default_pool_size = default_pool_size
+        super().__init__(pool_connections=MAX_HOST_POOLS, pool_maxsize=default_pool_size)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        pool_kwargs["maxsize"] = self.host_pool_sizes.get(host_params.get("host"), self.default_pool_size)
+        return host_params, pool_kwargs
+
+
+_http2_enabled = False
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        import urllib3.http2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _enable_http2() -> bool:
+    # urllib3's HTTP/2 support is process-wide and experimental, so it is
+    # only switched on when asked for and `h2` is installed.
+    global _http2_enabled
+    if not _http2_enabled and http2_available():
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+        _http2_enabled = True
+    return _http2_enabled
+
+
+def create_session(
+    host_pool_sizes: Optional[Dict[str, int]] = None,
+    default_pool_size: int = DEFAULT_POOL_SIZE,
+    http2: bool = HTTP2_ENABLED,
+) -> requests.Session:
+    """Creates a `requests.Session` with keep-alive pools sized per host."""
+    if http2:
+        _enable_http2()
+    session = requests.Session()
+    adapter = HostPoolAdapter(HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes, default_pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Advertise every encoding urllib3 can decode (br and zstd when their packages are installed).
+    session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+    session.headers["User-Agent"] = f"{USER_AGENT} {requests.utils.default_user_agent()}"
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide pooled session, creating it on first use. A
+    forked child process gets its own session rather than sharing sockets
+    with its parent.
+    """
+    global _session, _session_pid
+    session = _session
+    if session is not None and _session_pid == os.getpid():
+        return session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session, _session_pid = create_session(), os.getpid()
+        return _session
+
+
+def configure_session(session: Optional[requests.Session]):
+    """Installs the session used by the remote tools; `None` recreates the default on next use."""
+    global _session, _session_pid
+    with _session_lock:
+        previous, _session, _session_pid = _session, session, os.getpid() if session is not None else None
+    if previous is not None and previous is not session:
+        previous.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connection pools of the shared session, keyed by host: pool size, connections opened and requests sent."""
+    session = _session
+    if session is None:
+        return {}
+    stats = {}
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        manager = getattr(adapter, "poolmanager", None)
+        if manager is None:
+            continue
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if isinstance(pool, urllib3.HTTPConnectionPool):
+                stats[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+    return stats
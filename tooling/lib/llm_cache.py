@@ -0,0 +1,115 @@
+"""
+An opt-in, on-disk cache of LLM responses.
+
+Reruns, retries after a downstream failure and identical research prompts
+send the same prompt to the same model again. With the cache on,
+`generate_with_model` answers those from disk. Responses are keyed by the
+platform, the model, a hash of the prompt and the sampling parameters the
+platform sends. They are stored compressed in a `ResultCache`, which
+evicts the least recently used responses once it is over its limits.
+
+Only deterministic calls are cached by default: those with known sampling
+parameters and a temperature of 0. A rerun that samples at a higher
+temperature is asking for a new answer, so it goes to the model. Caching
+sampled output is a separate opt-in: raise
+``DEEP_RESEARCH_LLM_CACHE_MAX_TEMPERATURE`` (1.0 covers every built-in
+platform's default settings). Set ``DEEP_RESEARCH_LLM_CACHE=1`` together with
+``DEEP_RESEARCH_CACHE_DIR`` to turn the cache on.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from .cache import ResultCache, cache_key
+
+# Seconds a response is reused.
+DEFAULT_LLM_CACHE_TTL = float(os.environ.get("DEEP_RESEARCH_LLM_CACHE_TTL", str(30 * 24 * 60 * 60)))
+
+# Total size of the stored (compressed) responses before the least recently used are evicted.
+DEFAULT_LLM_CACHE_BYTES = int(os.environ.get("DEEP_RESEARCH_LLM_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+# Calls that sample above this temperature always go to the model. The default
+# caches only greedy decoding; 1.0 opts in to reusing the sampled output of
+# every built-in platform's default settings.
+MAX_CACHED_TEMPERATURE = float(os.environ.get("DEEP_RESEARCH_LLM_CACHE_MAX_TEMPERATURE", "0"))
+
+# The temperature assumed when a platform leaves it to the provider's default.
+DEFAULT_TEMPERATURE = 1.0
+
+
+def llm_cache_key(platform: str, model: str, prompt: str, sampling: Mapping[str, Any]) -> str:
+    """The cache key of a call: platform, model, prompt hash and sampling parameters."""
+    return cache_key("llm", {
+        "platform": platform,
+        "model": model,
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "sampling": dict(sampling),
+    })
+
+
+def is_cacheable(sampling: Optional[Mapping[str, Any]], max_temperature: Optional[float] = None) -> bool:
+    """
+    Whether responses sampled with these parameters may be reused: their
+    temperature is at most `max_temperature` (`MAX_CACHED_TEMPERATURE` by
+    default). `None` (unknown parameters) and several candidates per call
+    are never cached.
+    """
+    if sampling is None or sampling.get("n", 1) != 1:
+        return False
+    if max_temperature is None:
+        max_temperature = MAX_CACHED_TEMPERATURE
+    return float(sampling.get("temperature", DEFAULT_TEMPERATURE)) <= max_temperature
+
+
+def cached_response(cache: ResultCache, platform: str, key: str) -> Optional[str]:
+    # A broken cache must never fail the call itself.
+    try:
+        return cache.get(key, namespace=f"llm_{platform}")
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+def store_response(cache: ResultCache, platform: str, key: str, response: str):
+    try:
+        cache.set(key, response, ttl=DEFAULT_LLM_CACHE_TTL, namespace=f"llm_{platform}")
+    except sqlite3.Error:
+        pass
+
+
+_llm_cache: Optional[ResultCache] = None
+_llm_cache_configured = False
+_llm_cache_lock = threading.Lock()
+
+
+def configure_llm_cache(cache: Optional[ResultCache]):
+    """Installs the LLM response cache, or disables it with `None`."""
+    global _llm_cache, _llm_cache_configured
+    with _llm_cache_lock:
+        _llm_cache, _llm_cache_configured = cache, True
+
+
+def get_llm_cache() -> Optional[ResultCache]:
+    """
+    Returns the LLM response cache. Unless one was configured explicitly, it
+    is created on first use in `DEEP_RESEARCH_CACHE_DIR` when
+    `DEEP_RESEARCH_LLM_CACHE` is set, and is off otherwise.
+    """
+    global _llm_cache, _llm_cache_configured
+    with _llm_cache_lock:
+        if not _llm_cache_configured:
+            cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR")
+            enabled = os.environ.get("DEEP_RESEARCH_LLM_CACHE", "").lower() in ("1", "true", "yes", "on")
+            _llm_cache = (
+                ResultCache(os.path.join(cache_dir, "llm.sqlite3"), max_bytes=DEFAULT_LLM_CACHE_BYTES)
+                if cache_dir and enabled else None
+            )
+            _llm_cache_configured = True
+        return _llm_cache
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Hit/miss statistics of the LLM response cache (per platform under "namespaces"), or `{}` when it is off."""
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,227 @@
+"""
+In-process instrumentation for the toolchain.
+
+The dispatcher records every task call in `TASK_METRICS`, and the remote
+tools record every provider request in `PROVIDER_METRICS` (see
+`tooling/lib/resilience.py`): call counts, latency histograms measured with
+the monotonic clock, request/response sizes, cache hits and misses, and
+errors by status. `snapshot()` returns the data as a JSON-serializable dict
+and `prometheus_text()` in the Prometheus text exposition format.
+"""
+import bisect
+import threading
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from .records import Record
+
+# Upper bounds, in seconds, of the latency histogram buckets. They span fast
+# cache hits to long LLM generations.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def payload_size(value: Any) -> int:
+    """
+    Approximates the size of a payload in bytes without serializing it:
+    strings count their characters and buffers their bytes, containers the
+    sum of their elements.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, (dict, Record)):
+        return sum(payload_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    return 0
+
+
+class Histogram:
+    """A cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        totals, running = [], 0
+        for count in self.counts:
+            running += count
+            totals.append(running)
+        return totals
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in zip(self.buckets, self.cumulative()):
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class _Series:
+    __slots__ = ("calls", "errors", "latency", "request_bytes", "response_bytes", "cache_hits", "cache_misses")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _json_quantile(value: Optional[float]) -> Union[float, str, None]:
+    # JSON has no infinity; a quantile past the last bucket is reported like its bucket key.
+    return "+Inf" if value == float("inf") else value
+
+
+class MetricsRegistry:
+    """
+    Per-name counters for one family of operations, e.g. tasks or providers.
+
+    Args:
+        prefix: The Prometheus metric name prefix, e.g. ``"deep_research_task"``.
+        label: The label that carries the operation name, e.g. ``"task"``.
+    """
+
+    def __init__(self, prefix: str, label: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._series: Dict[str, _Series] = {}
+
+    def _get(self, name: str) -> _Series:
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = _Series(self.buckets)
+        return series
+
+    def record_call(self, name: str, duration: float, status: Optional[int] = None, error: bool = False,
+                    request_bytes: int = 0, response_bytes: int = 0):
+        """Records one completed call; `error` calls are also counted under their status."""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._get(name)
+            series.calls += 1
+            series.latency.observe(duration)
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            if error:
+                key = str(status) if status is not None else "exception"
+                series.errors[key] = series.errors.get(key, 0) + 1
+
+    def record_cache(self, name: str, hit: bool):
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._get(name)
+            if hit:
+                series.cache_hits += 1
+            else:
+                series.cache_misses += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """The current counters, keyed by operation name."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": series.calls,
+                    "errors": dict(series.errors),
+                    "latency_seconds": {
+                        "count": series.latency.count,
+                        "sum": series.latency.sum,
+                        "p50": _json_quantile(series.latency.quantile(0.5)),
+                        "p99": _json_quantile(series.latency.quantile(0.99)),
+                        "buckets": dict(zip(map(_format_bound, series.latency.buckets + (float("inf"),)),
+                                            series.latency.cumulative())),
+                    },
+                    "request_bytes": series.request_bytes,
+                    "response_bytes": series.response_bytes,
+                    "cache_hits": series.cache_hits,
+                    "cache_misses": series.cache_misses,
+                }
+                for name, series in sorted(self._series.items())
+            }
+
+    def prometheus_lines(self) -> List[str]:
+        p, label = self.prefix, self.label
+        with self._lock:
+            items = sorted(self._series.items())
+            lines = []
+
+            def counter(metric: str, help_text: str, attribute: str):
+                lines.extend([f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} counter"])
+                for name, series in items:
+                    lines.append(f'{p}_{metric}{{{label}="{_escape(name)}"}} {getattr(series, attribute)}')
+
+            counter("calls_total", f"Completed calls per {label}.", "calls")
+
+            lines.extend([f"# HELP {p}_errors_total Failed calls per {label} and status.",
+                          f"# TYPE {p}_errors_total counter"])
+            for name, series in items:
+                for status, count in sorted(series.errors.items()):
+                    lines.append(f'{p}_errors_total{{{label}="{_escape(name)}",status="{_escape(status)}"}} {count}')
+
+            lines.extend([f"# HELP {p}_latency_seconds Call latency per {label}.",
+                          f"# TYPE {p}_latency_seconds histogram"])
+            for name, series in items:
+                bounds = series.latency.buckets + (float("inf"),)
+                for bound, total in zip(bounds, series.latency.cumulative()):
+                    lines.append(f'{p}_latency_seconds_bucket{{{label}="{_escape(name)}",le="{_format_bound(bound)}"}} {total}')
+                lines.append(f'{p}_latency_seconds_sum{{{label}="{_escape(name)}"}} {series.latency.sum}')
+                lines.append(f'{p}_latency_seconds_count{{{label}="{_escape(name)}"}} {series.latency.count}')
+
+            counter("request_bytes_total", f"Approximate request payload bytes per {label}.", "request_bytes")
+            counter("response_bytes_total", f"Approximate response payload bytes per {label}.", "response_bytes")
+            counter("cache_hits_total", f"Result cache hits per {label}.", "cache_hits")
+            counter("cache_misses_total", f"Result cache misses per {label}.", "cache_misses")
+        return lines
+
+
+TASK_METRICS = MetricsRegistry("deep_research_task", "task")
+PROVIDER_METRICS = MetricsRegistry("deep_research_provider", "provider")
+REGISTRIES = {"tasks": TASK_METRICS, "providers": PROVIDER_METRICS}
+
+
+def snapshot() -> Dict[str, Any]:
+    """A JSON-serializable snapshot of all toolchain metrics."""
+    return {family: registry.snapshot() for family, registry in REGISTRIES.items()}
+
+
+def prometheus_text() -> str:
+    """All toolchain metrics in the Prometheus text exposition format."""
+    lines = []
+    for registry in REGISTRIES.values():
+        lines.extend(registry.prometheus_lines())
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    for registry in REGISTRIES.values():
+        registry.reset()
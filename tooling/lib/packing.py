@@ -0,0 +1,204 @@
+"""
+Fits the source documents of an LLM prompt into the model's context window.
+
+The report and analysis prompts embed the full content of every source, and
+long pages can push a prompt past the model's context limit. That makes the
+call slower or makes it fail. `pack_documents` gives each source a share of a
+token budget. A source shorter than its share is kept whole. Its unused
+tokens go to the others, and longer sources are cut at a paragraph or
+sentence boundary. When the shares would become too small to be useful, the
+content of the lowest-value sources is dropped. Their title and URL stay, so
+citation numbers do not change.
+
+Token counts are estimated locally (about four characters per token for
+ASCII text, one per character otherwise), so packing needs no tokenizer and
+no extra model call.
+"""
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .records import DocumentLike, to_dicts
+
+# Context window sizes in tokens, by model name prefix (the longest match wins).
+MODEL_CONTEXT_LIMITS = {
+    "gpt-4.1": 1_047_576,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4": 200_000,
+    "claude": 200_000,
+    "gemini": 1_048_576,
+    "deepseek": 64_000,
+    "llama3": 8_192,
+    "llama-3": 8_192,
+    "llama3.1": 131_072,
+    "llama-3.1": 131_072,
+    "llama3.2": 131_072,
+    "llama-3.2": 131_072,
+    "llama3.3": 131_072,
+    "llama-3.3": 131_072,
+    "mistral": 32_768,
+    "qwen": 32_768,
+}
+
+# Context window sizes for models not listed above, by platform.
+PLATFORM_CONTEXT_LIMITS = {
+    "google": 1_048_576,
+    "anthropic": 200_000,
+    "deepseek": 64_000,
+    "openai": 128_000,
+    "ollama": 8_192,
+}
+
+# Context window size of a model that is not known at all.
+DEFAULT_CONTEXT_LIMIT = int(os.environ.get("DEEP_RESEARCH_CONTEXT_LIMIT", "32768"))
+
+# Tokens kept free for the model's response (at most a quarter of the window).
+RESPONSE_TOKENS = int(os.environ.get("DEEP_RESEARCH_RESPONSE_TOKENS", "8192"))
+
+# Fraction of the window the prompt may fill, leaving room for estimation error.
+PROMPT_FILL = 0.9
+
+# The smallest share worth sending; below it the lowest-value sources lose their content.
+MIN_SOURCE_TOKENS = 256
+
+# Per-source tokens of the prompt's labels ("Title:", "URL:", numbering, separators).
+SOURCE_OVERHEAD_TOKENS = 12
+
+TRUNCATION_MARKER = "\n\n[Content truncated to fit the context window]"
+DROPPED_MARKER = "[Content omitted to fit the context window]"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """A fast estimate of the number of tokens in `text`."""
+    if not text:
+        return 0
+    if text.isascii():
+        return math.ceil(len(text) / 4)
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4) + len(text) - ascii_chars
+
+
+def context_limit(platform_model: str) -> int:
+    """The context window of a ``<platform>__<model>`` model, in tokens."""
+    platform, _, model = platform_model.partition("__")
+    # OpenRouter names models "<vendor>/<model>".
+    name = model.rsplit("/", 1)[-1].lower()
+    prefixes = [prefix for prefix in MODEL_CONTEXT_LIMITS if name.startswith(prefix)]
+    if prefixes:
+        return MODEL_CONTEXT_LIMITS[max(prefixes, key=len)]
+    return PLATFORM_CONTEXT_LIMITS.get(platform, DEFAULT_CONTEXT_LIMIT)
+
+
+def source_budget(platform_model: str, prompt_tokens: int) -> int:
+    """
+    The tokens left for sources in a prompt for `platform_model`, after the
+    response and the `prompt_tokens` of the prompt without sources.
+    """
+    limit = context_limit(platform_model)
+    return max(0, int((limit - min(RESPONSE_TOKENS, limit // 4)) * PROMPT_FILL) - prompt_tokens)
+
+
+def _label_tokens(document: DocumentLike) -> int:
+    return SOURCE_OVERHEAD_TOKENS + sum(
+        estimate_tokens(value) for key, value in document.items() if key != "content" and isinstance(value, str)
+    )
+
+
+def _value_order(documents: Sequence[DocumentLike]) -> List[int]:
+    """Indices from the most to the least valuable source: by `score` when present, else by position."""
+    def score(index: int) -> float:
+        value = documents[index].get("score")
+        return float(value) if isinstance(value, (int, float)) else 0.0
+    if any(isinstance(document.get("score"), (int, float)) for document in documents):
+        return sorted(range(len(documents)), key=lambda index: -score(index))
+    return list(range(len(documents)))
+
+
+def _shares(costs: Dict[int, int], available: int) -> Tuple[Dict[int, int], int]:
+    """Max-min fair shares of `available` tokens, and the share of the sources that do not fit whole."""
+    allocation: Dict[int, int] = {}
+    remaining = available
+    pending = sorted(costs, key=costs.__getitem__)
+    share = remaining
+    for position, index in enumerate(pending):
+        share = remaining // (len(pending) - position)
+        if costs[index] > share:
+            for rest in pending[position:]:
+                allocation[rest] = share
+            return allocation, share
+        allocation[index] = costs[index]
+        remaining -= costs[index]
+    return allocation, share
+
+
+def _truncate(text: str, cost: int, tokens: int) -> str:
+    keep = int(len(text) * max(0, tokens - estimate_tokens(TRUNCATION_MARKER)) / cost)
+    cut = text[:keep]
+    # End at the last paragraph break, else the last sentence, near the cut.
+    for separator in ("\n\n", ". "):
+        boundary = cut.rfind(separator)
+        if boundary > keep * 0.8:
+            cut = cut[:boundary + 1]
+            break
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+def pack_documents(documents: Sequence[DocumentLike],
+                   budget: int) -> Tuple[List[DocumentLike], Optional[Dict[str, Any]]]:
+    """
+    Fits the documents' ``content`` into `budget` tokens.
+
+    Args:
+        documents: The sources, in prompt order. A numeric ``score`` marks
+            their value; otherwise earlier sources are worth more.
+        budget: Tokens available for all sources together, labels included.
+
+    Returns:
+        The documents in the same order (the ones that changed as dicts), and
+        a report of the packing, or `None` if everything fit. The report has
+        the `budget`, the estimated `original_tokens` and packed `tokens`, and
+        the `truncated` (``url``, ``tokens``, ``kept_tokens``) and `dropped`
+        (``url``, ``tokens``) sources.
+    """
+    costs = {index: estimate_tokens(document.get("content")) for index, document in enumerate(documents)}
+    fixed = sum(_label_tokens(document) for document in documents)
+    original = fixed + sum(costs.values())
+    if original <= budget:
+        return list(documents), None
+
+    kept = {index: cost for index, cost in costs.items() if cost}
+    # Every source with content keeps room for the marker it gets if its content is dropped.
+    available = max(0, budget - fixed - len(kept) * estimate_tokens(DROPPED_MARKER))
+    order = [index for index in _value_order(documents) if index in kept]
+    allocation, share = _shares(kept, available)
+    while len(kept) > 1 and share < MIN_SOURCE_TOKENS and any(allocation[i] < kept[i] for i in kept):
+        kept.pop(order.pop())
+        allocation, share = _shares(kept, available)
+    if share <= estimate_tokens(TRUNCATION_MARKER) and kept and any(allocation[i] < kept[i] for i in kept):
+        kept.clear()
+
+    packed: List[DocumentLike] = list(documents)
+    truncated, dropped = [], []
+    for index, cost in costs.items():
+        if not cost or (index in kept and allocation[index] >= cost):
+            continue
+        document = dict(to_dicts([documents[index]])[0])
+        if index in kept:
+            document["content"] = _truncate(document["content"], cost, allocation[index])
+            truncated.append({"url": document.get("url"), "tokens": cost,
+                              "kept_tokens": estimate_tokens(document["content"])})
+        else:
+            document["content"] = DROPPED_MARKER
+            dropped.append({"url": document.get("url"), "tokens": cost})
+        packed[index] = document
+
+    tokens = fixed + sum(estimate_tokens(document.get("content")) for document in packed)
+    return packed, {
+        "budget": budget, "original_tokens": original, "tokens": tokens,
+        "truncated": truncated, "dropped": dropped,
+    }
@@ -0,0 +1,310 @@
+"""
+Rate limiting for calls to paid or quota-bound services.
+
+The default limits mirror `CONFIG.rateLimits` in `lib/config.ts`, which the
+web app enforces per minute through Upstash (`lib/redis.ts`). A
+`RateLimiter` applies either a sliding window (as the web app does) or a
+token bucket, and keeps its state in a pluggable backend: in process memory,
+in a SQLite file shared by every worker process on the machine, or in Redis
+(or any server speaking its protocol) when the `redis` package is installed.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Requests per minute, as in lib/config.ts.
+RATE_LIMITS = {
+    "search": 10,
+    "content_fetch": 20,
+    "report_generation": 5,
+    "agent_optimizations": 10,
+}
+RATE_LIMIT_WINDOW = 60.0
+
+# Per-provider overrides of the limit for a category, e.g. {"search:exa": 30}.
+PROVIDER_RATE_LIMITS: Dict[str, int] = {}
+
+# The longest a caller waits for capacity before giving up.
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("DEEP_RESEARCH_RATE_LIMIT_MAX_WAIT", "120"))
+
+SLIDING_WINDOW, TOKEN_BUCKET = "sliding_window", "token_bucket"
+
+# A state transition: takes the stored state (or None) and returns the new state and a result.
+Transition = Callable[[Optional[Dict[str, Any]]], Tuple[Dict[str, Any], Any]]
+
+
+# --- Backends ---
+
+class MemoryBackend:
+    """Limiter state in process memory; shared by threads, not processes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, key: str, transition: Transition, ttl: float) -> Any:
+        with self._lock:
+            state, result = transition(self._states.get(key))
+            self._states[key] = state
+            return result
+
+
+class SQLiteBackend:
+    """
+    Limiter state in a SQLite file. Every update runs in an immediate
+    transaction, so processes sharing the file share one budget.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def update(self, key: str, transition: Transition, ttl: float) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT state FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                state, result = transition(json.loads(row[0]) if row else None)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, state, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(state), time.time() + ttl),
+                )
+                self._conn.execute("DELETE FROM rate_limits WHERE expires_at < ?", (time.time(),))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend:
+    """
+    Limiter state in Redis, updated with optimistic WATCH/MULTI transactions.
+
+    Args:
+        client: A `redis.Redis` client, or anything with the same pipeline API.
+        prefix: Prepended to every key.
+    """
+
+    def __init__(self, client: Any, prefix: str = "deep_research:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def update(self, key: str, transition: Transition, ttl: float) -> Any:
+        from redis.exceptions import WatchError
+
+        key = self.prefix + key
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    state, result = transition(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(state), ex=max(1, int(ttl)))
+                    pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+
+def backend_from_url(url: Optional[str]) -> Any:
+    """
+    Creates a backend from a URL: ``memory`` (or empty), ``sqlite:///path/to/file``
+    or ``redis://host:port/db``.
+    """
+    if not url or url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite://"):
+        # sqlite:///relative/path or sqlite:////absolute/path, as in SQLAlchemy.
+        return SQLiteBackend(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported rate limit backend: {url}")
+
+
+# --- Algorithms ---
+
+def _sliding_window(limit: int, window: float, cost: int, now: float) -> Transition:
+    """
+    The approximated sliding window of Upstash's `Ratelimit.slidingWindow`:
+    the previous fixed window's count is weighted by how much of it still
+    overlaps the sliding window.
+    """
+    def transition(state):
+        start = now - (now % window)
+        if state is None or state["start"] < start - window:
+            previous, current = 0, 0
+        elif state["start"] < start:
+            previous, current = state["current"], 0
+        else:
+            previous, current = state["previous"], state["current"]
+
+        overlap = 1.0 - (now - start) / window
+        used = previous * overlap + current
+        if used + cost <= limit:
+            return {"start": start, "previous": previous, "current": current + cost}, (True, 0.0)
+
+        # Wait until enough of the previous window has slid out, or for the next window.
+        retry_after = start + window - now
+        if previous and current + cost <= limit:
+            retry_after = min(retry_after, window * (1.0 - (limit - current - cost) / previous) - (now - start))
+        return {"start": start, "previous": previous, "current": current}, (False, max(retry_after, 0.001))
+    return transition
+
+
+def _token_bucket(rate: float, capacity: float, cost: int, now: float) -> Transition:
+    """A bucket of `capacity` tokens, refilled at `rate` tokens per second."""
+    def transition(state):
+        if state is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, state["tokens"] + (now - state["updated"]) * rate)
+        if tokens >= cost:
+            return {"tokens": tokens - cost, "updated": now}, (True, 0.0)
+        return {"tokens": tokens, "updated": now}, (False, (cost - tokens) / rate)
+    return transition
+
+
+class RateLimiter:
+    """
+    Allows at most `limit` units of work per `window` seconds for each key.
+
+    Args:
+        limit: Units allowed per window.
+        window: The window length in seconds.
+        algorithm: ``"sliding_window"`` (the web app's behaviour) or
+            ``"token_bucket"``, which also allows bursts of up to `burst` units.
+        backend: Where the state lives; defaults to process memory.
+        name: A namespace for the backend keys, so limiters can share a backend.
+        max_wait: How long `acquire` waits for capacity by default
+            (`RATE_LIMIT_MAX_WAIT` unless given).
+    """
+
+    def __init__(self, limit: int, window: float = RATE_LIMIT_WINDOW, algorithm: str = SLIDING_WINDOW,
+                 backend: Any = None, burst: Optional[int] = None, name: str = "default",
+                 max_wait: Optional[float] = None):
+        if algorithm not in (SLIDING_WINDOW, TOKEN_BUCKET):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        if limit <= 0 or (burst is not None and burst <= 0):
+            raise ValueError(f"Rate limit must be positive, got {limit} (burst {burst})")
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+        self.burst = burst or limit
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.name = name
+        self.max_wait = RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+
+    def try_acquire(self, key: str = "default", cost: int = 1) -> Tuple[bool, float]:
+        """
+        Takes `cost` units if available.
+
+        Returns:
+            Whether the units were taken, and otherwise how many seconds to wait before retrying.
+        """
+        now = time.time()
+        if self.algorithm == TOKEN_BUCKET:
+            transition = _token_bucket(self.limit / self.window, self.burst, cost, now)
+        else:
+            transition = _sliding_window(self.limit, self.window, cost, now)
+        return self.backend.update(f"{self.name}:{key}", transition, ttl=2 * self.window)
+
+    def acquire(self, key: str = "default", cost: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until `cost` units are available; returns False if that would
+        exceed `timeout` seconds (`max_wait` by default, ``math.inf`` for no limit).
+        """
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        while True:
+            allowed, retry_after = self.try_acquire(key, cost)
+            if allowed:
+                return True
+            if time.monotonic() + retry_after > deadline:
+                return False
+            time.sleep(retry_after)
+
+    async def acquire_async(self, key: str = "default", cost: int = 1,
+                            timeout: Optional[float] = None) -> bool:
+        """
+        Like `acquire`, but waits on the event loop instead of blocking the
+        thread. Shared backends (SQLite locks, Redis round-trips) are updated
+        on a worker thread so that they do not stall the loop either.
+        """
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        in_memory = isinstance(self.backend, MemoryBackend)
+        while True:
+            if in_memory:
+                allowed, retry_after = self.try_acquire(key, cost)
+            else:
+                allowed, retry_after = await asyncio.to_thread(self.try_acquire, key, cost)
+            if allowed:
+                return True
+            if time.monotonic() + retry_after > deadline:
+                return False
+            await asyncio.sleep(retry_after)
+
+
+# --- Shared limiters ---
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+_default_backend: Any = None
+
+
+def configure_rate_limit_backend(backend: Any):
+    """Sets the backend for limiters created from now on (`None` resets to DEEP_RESEARCH_RATE_LIMIT_BACKEND)."""
+    global _default_backend
+    with _limiters_lock:
+        _default_backend = backend
+        _limiters.clear()
+
+
+def _get_default_backend() -> Any:
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = backend_from_url(os.environ.get("DEEP_RESEARCH_RATE_LIMIT_BACKEND"))
+    return _default_backend
+
+
+def get_limiter(category: str, provider: Optional[str] = None) -> RateLimiter:
+    """
+    Returns the shared limiter for a category of `RATE_LIMITS`, optionally
+    specific to one provider (with its limit from `PROVIDER_RATE_LIMITS`).
+    """
+    name = f"{category}:{provider}" if provider else category
+    with _limiters_lock:
+        if name not in _limiters:
+            limit = PROVIDER_RATE_LIMITS.get(name, RATE_LIMITS[category])
+            _limiters[name] = RateLimiter(limit, RATE_LIMIT_WINDOW, backend=_get_default_backend(), name=name)
+        return _limiters[name]
+
+
+def set_rate_limit(category: str, limit: int, provider: Optional[str] = None):
+    """Overrides the per-minute limit of a category, or of one provider within it."""
+    name = f"{category}:{provider}" if provider else category
+    with _limiters_lock:
+        if provider:
+            PROVIDER_RATE_LIMITS[name] = limit
+        else:
+            RATE_LIMITS[category] = limit
+        # Drop cached limiters so the next lookup picks up the new limit.
+        for key in [key for key in _limiters if key == name or (not provider and key.startswith(f"{category}:"))]:
+            del _limiters[key]
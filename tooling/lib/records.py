@@ -0,0 +1,145 @@
+"""
+Compact record types for the values that flow between research stages.
+
+Search hits, fetched documents, rankings and report sections are plain dicts
+at the toolchain's edges (JSON results, caches, LLM output). Inside a large
+run they can be held as slotted records instead, which need a fraction of a
+dict's memory. Records are read-only mappings under the same keys as the
+dicts they replace, so code written against the dict shapes (``hit["url"]``,
+``doc.get("title")``) accepts either; `to_dict` converts back at the edges.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class Record(Mapping):
+    """
+    Base class of the records. Subclasses are slotted dataclasses that list
+    their always-present keys in `_required` and the keys that are omitted
+    when `None` in `_optional`; any other keys of the source dict are kept
+    in their `extra` field. Equality and `repr` come from `Mapping` and this
+    class (hence ``eq=False, repr=False``), so a record equals its dict.
+    """
+    __slots__ = ()
+    _required: Tuple[str, ...] = ()
+    _optional: Tuple[str, ...] = ()
+    extra: Optional[Dict[str, Any]]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._required:
+            return getattr(self, key)
+        if key in self._optional:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._required
+        for key in self._optional:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self._required + self._optional)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record in the dict shape used at the toolchain's edges."""
+        return {key: self[key] for key in self}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Record":
+        """Converts a dict (or returns a record of this type unchanged)."""
+        if isinstance(data, cls):
+            return data
+        fields = cls._required + cls._optional
+        extra = {key: value for key, value in data.items() if key not in fields}
+        return cls(**{key: data[key] for key in fields if key in data}, extra=extra or None)
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class SearchHit(Record):
+    """
+    A search result, as in ``webPages.value``. The fields every provider
+    returns come first, then the ones Bing adds to each web page.
+    """
+    _required = ("id", "url", "name", "snippet")
+    _optional = ("rank", "score", "providers",
+                 "displayUrl", "dateLastCrawled", "language", "isFamilyFriendly", "isNavigational")
+
+    id: Optional[str] = None
+    url: Optional[str] = None
+    name: Optional[str] = None
+    snippet: Optional[str] = None
+    rank: Optional[int] = None
+    score: Optional[float] = None
+    providers: Optional[List[str]] = None
+    displayUrl: Optional[str] = None
+    dateLastCrawled: Optional[str] = None
+    language: Optional[str] = None
+    isFamilyFriendly: Optional[bool] = None
+    isNavigational: Optional[bool] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class FetchedDocument(Record):
+    """A page or document with its content, as passed to `analyze_results` and `generate_final_report`."""
+    _required = ("url", "title", "content")
+    _optional = ("snippet",)
+
+    url: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    snippet: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class Ranking(Record):
+    """One entry of the ``rankings`` returned by `analyze_results`."""
+    _required = ("url", "score", "reasoning")
+
+    url: Optional[str] = None
+    score: Optional[float] = None
+    reasoning: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class ReportSection(Record):
+    """One entry of a report's ``sections``."""
+    _required = ("title", "content")
+
+    title: Optional[str] = None
+    content: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+# Arguments that accept either the dict shape or the record.
+HitLike = Union[Dict[str, Any], SearchHit]
+DocumentLike = Union[Dict[str, Any], FetchedDocument]
+
+
+def hits_from_result(result: Dict[str, Any]) -> List[SearchHit]:
+    """The hits of a search result (``{"webPages": {"value": [...]}}``) as records."""
+    return [SearchHit.from_dict(hit) for hit in result.get("webPages", {}).get("value", [])]
+
+
+def hits_to_result(hits: Iterable[HitLike]) -> Dict[str, Any]:
+    """Wraps hits in the search result shape, converting records to dicts."""
+    return {"webPages": {"value": to_dicts(hits)}}
+
+
+def to_dicts(items: Iterable[Union[Dict[str, Any], Record]]) -> List[Dict[str, Any]]:
+    """Converts records to dicts, passing dicts through."""
+    return [item.to_dict() if isinstance(item, Record) else item for item in items]
@@ -0,0 +1,337 @@
+"""
+LLM access for the remote tools: a registry of model platforms with
+long-lived, pooled clients.
+
+`generate_with_model(prompt, "openai__gpt-4o")` routes a prompt to a
+platform the way `lib/models.ts` does for the web app (google, openai,
+deepseek, anthropic, ollama, openrouter). Each platform's client is created
+lazily on first use and then shared by every call in the process, so its
+HTTP connection pool (or gRPC channel) stays warm instead of being rebuilt
+per call. Calls go through a circuit breaker per platform (see
+`tooling/lib/resilience.py`, provider names ``llm_<platform>``). When the
+LLM response cache is on (see `tooling/lib/llm_cache.py`), repeated prompts
+are answered from disk.
+
+The provider SDKs are imported only when their platform is first used.
+"""
+import importlib
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .llm_cache import cached_response, get_llm_cache, is_cacheable, llm_cache_key, store_response
+from .resilience import get_provider
+
+# Seconds before an LLM request is abandoned.
+LLM_TIMEOUT = float(os.environ.get("DEEP_RESEARCH_LLM_TIMEOUT", "600"))
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Short Gemini model names, as in lib/gemini.ts: (model, response MIME type).
+GEMINI_MODELS = {
+    "gemini-flash-thinking": ("gemini-2.0-flash-thinking-exp-01-21", "text/plain"),
+    "gemini-exp": ("gemini-2.0-pro-exp-02-05", "application/json"),
+    "gemini-flash-lite": ("gemini-2.0-flash-lite-preview-02-05", "application/json"),
+}
+GEMINI_DEFAULT_MODEL = ("gemini-2.0-flash", "application/json")
+
+# The sampling parameters each platform sends; a platform without an entry
+# leaves them all to the provider's defaults.
+GEMINI_SAMPLING = {"temperature": 1, "max_output_tokens": 8192}
+DEEPSEEK_SAMPLING = {"max_tokens": 4000}
+ANTHROPIC_SAMPLING = {"max_tokens": 3500, "temperature": 0.9}
+
+GEMINI_SAFETY_SETTINGS = {
+    category: "BLOCK_NONE"
+    for category in (
+        "HARM_CATEGORY_HARASSMENT",
+        "HARM_CATEGORY_HATE_SPEECH",
+        "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "HARM_CATEGORY_DANGEROUS_CONTENT",
+    )
+}
+
+
+def _require(module: str, package: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise RuntimeError(f"The '{package}' package is required for this model platform: {e}") from e
+
+
+def _user_message(prompt: str):
+    return [{"role": "user", "content": prompt}]
+
+
+# --- Platforms ---
+
+class Platform:
+    """
+    An LLM platform: how to build its shared client, how to generate text
+    with that client, and the sampling parameters it generates with (`None`
+    if they are not known, which keeps its responses out of the LLM cache).
+    """
+
+    def __init__(self, name: str, create_client: Callable[[], Any], generate: Callable[[Any, str, str], str],
+                 sampling: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.create_client = create_client
+        self.generate = generate
+        self.sampling = sampling
+
+
+PLATFORMS: Dict[str, Platform] = {}
+
+# Clients by platform, created on first use by the process in `_clients_pid`.
+_clients: Dict[str, Any] = {}
+_clients_pid: Optional[int] = None
+_clients_lock = threading.Lock()
+
+
+def register_platform(name: str, create_client: Callable[[], Any],
+                      generate: Callable[[Any, str, str], str], sampling: Optional[Dict[str, Any]] = None) -> Platform:
+    """
+    Adds (or replaces) a platform. `generate(client, prompt, model)` returns
+    the response text, raising if there is none. Pass the `sampling`
+    parameters it generates with to let its responses be cached.
+    """
+    PLATFORMS[name] = Platform(name, create_client, generate, sampling)
+    with _clients_lock:
+        _clients.pop(name, None)
+    return PLATFORMS[name]
+
+
+def _create_openai() -> Any:
+    openai = _require("openai", "openai")
+    return openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY", ""), timeout=LLM_TIMEOUT)
+
+
+def _create_deepseek() -> Any:
+    openai = _require("openai", "openai")
+    return openai.OpenAI(base_url=DEEPSEEK_BASE_URL, api_key=os.environ.get("DEEPSEEK_API_KEY", ""),
+                         timeout=LLM_TIMEOUT)
+
+
+def _create_openrouter() -> Any:
+    # OpenRouter speaks the OpenAI chat completions API.
+    openai = _require("openai", "openai")
+    return openai.OpenAI(base_url=OPENROUTER_BASE_URL, api_key=os.environ.get("OPENROUTER_API_KEY", ""),
+                         timeout=LLM_TIMEOUT)
+
+
+def _create_anthropic() -> Any:
+    anthropic = _require("anthropic", "anthropic")
+    return anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY", ""), timeout=LLM_TIMEOUT)
+
+
+def _create_ollama() -> Any:
+    ollama = _require("ollama", "ollama")
+    return ollama.Client(host=os.environ.get("OLLAMA_HOST") or None, timeout=LLM_TIMEOUT)
+
+
+class GeminiClient:
+    """The configured `google.generativeai` module and one model object per Gemini model."""
+
+    def __init__(self):
+        self.genai = _require("google.generativeai", "google-generativeai")
+        self.genai.configure(api_key=os.environ.get("GEMINI_API_KEY", ""))
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def model(self, name: str) -> Any:
+        model_name, mime_type = GEMINI_MODELS.get(name, GEMINI_DEFAULT_MODEL)
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.genai.GenerativeModel(
+                    model_name,
+                    safety_settings=GEMINI_SAFETY_SETTINGS,
+                    generation_config={**GEMINI_SAMPLING, "response_mime_type": mime_type},
+                )
+            return self._models[model_name]
+
+
+def _chat_content(response: Any, platform: str) -> str:
+    content = response.choices[0].message.content if response.choices else None
+    if not content:
+        raise RuntimeError(f"No response content from {platform}")
+    return content
+
+
+def _generate_openai(client: Any, prompt: str, model: str) -> str:
+    return _chat_content(client.chat.completions.create(model=model, messages=_user_message(prompt)), "OpenAI")
+
+
+def _generate_deepseek(client: Any, prompt: str, model: str) -> str:
+    response = client.chat.completions.create(model=f"deepseek-{model}", messages=_user_message(prompt),
+                                              **DEEPSEEK_SAMPLING)
+    return _chat_content(response, "DeepSeek")
+
+
+def _generate_openrouter(client: Any, prompt: str, model: str) -> str:
+    return _chat_content(client.chat.completions.create(model=model, messages=_user_message(prompt)), "OpenRouter")
+
+
+def _generate_anthropic(client: Any, prompt: str, model: str) -> str:
+    response = client.messages.create(model=model, messages=_user_message(prompt), **ANTHROPIC_SAMPLING)
+    content = response.content[0].text if response.content else None
+    if not content:
+        raise RuntimeError("No response content from Anthropic")
+    return content
+
+
+def _generate_ollama(client: Any, prompt: str, model: str) -> str:
+    response = client.chat(model=model, messages=_user_message(prompt))
+    content = response["message"]["content"]
+    if not content:
+        raise RuntimeError("No response content from Ollama")
+    return content
+
+
+def _generate_gemini(client: GeminiClient, prompt: str, model: str) -> str:
+    text = client.model(model).generate_content(prompt).text
+    if not text:
+        raise RuntimeError("No response content from Gemini")
+    return text
+
+
+register_platform("google", GeminiClient, _generate_gemini, GEMINI_SAMPLING)
+register_platform("openai", _create_openai, _generate_openai, {})
+register_platform("deepseek", _create_deepseek, _generate_deepseek, DEEPSEEK_SAMPLING)
+register_platform("anthropic", _create_anthropic, _generate_anthropic, ANTHROPIC_SAMPLING)
+register_platform("ollama", _create_ollama, _generate_ollama, {})
+register_platform("openrouter", _create_openrouter, _generate_openrouter, {})
+
+
+# --- Shared clients ---
+
+def get_client(platform: str) -> Any:
+    """
+    Returns the platform's shared client, creating it on first use. A forked
+    child process creates its own clients rather than sharing connections
+    with its parent.
+    """
+    global _clients_pid
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if platform not in _clients:
+            _clients[platform] = PLATFORMS[platform].create_client()
+        return _clients[platform]
+
+
+def configure_client(platform: str, client: Optional[Any]):
+    """Installs a platform's client (e.g. one with custom pool limits); `None` recreates the default on next use."""
+    global _clients_pid
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if client is None:
+            _clients.pop(platform, None)
+        else:
+            _clients[platform] = client
+
+
+def close_clients():
+    """Closes and drops every shared client."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+
+
+def generate_with_model(system_prompt: str, platform_model: str, use_cache: bool = True) -> str:
+    """
+    Generates a response with a ``<platform>__<model>`` model (e.g.
+    ``openai__gpt-4o``, ``ollama__llama3``, ``openrouter__meta-llama/llama-3-70b``).
+    When the LLM response cache is on, a cached response to the same prompt
+    is returned instead; `use_cache=False` always asks the model.
+
+    Raises:
+        ValueError: If the platform is unknown.
+        CircuitOpenError: If the platform's circuit is open.
+        RuntimeError: If the model returned no content or its SDK is not installed.
+    """
+    platform, _, model = platform_model.partition("__")
+    entry = PLATFORMS.get(platform)
+    if entry is None:
+        raise ValueError("Invalid platform specified")
+    cache = get_llm_cache() if use_cache and is_cacheable(entry.sampling) else None
+    if cache is not None:
+        key = llm_cache_key(platform, model, system_prompt, entry.sampling)
+        cached = cached_response(cache, platform, key)
+        if cached is not None:
+            return cached
+
+    client = get_client(platform)
+    response = get_provider(f"llm_{platform}").call(lambda: entry.generate(client, system_prompt, model))
+    if cache is not None:
+        store_response(cache, platform, key, response)
+    return response
+
+
+# --- Parsing model output ---
+
+def _clean_json(text: str) -> str:
+    """Repairs the YAML/markdown artifacts models tend to leave in JSON."""
+    text = text.replace("|\n", "\n")
+    text = re.sub(r":\s*[>|](\s*\n|\s*$)", ": ", text)
+    text = re.sub(r"^\s*>", "", text, flags=re.MULTILINE)
+    text = re.sub(r",(\s*[}\]])", r"\1", text)
+    text = re.sub(r"\n\s*\n", "\n", text)
+    text = re.sub(r':\s*"\s+', ': "', text)
+    return re.sub(r'\s+"', '"', text)
+
+
+def extract_and_parse_json(response: str) -> Any:
+    """
+    Parses the JSON object in a model response, as `extractAndParseJSON` in
+    lib/utils.ts does: the whole response, then a fenced code block, then
+    each outermost ``{...}`` span in turn, repairing common artifacts.
+
+    Raises:
+        ValueError: If no valid JSON is found.
+    """
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        pass
+
+    block = re.search(r"```(?:json)?\s*([\s\S]*?)```", response)
+    if block:
+        try:
+            return json.loads(_clean_json(block.group(1)))
+        except json.JSONDecodeError:
+            pass
+
+    depth = 0
+    start = -1
+    in_string = escape_next = False
+    for index, char in enumerate(response):
+        if char == '"' and not escape_next:
+            in_string = not in_string
+        elif char == "\\" and not escape_next:
+            escape_next = True
+            continue
+        escape_next = False
+        if in_string:
+            continue
+        if char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0 and start >= 0:
+                try:
+                    return json.loads(_clean_json(response[start:index + 1]))
+                except json.JSONDecodeError:
+                    start = -1
+    raise ValueError("No valid JSON found in response")
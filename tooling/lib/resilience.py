@@ -0,0 +1,308 @@
+"""
+Circuit breakers and request hedging for remote providers.
+
+Every provider (a search backend, the Jina reader) gets a `CircuitBreaker`
+that fails fast after repeated failures and probes the backend again after a
+cool-down. Optionally, a `HedgePolicy` fires a duplicate request when the
+first one is slower than a percentile of recently observed latencies, and
+the first successful response wins. Calls that must not be repeated are
+never hedged unless the policy opts in.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .metrics import PROVIDER_METRICS
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    A per-provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail immediately. Once `reset_timeout` seconds have passed, one
+    trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Returns whether a call may proceed, reserving the trial slot when half-open."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._state, self._failures, self._trial_in_flight = CLOSED, 0, False
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, "rejected": self._rejected}
+
+
+class LatencyTracker:
+    """A rolling window of recent call latencies, in seconds."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))
+        return samples[index]
+
+
+class HedgePolicy:
+    """
+    When to fire a duplicate request: after the `percentile` latency of the
+    provider's recent calls, clamped to [`min_delay`, `max_delay`]. Until
+    `min_samples` latencies have been observed, `initial_delay` is used.
+    Calls that are not idempotent (such as paid POST searches) are only
+    hedged with `hedge_non_idempotent=True`.
+    """
+
+    def __init__(self, percentile: float = 95.0, min_delay: float = 0.05, max_delay: float = 10.0,
+                 initial_delay: float = 2.0, min_samples: int = 20, hedge_non_idempotent: bool = False):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.hedge_non_idempotent = hedge_non_idempotent
+
+    def delay(self, latencies: LatencyTracker) -> float:
+        observed = latencies.percentile(self.percentile) if len(latencies) >= self.min_samples else None
+        if observed is None:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, observed))
+
+
+# Hedged duplicates keep running in the background after the race is decided,
+# since a blocking HTTP request cannot be cancelled mid-flight.
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+def _default_is_failure(result: Any) -> bool:
+    status = getattr(result, "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+def _release(future: Future):
+    """Closes the result of an attempt that lost the race, returning a streamed response's connection to the pool."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        close()
+
+
+def hedged_call(fn: Callable[[], Any], delay: float, on_hedge: Optional[Callable[[], None]] = None,
+                is_failure: Callable[[Any], bool] = _default_is_failure) -> Any:
+    """
+    Runs `fn`, and a duplicate of it if the first attempt has not finished
+    after `delay` seconds. Returns the first successful result: one that
+    was not raised and for which `is_failure` does not hold. If every
+    attempt fails, returns or raises the outcome of the last to finish. The
+    results of the other attempts are closed.
+    """
+    primary = _hedge_executor.submit(fn)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    if on_hedge is not None:
+        on_hedge()
+    pending = {primary, _hedge_executor.submit(fn)}
+    winner, failed = None, []
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if winner is None and future.exception() is None and not is_failure(future.result()):
+                winner = future
+            else:
+                failed.append(future)
+    for future in pending:
+        future.add_done_callback(_release)
+    if winner is None:
+        winner = failed.pop()
+    for future in failed:
+        _release(future)
+    return winner.result()
+
+
+def _body_size(body: Any) -> int:
+    return len(body) if isinstance(body, (str, bytes, bytearray)) else 0
+
+
+def _message_sizes(response: Any) -> Tuple[int, int]:
+    """Request and response body sizes of a `requests.Response`-like object, without reading a stream."""
+    request = getattr(response, "request", None)
+    request_bytes = _body_size(getattr(request, "body", None))
+    headers = getattr(response, "headers", None) or {}
+    length = headers.get("Content-Length") if hasattr(headers, "get") else None
+    if isinstance(length, str) and length.isdigit():
+        return request_bytes, int(length)
+    return request_bytes, _body_size(getattr(response, "_content", None))
+
+
+class Provider:
+    """The breaker, latency window and optional hedge policy of one remote provider."""
+
+    def __init__(self, name: str, breaker: Optional[CircuitBreaker] = None, hedge: Optional[HedgePolicy] = None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.hedge = hedge
+        self.latencies = LatencyTracker()
+        self.hedges_fired = 0
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[[], Any], is_failure: Callable[[Any], bool] = _default_is_failure,
+             idempotent: bool = True) -> Any:
+        """
+        Calls the provider through its circuit breaker, hedging if configured.
+        Exceptions and results for which `is_failure` holds (by default 5xx
+        and 429 responses) count as failures. A call that is not
+        `idempotent` is only hedged if the policy allows it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and the call was not attempted.
+        """
+        if not self.breaker.allow():
+            PROVIDER_METRICS.record_call(self.name, 0.0, status=503, error=True)
+            raise CircuitOpenError(f"circuit for provider '{self.name}' is open")
+
+        hedged = self.hedge is not None and (idempotent or self.hedge.hedge_non_idempotent)
+        start = time.monotonic()
+        try:
+            if hedged:
+                delay = self.hedge.delay(self.latencies)
+                result = hedged_call(lambda: self._timed(fn), delay, self._count_hedge, is_failure)
+            else:
+                result = fn()
+        except Exception:
+            self.breaker.record_failure()
+            PROVIDER_METRICS.record_call(self.name, time.monotonic() - start, error=True)
+            raise
+
+        elapsed = time.monotonic() - start
+        if not hedged:
+            self.latencies.record(elapsed)
+        failed = is_failure(result)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        status = getattr(result, "status_code", None)
+        request_bytes, response_bytes = _message_sizes(result)
+        PROVIDER_METRICS.record_call(
+            self.name, elapsed,
+            status=status if isinstance(status, int) else None,
+            error=failed or (isinstance(status, int) and status >= 400),
+            request_bytes=request_bytes, response_bytes=response_bytes,
+        )
+        return result
+
+    def _count_hedge(self):
+        with self._lock:
+            self.hedges_fired += 1
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        start = time.monotonic()
+        result = fn()
+        # Record every attempt, so a hedge does not hide the slow tail.
+        self.latencies.record(time.monotonic() - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.breaker.stats(),
+            "p50_latency": self.latencies.percentile(50),
+            "p99_latency": self.latencies.percentile(99),
+            "hedging": self.hedge is not None,
+            "hedges_fired": self.hedges_fired,
+        }
+
+
+_providers: Dict[str, Provider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Provider:
+    """Returns the shared resilience state for a provider, creating it on first use."""
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = Provider(name)
+        return _providers[name]
+
+
+def configure_provider(name: str, breaker: Optional[CircuitBreaker] = None, hedge: Optional[HedgePolicy] = None) -> Provider:
+    """Replaces a provider's breaker and hedge policy (`hedge=None` disables hedging)."""
+    with _providers_lock:
+        _providers[name] = Provider(name, breaker, hedge)
+        return _providers[name]
+
+
+def provider_stats() -> Dict[str, Dict[str, Any]]:
+    with _providers_lock:
+        providers = dict(_providers)
+    return {name: provider.stats() for name, provider in providers.items()}
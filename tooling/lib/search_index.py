@@ -0,0 +1,279 @@
+"""
+A local full-text index over material the toolchain has already seen.
+
+Pages fetched through `fetch_content`, documents parsed with a name and the
+markdown files in `knowledge_core/` are tokenized into an inverted index in a
+SQLite file, and queries are ranked with Okapi BM25. It backs
+``search(provider='local')``, which answers follow-up questions from
+downloaded material in milliseconds, without network access or quota.
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+# BM25 parameters: term frequency saturation and document length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Characters of content shown around the best match in a hit's snippet.
+SNIPPET_LENGTH = 300
+
+# The markdown knowledge base indexed alongside fetched pages.
+KNOWLEDGE_CORE_DIR = os.environ.get(
+    "DEEP_RESEARCH_KNOWLEDGE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "knowledge_core"),
+)
+
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how if in into is it its of on or that the their "
+    "there these this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into case-folded word tokens, dropping stopwords and single characters."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return [token for token in _TOKEN.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def _title_of(content: str, default: str) -> str:
+    """The first markdown heading, or the reader service's ``Title:`` line."""
+    for line in content.splitlines():
+        if line.startswith("Title:"):
+            return line[len("Title:"):].strip() or default
+        if line.startswith("#"):
+            return line.lstrip("#").strip() or default
+    return default
+
+
+def _snippet(content: str, terms: List[str], length: int = SNIPPET_LENGTH) -> str:
+    """The stretch of content around the first occurrence of a query term."""
+    lowered = content.casefold()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions) - length // 4) if positions else 0
+    snippet = " ".join(content[start:start + length].split())
+    return ("..." if start else "") + snippet + ("..." if start + length < len(content) else "")
+
+
+class LocalSearchIndex:
+    """
+    An inverted index with BM25 ranking, stored in a SQLite file.
+
+    Documents are keyed by URL (or path); adding a URL again replaces its
+    entry, and re-adding unchanged content is a no-op.
+
+    Args:
+        path: The SQLite database file; created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    source TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    content BLOB NOT NULL,
+                    indexed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id)")
+
+    def add(self, url: str, content: str, title: Optional[str] = None, source: str = "page") -> bool:
+        """
+        Indexes a document. Without a `title`, the first heading (or the
+        reader's ``Title:`` line) is used.
+
+        Returns:
+            Whether the index changed (False if the same content was already indexed).
+        """
+        if not url or not content:
+            return False
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        # Unchanged documents (e.g. pages served again from the content store) are not tokenized again.
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM documents WHERE url = ?", (url,)).fetchone()
+        if row is not None and row[0] == digest:
+            return False
+        title = title or _title_of(content, url)
+        counts = Counter(tokenize(content))
+        if title != url:
+            counts.update(tokenize(title))
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id, digest FROM documents WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[1] == digest:
+                return False
+            if row is not None:
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            cursor = self._conn.execute(
+                "INSERT INTO documents (url, title, source, digest, length, content, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, title, source, digest, sum(counts.values()),
+                 zlib.compress(content.encode("utf-8")), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                ((term, cursor.lastrowid, tf) for term, tf in counts.items()),
+            )
+        return True
+
+    def add_directory(self, directory: str, extensions: Tuple[str, ...] = (".md",), source: str = "knowledge_core") -> int:
+        """Indexes the matching files under a directory by path; returns how many changed."""
+        changed = 0
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.endswith(extensions):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        content = f.read()
+                except (OSError, UnicodeDecodeError):
+                    continue
+                changed += self.add(path, content, title=_title_of(content, name), source=source)
+        return changed
+
+    def remove(self, url: str):
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM documents WHERE url = ?", (url,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Ranks the indexed documents against a query with BM25.
+
+        Returns:
+            Up to `limit` hits in the common search result format, best first,
+            each with its BM25 `score` and the `source` it was indexed from.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit < 1:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            count, average_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM documents").fetchone()
+            if not count:
+                return []
+            postings = self._conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN documents d ON d.id = p.doc_id "
+                f"WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+        document_frequency = Counter(term for term, _, _, _ in postings)
+        average_length = average_length or 1.0
+        scores: Dict[int, float] = {}
+        for term, doc_id, tf, length in postings:
+            df = document_frequency[term]
+            idf = math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+            norm = tf + BM25_K1 * (1.0 - BM25_B + BM25_B * length / average_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1.0) / norm
+
+        best = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:limit]
+        if not best:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, url, title, source, content FROM documents WHERE id IN ({','.join('?' * len(best))})",
+                best,
+            ).fetchall()
+        documents = {row[0]: row[1:] for row in rows}
+
+        hits = []
+        for doc_id in best:
+            if doc_id not in documents:  # removed concurrently
+                continue
+            url, title, source, blob = documents[doc_id]
+            content = zlib.decompress(blob).decode("utf-8")
+            hits.append({
+                "id": f"local-{doc_id}", "url": url, "name": title or url,
+                "snippet": _snippet(content, terms), "score": round(scores[doc_id], 6), "source": source,
+            })
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        """The number of indexed documents (per source) and distinct terms."""
+        with self._lock:
+            sources = dict(self._conn.execute("SELECT source, COUNT(*) FROM documents GROUP BY source").fetchall())
+            terms = self._conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {"documents": sum(sources.values()), "sources": sources, "terms": terms}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- The shared index ---
+
+_local_index: Optional[LocalSearchIndex] = None
+_local_index_configured = False
+_local_index_lock = threading.Lock()
+
+
+def configure_local_index(index: Optional[LocalSearchIndex]):
+    """Installs the local search index, or disables it with `None`."""
+    global _local_index, _local_index_configured
+    with _local_index_lock:
+        _local_index, _local_index_configured = index, True
+
+
+def get_local_index() -> Optional[LocalSearchIndex]:
+    """
+    Returns the local search index. Unless one was configured explicitly, it
+    is created on first use in `DEEP_RESEARCH_CACHE_DIR` (with
+    `KNOWLEDGE_CORE_DIR` indexed); indexing is off when that variable is not set.
+    """
+    global _local_index, _local_index_configured
+    with _local_index_lock:
+        if not _local_index_configured:
+            cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR")
+            if cache_dir:
+                _local_index = LocalSearchIndex(os.path.join(cache_dir, "local_index.sqlite3"))
+                if os.path.isdir(KNOWLEDGE_CORE_DIR):
+                    _local_index.add_directory(KNOWLEDGE_CORE_DIR)
+            _local_index_configured = True
+        return _local_index
+
+
+def index_document(url: str, content: str, title: Optional[str] = None, source: str = "page"):
+    """Adds a document to the shared index if indexing is on. Never raises."""
+    if not isinstance(content, str):
+        return
+    # Indexing is a side effect of fetching and parsing; creating the index
+    # (directories, the database, the knowledge_core walk) must not fail them.
+    try:
+        index = get_local_index()
+        if index is not None:
+            index.add(url, content, title=title, source=source)
+    except Exception:
+        pass
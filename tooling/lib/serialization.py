@@ -0,0 +1,76 @@
+"""
+JSON encoding for results that cross a process boundary.
+
+In-process callers should pass tool results around as native objects; these
+helpers are only for the points where a result actually leaves the process
+(a JSON string API, a file, a socket). `orjson` is used when installed and
+the standard library encoder otherwise.
+"""
+import json
+from typing import Any, Iterator, IO
+
+from .records import Record
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Chunk size used when streaming large payloads to a file object.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _default(obj: Any) -> Any:
+    # Records (tooling/lib/records.py) are encoded in their dict shape.
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(obj: Any) -> str:
+    """Encodes an object to a JSON string, using the fastest available encoder."""
+    if orjson is not None:
+        try:
+            # Records are dataclasses; passing them through sends them to `_default`
+            # instead of orjson's field-by-field encoding.
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+            return orjson.dumps(obj, default=_default, option=options).decode("utf-8")
+        except TypeError:
+            # orjson is stricter than the standard library (e.g. for integers
+            # wider than 64 bits); fall back rather than fail.
+            pass
+    return json.dumps(obj, default=_default)
+
+
+def iter_json(obj: Any, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Incrementally encodes an object, yielding JSON text in chunks of roughly
+    `chunk_size` characters so that a large payload is never built as a
+    single string. Oversized string values are split across chunks.
+    """
+    buffer, buffered = [], 0
+    for piece in json.JSONEncoder(default=_default).iterencode(obj):
+        for start in range(0, len(piece), chunk_size):
+            part = piece[start:start + chunk_size]
+            buffer.append(part)
+            buffered += len(part)
+            if buffered >= chunk_size:
+                yield "".join(buffer)
+                buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def write_json(obj: Any, fp: IO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """
+    Streams an object as JSON to a text or binary file object.
+
+    Returns:
+        The number of characters written.
+    """
+    binary = "b" in getattr(fp, "mode", "") or not hasattr(fp, "encoding")
+    written = 0
+    for chunk in iter_json(obj, chunk_size):
+        fp.write(chunk.encode("utf-8") if binary else chunk)
+        written += len(chunk)
+    return written
@@ -0,0 +1,118 @@
+"""
+Single-flight request coalescing.
+
+While a call for a given key is in flight, further calls with the same key
+do not start their own execution; they wait for the first one and all
+receive its result (or its exception). The shared result object is handed
+to every caller, so it must be treated as read-only.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def count(self, leader: bool):
+        with self._lock:
+            self.calls += 1
+            if leader:
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+    def stats(self, in_flight: int) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": in_flight,
+            }
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls made from multiple threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counters = _Counters()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._counters.count(leader)
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._calls)
+        return self._counters.stats(in_flight)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces identical concurrent calls on an event loop. The shared
+    execution runs as its own task, so cancelling one caller does not cancel
+    it for the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._counters = _Counters()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Futures belong to one event loop, so calls are only shared within a loop.
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._calls.get(loop_key)
+            leader = task is None
+            if leader:
+                task = self._calls[loop_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._forget(loop_key, done))
+        self._counters.count(leader)
+        return await asyncio.shield(task)
+
+    def _forget(self, loop_key: Tuple[int, Hashable], task: asyncio.Future):
+        with self._lock:
+            if self._calls.get(loop_key) is task:
+                del self._calls[loop_key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._calls)
+        return self._counters.stats(in_flight)
@@ -0,0 +1,60 @@
+"""
+URL normalization, so that the same page reached through different links
+(search providers, redirects, tracking parameters) is recognized as one.
+"""
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+# Query parameters that only track the click and never change the page.
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid", "_ga", "ref_src"}
+TRACKING_PREFIXES = ("utm_",)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Returns the canonical form of an absolute http(s) URL, or `None` if it
+    is not one: lower-case scheme and host, no default port, no fragment, no
+    tracking parameters, sorted query parameters, consistently quoted path
+    and no trailing slash (except for the root).
+    """
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+
+    netloc = host
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe="/:@!$&'()*+,;=-._~%") or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k))
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def dedup_key(url: str) -> Optional[str]:
+    """
+    A key under which links to the same page collide: the normalized URL
+    without its scheme and without a leading ``www.``.
+    """
+    normalized = normalize_url(url)
+    if normalized is None:
+        return None
+    rest = normalized.split("://", 1)[1]
+    return rest[4:] if rest.startswith("www.") else rest
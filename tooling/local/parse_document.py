@@ -1,7 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from officeparserpy import parse_office
 
-def parse_document(file_content: bytes) -> Dict[str, Any]:
+from ..lib.search_index import index_document
+
+def parse_document(file_content: bytes, name: Optional[str] = None) -> Dict[str, Any]:
     """
     Parses a document from its binary content to extract text.
     This is a Python port of the logic in `app/api/parse-document/route.ts`,
@@ -9,6 +11,8 @@ def parse_document(file_content: bytes) -> Dict[str, Any]:
 
     Args:
         file_content: The binary content of the file to parse.
+        name: The document's file name or path. When given, the extracted
+            text is added to the local search index (see `search(provider='local')`).
 
     Returns:
         A dictionary containing the extracted content or an error message.
@@ -27,6 +31,12 @@ def parse_document(file_content: bytes) -> Dict[str, Any]:
 
         # Parse the document from the buffer
         content = parse_office(file_content, config)
+        if name:
+            try:
+                index_document(name, content, source="document")
+            except Exception:
+                # Indexing is best effort; the parsed content is returned regardless.
+                pass
 
         return {"content": content, "status": 200}
 
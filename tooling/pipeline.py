@@ -0,0 +1,264 @@
+"""
+A declarative DAG runner for multi-stage research workflows.
+
+Each `Stage` either dispatches a task from `TASK_DISPATCHER` or calls a plain
+Python function, and names its inputs as references into the results of
+earlier stages (e.g. ``"search.webPages.value"``). Stages whose dependencies
+are satisfied run concurrently, and a stage with `for_each` fans out into one
+call per element of an upstream list.
+"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Union, Set, Sequence
+
+from tooling.deep_research import run_task_async
+from tooling.lib.dedup import DEFAULT_SIMILARITY_THRESHOLD, dedup_documents
+from tooling.lib.records import FetchedDocument
+
+# The reserved stage name that refers to the current element of a fan-out.
+ITEM = "item"
+
+
+@dataclass(frozen=True)
+class Ref:
+    """A reference to a value in an upstream stage result, with an optional default."""
+    path: str
+    default: Any = None
+
+    @property
+    def stage(self) -> str:
+        return self.path.split(".", 1)[0]
+
+
+def _as_ref(value: Union[str, Ref]) -> Ref:
+    return value if isinstance(value, Ref) else Ref(value)
+
+
+@dataclass
+class Stage:
+    """
+    A single node of a pipeline.
+
+    Args:
+        name: Unique stage name, used by downstream references.
+        task: The `TASK_DISPATCHER` task to run. Mutually exclusive with `function`.
+        function: A local function (or coroutine function) to run instead of a task.
+        inputs: Maps argument names to references into upstream results.
+        args: Static keyword arguments passed on every call.
+        for_each: A reference to a list; the stage runs once per element, which
+            its inputs can reference as ``"item"``.
+        limit: Optional cap on the number of `for_each` elements.
+    """
+    name: str
+    task: Optional[str] = None
+    function: Optional[Callable[..., Any]] = None
+    inputs: Dict[str, Union[str, Ref]] = field(default_factory=dict)
+    args: Dict[str, Any] = field(default_factory=dict)
+    for_each: Optional[Union[str, Ref]] = None
+    limit: Optional[int] = None
+
+    def references(self) -> List[Ref]:
+        refs = [_as_ref(ref) for ref in self.inputs.values()]
+        if self.for_each is not None:
+            refs.append(_as_ref(self.for_each))
+        return refs
+
+    def dependencies(self) -> Set[str]:
+        return {ref.stage for ref in self.references() if ref.stage != ITEM}
+
+
+@dataclass
+class PipelineResult:
+    """The outcome of a pipeline run: per-stage results, errors and wall-clock durations."""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class StageError(Exception):
+    """Raised when a stage's task returns an error result."""
+
+
+def _resolve(ref: Ref, results: Dict[str, Any], item: Any = None) -> Any:
+    """Walks a dotted reference path through dicts and lists."""
+    stage, _, rest = ref.path.partition(".")
+    value = item if stage == ITEM else results.get(stage)
+    for key in rest.split(".") if rest else []:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, (list, tuple)) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            value = None
+        if value is None:
+            break
+    return ref.default if value is None else value
+
+
+class Pipeline:
+    """
+    A validated DAG of stages. Construction fails with `ValueError` on
+    duplicate names, unknown references or dependency cycles.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages or stage.name == ITEM:
+                raise ValueError(f"Invalid or duplicate stage name: {stage.name}")
+            if (stage.task is None) == (stage.function is None):
+                raise ValueError(f"Stage '{stage.name}' must define exactly one of 'task' or 'function'")
+            self.stages[stage.name] = stage
+
+        for stage in self.stages.values():
+            for dep in stage.dependencies():
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' references unknown stage '{dep}'")
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in sorted(self.stages[name].dependencies()):
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def _invoke(self, stage: Stage, results: Dict[str, Any], item: Any = None) -> Any:
+        kwargs = dict(stage.args)
+        for arg, ref in stage.inputs.items():
+            kwargs[arg] = _resolve(_as_ref(ref), results, item)
+
+        if stage.function is not None:
+            if inspect.iscoroutinefunction(stage.function):
+                return await stage.function(**kwargs)
+            return stage.function(**kwargs)
+
+        return await run_task_async({"task": stage.task, **kwargs})
+
+    async def _run_stage(self, stage: Stage, results: Dict[str, Any]) -> Any:
+        if stage.for_each is None:
+            result = await self._invoke(stage, results)
+            if isinstance(result, dict) and "error" in result:
+                raise StageError(result["error"])
+            return result
+
+        # Errors of individual fan-out calls are kept in place so that one bad
+        # element does not fail the whole stage.
+        items = _resolve(_as_ref(stage.for_each), results) or []
+        if stage.limit is not None:
+            items = items[:stage.limit]
+        return list(await asyncio.gather(*(self._invoke(stage, results, item) for item in items)))
+
+    async def run_async(self) -> PipelineResult:
+        """Runs every stage as soon as its dependencies have completed."""
+        outcome = PipelineResult()
+        pending: Dict[str, asyncio.Task] = {}
+
+        async def run_one(name: str):
+            stage = self.stages[name]
+            deps = stage.dependencies()
+            if deps:
+                await asyncio.gather(*(pending[dep] for dep in deps))
+
+            failed = sorted(dep for dep in deps if dep in outcome.errors)
+            if failed:
+                outcome.errors[name] = f"Skipped: upstream stage '{failed[0]}' failed"
+                return
+
+            start = time.monotonic()
+            try:
+                outcome.results[name] = await self._run_stage(stage, outcome.results)
+            except Exception as e:
+                outcome.errors[name] = f"Stage '{name}' failed: {e}"
+            finally:
+                outcome.durations[name] = time.monotonic() - start
+
+        for name in self.order:
+            pending[name] = asyncio.ensure_future(run_one(name))
+        await asyncio.gather(*pending.values())
+        return outcome
+
+    def run(self) -> PipelineResult:
+        """Synchronous entry point; must not be called from a running event loop."""
+        return asyncio.run(self.run_async())
+
+
+# --- The standard research workflow ---
+
+def collect_sources(hits: List[Dict[str, Any]], pages: List[Dict[str, Any]]) -> List[FetchedDocument]:
+    """Pairs search hits with their fetched content, dropping failed fetches."""
+    return [
+        FetchedDocument(url=hit.get("url"), title=hit.get("name"), content=page["content"])
+        for hit, page in zip(hits, pages)
+        if "content" in page
+    ]
+
+
+def build_research_pipeline(
+    research_task: str,
+    platform_model: str,
+    provider: str = "google",
+    max_sources: int = 3,
+    file_formats: Sequence[str] = ("docx",),
+    dedup_threshold: Optional[float] = DEFAULT_SIMILARITY_THRESHOLD,
+) -> Pipeline:
+    """
+    Builds the optimize -> search -> fetch -> dedup -> analyze/report -> export DAG.
+
+    Fetches fan out per search hit, analysis and report generation run side
+    by side, and each requested export format is its own stage. Near-duplicate
+    sources (mirrors, syndicated copies) are dropped before analysis unless
+    `dedup_threshold` is None; see `tooling/lib/dedup.py`.
+    """
+    stages = [
+        Stage("optimize", task="optimize_research",
+              args={"prompt": research_task, "platform_model": platform_model}),
+        Stage("search", task="search",
+              inputs={"query": Ref("optimize.query", research_task)},
+              args={"provider": provider}),
+        Stage("fetch", task="fetch_content",
+              for_each="search.webPages.value", limit=max_sources,
+              inputs={"url": "item.url"}),
+        Stage("sources", function=lambda hits, pages: collect_sources(hits[:max_sources], pages),
+              inputs={"hits": Ref("search.webPages.value", []), "pages": Ref("fetch", [])}),
+    ]
+    documents = "sources"
+    if dedup_threshold is not None:
+        stages.append(Stage("dedup", function=dedup_documents,
+                            inputs={"documents": "sources"}, args={"threshold": dedup_threshold}))
+        documents = "dedup"
+    stages += [
+        Stage("analyze", task="analyze_results",
+              inputs={"prompt": Ref("optimize.optimizedPrompt", research_task), "results": documents},
+              args={"platform_model": platform_model}),
+        Stage("report", task="generate_final_report",
+              inputs={
+                  "prompt": Ref("optimize.optimizedPrompt", research_task),
+                  "selected_results": documents,
+                  "sources": Ref("search.webPages.value", []),
+              },
+              args={"platform_model": platform_model}),
+    ]
+    for file_format in file_formats:
+        stages.append(Stage(f"export_{file_format}", task="download_report",
+                            inputs={"report": "report"}, args={"file_format": file_format}))
+    return Pipeline(stages)
@@ -1,7 +1,9 @@
 from typing import Dict, Any, List
+from ..lib.packing import estimate_tokens, pack_documents, source_budget
+from ..lib.records import DocumentLike
 from ..lib.remote_helpers import generate_with_model, extract_and_parse_json
 
-def _create_prompt(prompt: str, results: List[Dict[str, Any]]) -> str:
+def _create_prompt(prompt: str, results: List[DocumentLike]) -> str:
     """Creates the system prompt for the LLM to analyze search results."""
 
     results_str = "\n".join(
@@ -51,13 +53,18 @@ Focus on finding results that provide unique, high-quality information relevant
 
 def analyze_results(
     prompt: str,
-    results: List[Dict[str, Any]],
+    results: List[DocumentLike],
     platform_model: str,
     is_test_query: bool = False
 ) -> Dict[str, Any]:
     """
     Analyzes and ranks search results based on a research prompt using an LLM.
     This is a Python port of `app/api/analyze-results/route.ts`.
+
+    `results` may be dicts or `FetchedDocument` records; the rankings are
+    returned as dicts (see `Ranking.from_dict` for the record form). Content
+    that does not fit the model's context window is truncated or left out
+    (see `tooling/lib/packing.py`) and listed under "packing".
     """
     if not prompt or not results:
         return {"error": "Prompt and results are required", "status": 400}
@@ -73,9 +80,11 @@ def analyze_results(
             "status": 200
         }
 
-    system_prompt = _create_prompt(prompt, results)
-
     try:
+        budget = source_budget(platform_model, estimate_tokens(_create_prompt(prompt, [])))
+        packed, packing = pack_documents(results, budget)
+        system_prompt = _create_prompt(prompt, packed)
+
         # Generate the analysis using the existing LLM function
         llm_response = generate_with_model(system_prompt, platform_model)
 
@@ -84,6 +93,8 @@ def analyze_results(
 
         # Parse the JSON response
         parsed_response = extract_and_parse_json(llm_response)
+        if packing:
+            parsed_response["packing"] = packing
         parsed_response["status"] = 200
         return parsed_response
 
@@ -1,5 +1,6 @@
 import json
 from typing import Dict, Any, List
+from ..lib.records import to_dicts
 from ..lib.remote_helpers import generate_with_model
 
 def _create_prompt(reports: List[Dict[str, Any]], source_index: str) -> str:
@@ -99,7 +100,7 @@ def consolidate_report(reports: List[Dict[str, Any]], platform_model: str) -> Di
             }
 
         # Add the de-duplicated sources to the final report
-        parsed_response["sources"] = all_sources
+        parsed_response["sources"] = to_dicts(all_sources)
         parsed_response["status"] = 200
         return parsed_response
 
@@ -1,38 +1,412 @@
+import asyncio
+import codecs
+import os
+import re
+import sqlite3
 import requests
-from typing import Dict, Any
-from urllib.parse import quote
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from ..lib.content_store import conditional_headers, get_content_store, ttl_from_headers
+from ..lib.extract import extract, looks_like_html
+from ..lib.http import get_session
+from ..lib.metrics import TASK_METRICS
+from ..lib.ratelimit import get_limiter
+from ..lib.resilience import get_provider, CircuitOpenError
+from ..lib.search_index import index_document
 
 JINA_READER_ENDPOINT = "https://r.jina.ai/"
 
-def fetch_content(url: str) -> Dict[str, Any]:
+# How `fetch_content` gets a page's content: through the Jina reader, or by
+# fetching the origin page and extracting its main content locally.
+FETCH_MODES = ("reader", "direct")
+
+# Defaults for `fetch_many`: requests in flight overall, and per target host.
+FETCH_MAX_CONCURRENCY = 8
+FETCH_PER_HOST_LIMIT = 2
+
+# Caps on a single page: bytes read from the (decompressed) body, and characters kept.
+MAX_CONTENT_BYTES = int(os.environ.get("DEEP_RESEARCH_MAX_CONTENT_BYTES", str(8 * 1024 * 1024)))
+MAX_CONTENT_CHARS = int(os.environ.get("DEEP_RESEARCH_MAX_CONTENT_CHARS", "1000000"))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Bytes at the start of a body searched for a <meta> or XML charset declaration.
+CHARSET_SNIFF_BYTES = 4096
+_DECLARED_CHARSET = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""", re.IGNORECASE
+)
+
+class ContentStream:
+    """
+    The body of a streamed response, decoded incrementally and cut off at
+    `max_bytes` bytes or `max_chars` characters, whichever comes first.
+
+    Iterating yields text chunks as they download; reading stops (and the
+    connection is released) as soon as a cap is reached. `truncated`,
+    `bytes_read` and `chars_read` are final once the stream is exhausted.
+    """
+
+    def __init__(self, response: requests.Response, max_bytes: Optional[int] = MAX_CONTENT_BYTES,
+                 max_chars: Optional[int] = MAX_CONTENT_CHARS, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.chunk_size = chunk_size
+        self.truncated = False
+        self.bytes_read = 0
+        self.chars_read = 0
+
+    @property
+    def status(self) -> int:
+        return self.response.status_code
+
+    @property
+    def ok(self) -> bool:
+        return self.response.ok
+
+    def _encoding(self, head: bytes) -> str:
+        """
+        The body's encoding: the Content-Type charset, or one set explicitly
+        on the response; otherwise a BOM or the charset the document declares
+        in its first bytes, and UTF-8 failing those. (For text/* without a
+        charset, requests assumes ISO-8859-1, which garbles UTF-8 pages that
+        declare their charset only in a <meta> tag.)
+        """
+        headers = self.response.headers
+        encoding = self.response.encoding
+        if encoding and ("charset" in headers.get("Content-Type", "").lower()
+                         or encoding != requests.utils.get_encoding_from_headers(headers)):
+            return encoding
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        declared = _DECLARED_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+        if declared:
+            return (declared.group(1) or declared.group(2)).decode("ascii")
+        return "utf-8"
+
+    def _decoder(self, head: bytes):
+        try:
+            return codecs.getincrementaldecoder(self._encoding(head))(errors="replace")
+        except LookupError:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def _take(self, text: str) -> str:
+        if self.max_chars is not None and self.chars_read + len(text) > self.max_chars:
+            text = text[:self.max_chars - self.chars_read]
+            self.truncated = True
+        self.chars_read += len(text)
+        return text
+
+    def __iter__(self) -> Iterator[str]:
+        decoder = None
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                if not chunk:
+                    continue
+                if decoder is None:
+                    decoder = self._decoder(chunk)
+                if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+                    chunk = chunk[:self.max_bytes - self.bytes_read]
+                    self.truncated = True
+                self.bytes_read += len(chunk)
+                text = self._take(decoder.decode(chunk))
+                if text:
+                    yield text
+                if self.truncated:
+                    return
+            # Flush a trailing partial character; skipped when cut off mid-character.
+            text = self._take(decoder.decode(b"", final=True)) if decoder is not None else ""
+            if text:
+                yield text
+        finally:
+            self.close()
+
+    def read(self) -> str:
+        """The (possibly truncated) content as one string."""
+        return "".join(self)
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self) -> "ContentStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _reader_url(url: str) -> str:
+    # URL-encode the target URL to safely pass it as a parameter
+    return f"{JINA_READER_ENDPOINT}{quote(url, safe='')}"
+
+def stream_content(
+    url: str,
+    reader: bool = True,
+    max_bytes: Optional[int] = MAX_CONTENT_BYTES,
+    max_chars: Optional[int] = MAX_CONTENT_CHARS,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    headers: Optional[Dict[str, str]] = None,
+) -> ContentStream:
+    """
+    Opens a page for incremental reading, through the Jina reader or (with
+    ``reader=False``) as the raw origin body. Check `ContentStream.ok` before
+    consuming it; extra request `headers` (e.g. conditional ones) may yield a
+    304 instead.
+
+    Raises:
+        CircuitOpenError: If the reader's circuit is open.
+        requests.exceptions.RequestException: If the request fails.
+    """
+    if reader:
+        response = get_provider('jina').call(
+            lambda: get_session().get(_reader_url(url), timeout=30, stream=True, headers=headers)
+        )
+    else:
+        response = get_session().get(url, timeout=30, stream=True, headers=headers)
+    return ContentStream(response, max_bytes, max_chars, chunk_size)
+
+def _read_stream(stream: ContentStream) -> Dict[str, Any]:
+    with stream:
+        if not stream.ok:
+            return {"error": "Failed to fetch content", "status": stream.status, "details": stream.read()}
+        content = stream.read()
+    result = {"content": content, "status": 200}
+    if stream.truncated:
+        result["truncated"] = True
+    return result
+
+def _stored_page(store, url: str, mode: str, max_chars: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    The page from the content store, with its result as this call would
+    return it; `None` if it is not stored, or was cut off shorter than this
+    call's `max_chars` allows.
+    """
+    try:
+        entry = store.get(url, mode)
+    except sqlite3.Error:
+        return None
+    if entry is None:
+        return None
+    content = entry["content"]
+    if max_chars is not None and len(content) > max_chars:
+        result = {"content": content[:max_chars], "status": 200, "truncated": True}
+    elif entry["truncated"] and (max_chars is None or max_chars > len(content)):
+        return None
+    else:
+        result = {"content": content, "status": 200}
+        if entry["truncated"]:
+            result["truncated"] = True
+    return {**entry, "result": result}
+
+def _fetch_stored(
+    url: str,
+    reader: bool,
+    max_bytes: Optional[int],
+    max_chars: Optional[int],
+    use_cache: bool,
+) -> Dict[str, Any]:
+    """
+    Fetches a page through the content store: fresh pages are served from it,
+    expired ones revalidated with the origin's ETag/Last-Modified (a 304 costs
+    no body download), and everything else downloaded and stored.
+    """
+    store = get_content_store() if use_cache else None
+    mode = "reader" if reader else "direct"
+    page = _stored_page(store, url, mode, max_chars) if store is not None else None
+    # fetch_content is not cached by the dispatcher, so content store hits
+    # (fresh or revalidated pages) and misses are recorded here.
+    if page is not None and page["fresh"]:
+        TASK_METRICS.record_cache("fetch_content", True)
+        return page["result"]
+
+    stream = stream_content(url, reader=reader, max_bytes=max_bytes, max_chars=max_chars,
+                            headers=conditional_headers(page) if page is not None else None)
+    response_headers = stream.response.headers
+    if page is not None and stream.status == 304:
+        stream.close()
+        try:
+            store.revalidated(url, mode, ttl=ttl_from_headers(response_headers) or 0.0,
+                              etag=response_headers.get("ETag"), last_modified=response_headers.get("Last-Modified"))
+        except sqlite3.Error:
+            pass
+        TASK_METRICS.record_cache("fetch_content", True)
+        return page["result"]
+
+    if store is not None:
+        TASK_METRICS.record_cache("fetch_content", False)
+    result = _read_stream(stream)
+    ttl = ttl_from_headers(response_headers) if store is not None and "content" in result else None
+    if ttl is not None:
+        try:
+            store.put(url, result["content"], mode, ttl=ttl, etag=response_headers.get("ETag"),
+                      last_modified=response_headers.get("Last-Modified"), truncated=result.get("truncated", False))
+        except sqlite3.Error:
+            pass
+    return result
+
+def _extracted(url: str, page: Dict[str, Any], max_chars: Optional[int]) -> Dict[str, Any]:
+    """A directly fetched page as reader-style markdown; bodies that are not HTML are kept as they are."""
+    body = page["content"]
+    if looks_like_html(body):
+        extracted = extract(body, url)
+        body = f"Title: {extracted['title']}\n\nURL Source: {url}\n\nMarkdown Content:\n{extracted['content']}"
+    result = {"content": body, "status": 200}
+    if max_chars is not None and len(body) > max_chars:
+        result["content"] = body[:max_chars]
+        result["truncated"] = True
+    elif page.get("truncated"):
+        result["truncated"] = True
+    return result
+
+def fetch_content(
+    url: str,
+    max_bytes: Optional[int] = MAX_CONTENT_BYTES,
+    max_chars: Optional[int] = MAX_CONTENT_CHARS,
+    use_cache: bool = True,
+    mode: str = "reader",
+) -> Dict[str, Any]:
     """
     Fetches the primary content from a given URL using the Jina AI reader service.
     This is a Python port of the logic in `app/api/fetch-content/route.ts`.
+
+    With ``mode='direct'`` the origin page is fetched without the reader hop
+    and its main content extracted locally (see `tooling/lib/extract.py`), in
+    the same ``Title:``/``Markdown Content:`` format the reader returns.
+
+    The response is streamed and cut off at `max_bytes` bytes or `max_chars`
+    characters (``None`` for no limit); a cut-off result has ``"truncated": True``.
+    Pages are kept in the content store (see `tooling/lib/content_store.py`)
+    and revalidated instead of downloaded again; ``use_cache=False`` bypasses it.
     """
     if not url:
         return {"error": "URL is required", "status": 400}
+    if mode not in FETCH_MODES:
+        return {"error": f"Unknown fetch mode: {mode}", "status": 400}
 
     try:
-        # URL-encode the target URL to safely pass it as a parameter
-        encoded_url = quote(url, safe='')
-        fetch_url = f"{JINA_READER_ENDPOINT}{encoded_url}"
+        if mode == "direct":
+            # The character cap applies to the extracted text, not the HTML.
+            result = _fetch_stored(url, False, max_bytes, None, use_cache)
+            if "content" in result:
+                result = _extracted(url, result, max_chars)
+        else:
+            result = _fetch_stored(url, True, max_bytes, max_chars, use_cache)
+        if "content" in result:
+            # Keep the page for search(provider='local')
+            index_document(url, result["content"])
+        return result
 
-        response = requests.get(fetch_url, timeout=30)
-
-        # Check if the request was successful
-        if not response.ok:
-            return {
-                "error": "Failed to fetch content",
-                "status": response.status_code,
-                "details": response.text
-            }
+    except CircuitOpenError as e:
+        return {"error": f"The content reader is temporarily unavailable: {e}", "status": 503}
+    except requests.exceptions.RequestException as e:
+        return {"error": f"An unexpected error occurred: {e}", "status": 500}
 
-        # Return the content if successful
-        return {"content": response.text, "status": 200}
+def _host(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
 
-    except requests.exceptions.RequestException as e:
+def _fetch_one(url: str, mode: str, rate_limit: bool) -> Dict[str, Any]:
+    if rate_limit and not get_limiter("content_fetch").acquire():
+        return {"error": "Rate limit exceeded for content fetches. Please try again later.", "status": 429}
+    try:
+        return fetch_content(url, mode=mode)
+    except Exception as e:
+        # One bad URL must not take the rest of the batch down.
         return {"error": f"An unexpected error occurred: {e}", "status": 500}
 
+class _HostScheduler:
+    """Hands out URLs in order, skipping those whose host is at its limit."""
+
+    def __init__(self, urls: Iterable[str], per_host_limit: int):
+        self.queue = deque(dict.fromkeys(urls))
+        self.per_host_limit = max(1, per_host_limit)
+        self.active: Dict[str, int] = {}
+
+    def next_url(self):
+        for _ in range(len(self.queue)):
+            url = self.queue.popleft()
+            host = _host(url)
+            if self.active.get(host, 0) < self.per_host_limit:
+                self.active[host] = self.active.get(host, 0) + 1
+                return url
+            self.queue.append(url)
+        return None
+
+    def done(self, url: str):
+        self.active[_host(url)] -= 1
+
+def fetch_many(
+    urls: Iterable[str],
+    max_concurrency: int = FETCH_MAX_CONCURRENCY,
+    per_host_limit: int = FETCH_PER_HOST_LIMIT,
+    mode: str = "reader",
+    rate_limit: bool = False,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Fetches URLs in parallel, yielding ``(url, result)`` pairs as they complete.
+
+    Args:
+        max_concurrency: The most fetches in flight at once.
+        per_host_limit: The most fetches in flight for any one target host.
+        mode: How `fetch_content` gets each page (see `FETCH_MODES`).
+        rate_limit: Wait for the ``content_fetch`` budget in `tooling/lib/ratelimit.py`.
+
+    Each distinct URL is fetched once. A failing URL yields its error result
+    without affecting the others.
+    """
+    scheduler = _HostScheduler(urls, per_host_limit)
+    if not scheduler.queue:
+        return
+    max_concurrency = max(1, min(max_concurrency, len(scheduler.queue)))
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch-many") as executor:
+        in_flight = {}
+        while scheduler.queue or in_flight:
+            while len(in_flight) < max_concurrency:
+                url = scheduler.next_url()
+                if url is None:
+                    break
+                in_flight[executor.submit(_fetch_one, url, mode, rate_limit)] = url
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                url = in_flight.pop(future)
+                scheduler.done(url)
+                yield url, future.result()
+
+async def fetch_many_async(
+    urls: Iterable[str],
+    max_concurrency: int = FETCH_MAX_CONCURRENCY,
+    per_host_limit: int = FETCH_PER_HOST_LIMIT,
+    mode: str = "reader",
+    rate_limit: bool = False,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Like `fetch_many`, but waits for results on the event loop instead of blocking.
+
+    A consumer that stops early (``break``, an exception or ``aclose()``)
+    starts no further fetches, and closing the iterator waits for the ones
+    in flight, so no fetch outlives the iteration.
+    """
+    scheduler = _HostScheduler(urls, per_host_limit)
+    in_flight: Dict[asyncio.Future, str] = {}
+    try:
+        while scheduler.queue or in_flight:
+            while len(in_flight) < max(1, max_concurrency):
+                url = scheduler.next_url()
+                if url is None:
+                    break
+                in_flight[asyncio.ensure_future(asyncio.to_thread(_fetch_one, url, mode, rate_limit))] = url
+            finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                url = in_flight.pop(future)
+                scheduler.done(url)
+                yield url, future.result()
+    finally:
+        # Cancelling would only abandon the worker threads, which run to completion regardless.
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
 if __name__ == '__main__':
     # Example usage:
     test_url = "https://www.forbes.com/sites/gilpress/2024/07/21/the-story-of-openais-story/"
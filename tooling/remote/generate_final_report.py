@@ -1,8 +1,10 @@
 import json
 from typing import Dict, Any, List
+from ..lib.packing import estimate_tokens, pack_documents, source_budget
+from ..lib.records import DocumentLike, HitLike, to_dicts
 from ..lib.remote_helpers import generate_with_model, extract_and_parse_json
 
-def _create_prompt(articles: List[Dict[str, Any]], user_prompt: str) -> str:
+def _create_prompt(articles: List[DocumentLike], user_prompt: str) -> str:
     """Creates the system prompt for the LLM to generate the final report."""
 
     articles_str = "\n".join(
@@ -50,21 +52,27 @@ CITATION GUIDELINES:
 """
 
 def generate_final_report(
-    selected_results: List[Dict[str, Any]],
-    sources: List[Dict[str, Any]],
+    selected_results: List[DocumentLike],
+    sources: List[HitLike],
     prompt: str,
     platform_model: str
 ) -> Dict[str, Any]:
     """
     Generates a final, detailed research report from a list of articles.
     This is a Python port of `app/api/report/route.ts`.
+
+    Article content that does not fit the model's context window is
+    truncated or left out (see `tooling/lib/packing.py`); the report then
+    lists what was cut under "packing".
     """
     if not prompt or not selected_results:
         return {"error": "Prompt and selected results are required", "status": 400}
 
-    system_prompt = _create_prompt(selected_results, prompt)
-
     try:
+        budget = source_budget(platform_model, estimate_tokens(_create_prompt([], prompt)))
+        articles, packing = pack_documents(selected_results, budget)
+        system_prompt = _create_prompt(articles, prompt)
+
         llm_response = generate_with_model(system_prompt, platform_model)
         if not llm_response:
             raise ValueError("No response from model")
@@ -72,7 +80,9 @@ def generate_final_report(
         report_data = extract_and_parse_json(llm_response)
 
         # Add the original sources to the final report object
-        report_data["sources"] = sources
+        report_data["sources"] = to_dicts(sources)
+        if packing:
+            report_data["packing"] = packing
         report_data["status"] = 200
         return report_data
 
@@ -1,7 +1,22 @@
 import os
+import re
 import json
+import sqlite3
+import time
+import unicodedata
+import asyncio
 import requests
-from typing import Literal, Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Literal, Dict, Any, AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+
+from ..lib.cache import ResultCache, cache_key
+from ..lib.http import get_session
+from ..lib.metrics import TASK_METRICS
+from ..lib.ratelimit import get_limiter
+from ..lib.records import SearchHit, hits_from_result
+from ..lib.resilience import get_provider, CircuitOpenError
+from ..lib.search_index import get_local_index
+from ..lib.urls import dedup_key
 
 # Define constants from the original TypeScript file
 BING_ENDPOINT = 'https://api.bing.microsoft.com/v7.0/search'
@@ -11,6 +26,50 @@ EXA_ENDPOINT = 'https://api.exa.ai/search'
 # Define a type for the time filter, similar to TypeScript
 TimeFilter = Literal['24h', 'week', 'month', 'year', 'all']
 
+# The providers queried by `provider='multi'`, and the environment variables each one needs.
+PROVIDER_ENV_KEYS = {
+    'google': ('GOOGLE_SEARCH_API_KEY', 'GOOGLE_SEARCH_CX'),
+    'bing': ('AZURE_SUB_KEY',),
+    'exa': ('EXA_API_KEY',),
+}
+
+# Answers queries from the on-disk index of already fetched material (tooling/lib/search_index.py).
+LOCAL_PROVIDER = 'local'
+
+# The constant of reciprocal rank fusion; larger values flatten the advantage of top ranks.
+RRF_K = 60
+
+_fanout_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-fanout")
+
+# Results per request, and the most results each provider returns for one query
+# (Google's `start` cannot go past 91; Exa has no offset and returns up to 100).
+DEFAULT_MAX_RESULTS = 10
+PROVIDER_PAGE_SIZES = {'google': 10, 'bing': 50, 'exa': 100}
+PROVIDER_MAX_RESULTS = {'google': 100, 'bing': 1000, 'exa': 100}
+
+# Pages are fetched on their own pool, so that fanned-out searches cannot starve it.
+_page_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-pages")
+
+# Seconds a search result stays cached, by time filter: results restricted to
+# the last day go stale quickly, unrestricted ones hardly change.
+SEARCH_CACHE_TTLS = {
+    '24h': 15 * 60,
+    'week': 2 * 60 * 60,
+    'month': 12 * 60 * 60,
+    'year': 3 * 24 * 60 * 60,
+    'all': 7 * 24 * 60 * 60,
+}
+
+# Keyword queries up to this many terms are treated as bags of words, so
+# their word order does not matter for caching.
+KEYWORD_QUERY_MAX_TERMS = 6
+
+# Quotes, boolean operators, exclusions and `site:`-style filters make word order significant.
+_QUERY_SYNTAX = re.compile(r'["\']|\b(?:AND|OR|NOT)\b|(?:^|\s)[-+]\S|\w+:\S')
+
+_search_cache: Optional[ResultCache] = None
+_search_cache_configured = False
+
 # --- Helper Functions (Ported from TypeScript) ---
 
 def get_bing_freshness(time_filter: TimeFilter) -> str:
@@ -37,20 +96,380 @@ def get_google_date_restrict(time_filter: TimeFilter) -> str | None:
         return 'y1'
     return None
 
+def configured_providers() -> List[str]:
+    """Returns the search providers whose API keys are set in the environment."""
+    return [name for name, keys in PROVIDER_ENV_KEYS.items() if all(os.environ.get(key) for key in keys)]
+
+def local_search(query: str, max_results: int = DEFAULT_MAX_RESULTS) -> Dict[str, Any]:
+    """
+    Answers a query from the local BM25 index of fetched pages, parsed
+    documents and `knowledge_core/`. Hits carry their `score` and `source`.
+    """
+    index = get_local_index()
+    if index is None:
+        return {"error": "Local search is not configured; set DEEP_RESEARCH_CACHE_DIR.", "status": 500}
+    try:
+        return {"webPages": {"value": index.search(query, limit=max_results)}}
+    except sqlite3.Error as e:
+        return {"error": f"Local search failed: {e}", "status": 500}
+
+def fuse_results(hits_by_provider: Dict[str, List[Dict[str, Any]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merges ranked hit lists with reciprocal rank fusion. Hits for the same
+    page (by normalized URL) are combined; each merged hit lists the
+    providers that returned it and its fused `score`.
+    """
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for provider, hits in hits_by_provider.items():
+        for rank, hit in enumerate(hits, start=1):
+            key = dedup_key(hit.get("url") or "")
+            if key is None:
+                continue
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key in merged:
+                merged[key]["providers"].append(provider)
+            else:
+                merged[key] = {**hit, "providers": [provider]}
+    ranked = sorted(merged, key=lambda key: scores[key], reverse=True)
+    return [{**merged[key], "score": round(scores[key], 6)} for key in ranked]
+
+def _timed_search(query: str, time_filter: TimeFilter, provider: str, use_cache: bool, rate_limit: bool,
+                  max_results: int):
+    start = time.monotonic()
+    result = search(query, time_filter=time_filter, provider=provider, use_cache=use_cache, rate_limit=rate_limit,
+                    max_results=max_results)
+    return result, time.monotonic() - start
+
+def multi_search(
+    query: str,
+    time_filter: TimeFilter = 'all',
+    providers: Optional[Sequence[str]] = None,
+    quorum: Optional[int] = None,
+    first_k: Optional[int] = None,
+    use_cache: bool = True,
+    rate_limit: bool = False,
+    max_results: int = DEFAULT_MAX_RESULTS,
+) -> Dict[str, Any]:
+    """
+    Queries several providers concurrently and merges their results.
+
+    Args:
+        providers: The providers to query; defaults to every configured one.
+        quorum: Return as soon as this many providers have answered
+            successfully. By default, all providers are awaited.
+        first_k: Return as soon as at least this many distinct pages have arrived.
+        max_results: The number of results requested from each provider.
+
+    Returns:
+        The fused, deduplicated hits in the usual ``webPages.value`` shape,
+        plus a ``providers`` report with each provider's status, hit count and
+        latency. Providers that had not answered when the search returned are
+        marked ``pending``; their requests finish in the background.
+    """
+    providers = list(providers) if providers else configured_providers()
+    unknown = [name for name in providers if name not in PROVIDER_ENV_KEYS and name != LOCAL_PROVIDER]
+    if unknown:
+        return {"error": f"Unknown search provider(s): {', '.join(unknown)}", "status": 400}
+    if not providers:
+        return {"error": "No search providers are configured.", "status": 500}
+
+    needed = len(providers) if quorum is None else max(1, min(quorum, len(providers)))
+    futures = {
+        _fanout_executor.submit(_timed_search, query, time_filter, name, use_cache, rate_limit, max_results): name
+        for name in providers
+    }
+    hits_by_provider: Dict[str, List[Dict[str, Any]]] = {}
+    report: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in providers}
+    seen = set()
+
+    for future in as_completed(futures):
+        name = futures[future]
+        result, latency = future.result()
+        if "error" in result:
+            report[name] = {"status": result.get("status", 500), "error": result["error"], "latency": latency}
+        else:
+            hits = result.get("webPages", {}).get("value", [])
+            hits_by_provider[name] = hits
+            seen.update(dedup_key(hit.get("url") or "") for hit in hits)
+            seen.discard(None)
+            report[name] = {"status": 200, "count": len(hits), "latency": latency}
+
+        if len(hits_by_provider) >= needed or (first_k is not None and len(seen) >= first_k):
+            break
+
+    if not hits_by_provider:
+        return {"error": "All search providers failed.", "status": 502, "providers": report}
+
+    # Fuse in the order the providers were requested, so ties break deterministically.
+    ordered = {name: hits_by_provider[name] for name in providers if name in hits_by_provider}
+    return {"webPages": {"value": fuse_results(ordered)}, "providers": report}
+
+# --- Search Cache ---
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query for caching: Unicode-normalized, case-folded and
+    whitespace-collapsed. Short keyword queries (no quotes, operators or
+    question marks) also have their terms sorted.
+    """
+    text = unicodedata.normalize("NFKC", query)
+    is_keyword_query = not _QUERY_SYNTAX.search(text) and '?' not in text
+    terms = text.casefold().split()
+    if is_keyword_query and len(terms) <= KEYWORD_QUERY_MAX_TERMS:
+        terms.sort()
+    return " ".join(terms)
+
+def search_cache_key(query: str, provider: str, time_filter: TimeFilter,
+                     max_results: int = DEFAULT_MAX_RESULTS) -> str:
+    params = {"query": normalize_query(query), "provider": provider, "time_filter": time_filter}
+    if max_results != DEFAULT_MAX_RESULTS:
+        params["max_results"] = max_results
+    return cache_key("search", params)
+
+def configure_search_cache(cache: Optional[ResultCache]):
+    """Installs the search result cache, or disables it with `None`."""
+    global _search_cache, _search_cache_configured
+    _search_cache, _search_cache_configured = cache, True
+
+def get_search_cache() -> Optional[ResultCache]:
+    """
+    Returns the search result cache. Unless one was configured explicitly,
+    it is created on first use in `DEEP_RESEARCH_CACHE_DIR`; caching is off
+    when that variable is not set.
+    """
+    global _search_cache, _search_cache_configured
+    if not _search_cache_configured:
+        cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR")
+        _search_cache = ResultCache(os.path.join(cache_dir, "search.sqlite3")) if cache_dir else None
+        _search_cache_configured = True
+    return _search_cache
+
+def search_cache_stats() -> Dict[str, Any]:
+    """Hit/miss statistics of the search cache (per provider under 'namespaces'), or {} when it is off."""
+    cache = get_search_cache()
+    return cache.stats() if cache is not None else {}
+
+def _cache_get(cache: Optional[ResultCache], key: str, provider: str) -> Optional[Dict[str, Any]]:
+    if cache is None:
+        return None
+    try:
+        cached = cache.get(key, namespace=provider)
+    except (sqlite3.Error, ValueError):
+        cached = None
+    # search is not cached by the dispatcher, so its cache hits are recorded here.
+    TASK_METRICS.record_cache("search", cached is not None)
+    return cached
+
+def _cache_set(cache: Optional[ResultCache], key: str, provider: str, time_filter: TimeFilter, result: Dict[str, Any]):
+    if cache is None:
+        return
+    try:
+        cache.set(key, result, ttl=SEARCH_CACHE_TTLS.get(time_filter, SEARCH_CACHE_TTLS['all']), namespace=provider)
+    except (sqlite3.Error, TypeError, ValueError):
+        pass
+
+# --- Pagination ---
+
+class SearchError(Exception):
+    """Raised by the hit streams when none of a search's result pages could be fetched."""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result["error"])
+        self.status = result.get("status", 500)
+
+def result_pages(provider: str, max_results: int) -> List[Tuple[int, int]]:
+    """The (offset, count) of each request needed for `max_results` results from a provider."""
+    max_results = min(max_results, PROVIDER_MAX_RESULTS[provider])
+    size = PROVIDER_PAGE_SIZES[provider]
+    return [(offset, min(size, max_results - offset)) for offset in range(0, max_results, size)]
+
+def _fetch_page(query: str, time_filter: TimeFilter, provider: str, offset: int, count: int,
+                rate_limit: bool) -> Tuple[int, Dict[str, Any]]:
+    if rate_limit and not get_limiter("search", provider).acquire():
+        return offset, {"error": f"Rate limit exceeded for {provider} search. Please try again later.", "status": 429}
+    return offset, _search_provider(query, time_filter, provider, offset=offset, count=count)
+
+def _submit_pages(query: str, time_filter: TimeFilter, provider: str, max_results: int,
+                  rate_limit: bool) -> List[Future]:
+    return [
+        _page_executor.submit(_fetch_page, query, time_filter, provider, offset, count, rate_limit)
+        for offset, count in result_pages(provider, max_results)
+    ]
+
+class _PageMerger:
+    """Collects result pages as they arrive, dropping hits already seen on another page."""
+
+    def __init__(self):
+        self.pages: Dict[int, Dict[str, Any]] = {}
+        self._seen = set()
+
+    def add(self, offset: int, page: Dict[str, Any]) -> List[SearchHit]:
+        """Records a page and returns its new hits, each with its 1-based `rank` in the provider's ranking."""
+        self.pages[offset] = page
+        if "error" in page:
+            return []
+        hits = []
+        for rank, hit in enumerate(page.get("webPages", {}).get("value", []), start=offset + 1):
+            key = dedup_key(hit.get("url") or "")
+            if key is not None and key in self._seen:
+                continue
+            self._seen.add(key)
+            record = SearchHit.from_dict(hit)
+            record.rank = rank
+            hits.append(record)
+        return hits
+
+    @property
+    def complete(self) -> bool:
+        return all("error" not in page for page in self.pages.values())
+
+    def result(self) -> Dict[str, Any]:
+        """The merged result, in rank order; the first page's error if every page failed."""
+        if len(self.pages) == 1:
+            return next(iter(self.pages.values()))
+        succeeded = [self.pages[offset] for offset in sorted(self.pages) if "error" not in self.pages[offset]]
+        if not succeeded:
+            return self.pages[min(self.pages)]
+        hits, seen = [], set()
+        for page in succeeded:
+            for hit in page.get("webPages", {}).get("value", []):
+                key = dedup_key(hit.get("url") or "")
+                if key is not None and key in seen:
+                    continue
+                seen.add(key)
+                hits.append(hit)
+        return {"webPages": {"value": hits}}
+
+def _stream_setup(query: str, time_filter: TimeFilter, provider: str, max_results: int,
+                  use_cache: bool) -> Tuple[str, Optional[ResultCache], str, Optional[Dict[str, Any]]]:
+    if not query:
+        raise SearchError({"error": "Query parameter is required", "status": 400})
+    if max_results < 1:
+        raise SearchError({"error": "max_results must be at least 1", "status": 400})
+    if provider == 'multi':
+        raise ValueError("Hit streams are per provider; use multi_search to merge providers.")
+    if provider not in PROVIDER_ENV_KEYS:
+        provider = 'bing'
+    cache = get_search_cache() if use_cache else None
+    key = search_cache_key(query, provider, time_filter, max_results)
+    return provider, cache, key, _cache_get(cache, key, provider)
+
+def _local_result(query: str, max_results: int) -> Dict[str, Any]:
+    result = local_search(query, max_results)
+    if "error" in result:
+        raise SearchError(result)
+    return result
+
+def _ranked_hits(result: Dict[str, Any]) -> List[SearchHit]:
+    hits = hits_from_result(result)
+    for rank, hit in enumerate(hits, start=1):
+        hit.rank = rank
+    return hits
+
+def _stream_finish(merger: _PageMerger, cache: Optional[ResultCache], key: str, provider: str,
+                   time_filter: TimeFilter):
+    result = merger.result()
+    if "error" in result:
+        raise SearchError(result)
+    if merger.complete:
+        _cache_set(cache, key, provider, time_filter, result)
+
+def iter_search_hits(
+    query: str,
+    time_filter: TimeFilter = 'all',
+    provider: str = 'google',
+    max_results: int = DEFAULT_MAX_RESULTS,
+    use_cache: bool = True,
+    rate_limit: bool = False,
+) -> Iterator[SearchHit]:
+    """
+    Yields the hits of a search as `SearchHit` records as its result pages
+    arrive. The pages are fetched concurrently, so hits may arrive out of
+    order; each carries its 1-based `rank` in the provider's ranking. Hits already seen on another
+    page are skipped.
+
+    Pages that fail are skipped too; `SearchError` is raised at the end if
+    none succeeded. The merged result is cached as by `search`.
+    """
+    if provider == LOCAL_PROVIDER:
+        yield from _ranked_hits(_local_result(query, max_results))
+        return
+    provider, cache, key, cached = _stream_setup(query, time_filter, provider, max_results, use_cache)
+    if cached is not None:
+        yield from _ranked_hits(cached)
+        return
+
+    merger = _PageMerger()
+    for future in as_completed(_submit_pages(query, time_filter, provider, max_results, rate_limit)):
+        yield from merger.add(*future.result())
+    _stream_finish(merger, cache, key, provider, time_filter)
+
+async def iter_search_hits_async(
+    query: str,
+    time_filter: TimeFilter = 'all',
+    provider: str = 'google',
+    max_results: int = DEFAULT_MAX_RESULTS,
+    use_cache: bool = True,
+    rate_limit: bool = False,
+) -> AsyncIterator[SearchHit]:
+    """Like `iter_search_hits`, but waits for pages on the event loop instead of blocking."""
+    if provider == LOCAL_PROVIDER:
+        for hit in _ranked_hits(_local_result(query, max_results)):
+            yield hit
+        return
+    provider, cache, key, cached = _stream_setup(query, time_filter, provider, max_results, use_cache)
+    if cached is not None:
+        for hit in _ranked_hits(cached):
+            yield hit
+        return
+
+    merger = _PageMerger()
+    futures = [asyncio.wrap_future(future) for future in _submit_pages(query, time_filter, provider, max_results, rate_limit)]
+    for next_page in asyncio.as_completed(futures):
+        for hit in merger.add(*await next_page):
+            yield hit
+    _stream_finish(merger, cache, key, provider, time_filter)
+
 # --- Main Search Function ---
 
 def search(
     query: str,
     time_filter: TimeFilter = 'all',
     provider: str = 'google',
-    is_test_query: bool = False
+    is_test_query: bool = False,
+    providers: Optional[Sequence[str]] = None,
+    quorum: Optional[int] = None,
+    first_k: Optional[int] = None,
+    use_cache: bool = True,
+    rate_limit: bool = False,
+    max_results: int = DEFAULT_MAX_RESULTS,
 ) -> Dict[str, Any]:
     """
     Performs a web search using the specified provider (Google, Bing, or Exa).
     This function is a Python port of the logic in `app/api/search/route.ts`.
+
+    With ``provider='local'``, the query is answered from previously fetched
+    material instead (see `local_search`); the time filter does not apply.
+
+    With ``provider='multi'``, several providers are queried concurrently and
+    their results merged (see `multi_search`, which takes `providers`,
+    `quorum` and `first_k`).
+
+    Successful results are cached per normalized query, provider and time
+    filter (see `SEARCH_CACHE_TTLS`); pass ``use_cache=False`` to bypass it.
+
+    With ``rate_limit=True``, requests that miss the cache wait for the
+    provider's budget in `tooling/lib/ratelimit.py` (see `search_many`).
+
+    `max_results` beyond one page of results are fetched as concurrent page
+    requests (see `result_pages`) and merged in rank order. Use
+    `iter_search_hits` to consume the hits while the pages arrive.
     """
     if not query:
         return {"error": "Query parameter is required", "status": 400}
+    if max_results < 1:
+        return {"error": "max_results must be at least 1", "status": 400}
 
     # Return dummy results for test queries
     if query.lower() == 'test' or is_test_query:
@@ -66,6 +485,67 @@ def search(
 
     # --- Provider-Specific Logic ---
 
+    if provider == 'multi':
+        return multi_search(query, time_filter, providers=providers, quorum=quorum, first_k=first_k,
+                            use_cache=use_cache, rate_limit=rate_limit, max_results=max_results)
+
+    # The local index is neither cached nor rate limited; it answers in milliseconds.
+    if provider == LOCAL_PROVIDER:
+        return local_search(query, max_results)
+
+    if provider not in PROVIDER_ENV_KEYS:
+        provider = 'bing'  # Bing is the default for unrecognized providers
+
+    cache = get_search_cache() if use_cache else None
+    key = search_cache_key(query, provider, time_filter, max_results)
+    cached = _cache_get(cache, key, provider)
+    if cached is not None:
+        return cached
+
+    merger = _PageMerger()
+    pages = result_pages(provider, max_results)
+    if len(pages) == 1:
+        merger.add(*_fetch_page(query, time_filter, provider, *pages[0], rate_limit))
+    else:
+        for future in _submit_pages(query, time_filter, provider, max_results, rate_limit):
+            merger.add(*future.result())
+    result = merger.result()
+
+    if merger.complete:
+        _cache_set(cache, key, provider, time_filter, result)
+    return result
+
+def search_many(
+    queries: Sequence[str],
+    time_filter: TimeFilter = 'all',
+    provider: str = 'google',
+    max_concurrency: int = 4,
+    rate_limit: bool = True,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Runs several searches concurrently. Requests that miss the cache are
+    scheduled through the provider's rate limiter, so a large batch is
+    spread over time instead of exhausting the provider's quota.
+
+    Returns:
+        The results, in the same order as `queries`. A query that cannot get
+        capacity within `RATE_LIMIT_MAX_WAIT` seconds yields a 429 error.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(queries))),
+                            thread_name_prefix="search-many") as executor:
+        futures = [
+            executor.submit(search, query, time_filter, provider, rate_limit=rate_limit, **kwargs)
+            for query in queries
+        ]
+        return [future.result() for future in futures]
+
+def _search_provider(query: str, time_filter: TimeFilter, provider: str, offset: int = 0,
+                     count: int = DEFAULT_MAX_RESULTS) -> Dict[str, Any]:
+    """Queries a single provider for one page of results and converts its response to the common format."""
     if provider == 'exa':
         api_key = os.environ.get("EXA_API_KEY")
         if not api_key:
@@ -73,11 +553,15 @@ def search(
 
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {api_key}'}
         payload = {
-            'query': query, 'type': 'auto', 'numResults': 10,
+            'query': query, 'type': 'auto', 'numResults': count,
             'contents': {'text': {'maxCharacters': 500}}
         }
         try:
-            response = requests.post(EXA_ENDPOINT, headers=headers, json=payload, timeout=30)
+            # A paid POST: hedged only if the exa policy sets hedge_non_idempotent.
+            response = get_provider('exa').call(
+                lambda: get_session().post(EXA_ENDPOINT, headers=headers, json=payload, timeout=30),
+                idempotent=False,
+            )
             response.raise_for_status()
             data = response.json()
             # Transform Exa results to match the common format
@@ -91,6 +575,8 @@ def search(
                     ]
                 }
             }
+        except CircuitOpenError as e:
+            return {"error": f"Exa search is temporarily unavailable: {e}", "status": 503}
         except requests.exceptions.RequestException as e:
             return {"error": f"Failed to fetch search results from Exa: {e}", "status": 500}
 
@@ -100,13 +586,17 @@ def search(
         if not api_key or not cx:
             return {"error": "Google search API is not properly configured.", "status": 500}
 
-        params = {'q': query, 'key': api_key, 'cx': cx, 'num': 10, 'safe': 'active'}
+        params = {'q': query, 'key': api_key, 'cx': cx, 'num': count, 'safe': 'active'}
+        if offset:
+            params['start'] = offset + 1  # Google's result indices are 1-based
         date_restrict = get_google_date_restrict(time_filter)
         if date_restrict:
             params['dateRestrict'] = date_restrict
 
         try:
-            response = requests.get(GOOGLE_ENDPOINT, params=params, timeout=30)
+            response = get_provider('google').call(
+                lambda: get_session().get(GOOGLE_ENDPOINT, params=params, timeout=30)
+            )
             response.raise_for_status()
             data = response.json()
             # Transform Google results
@@ -120,6 +610,8 @@ def search(
                     ]
                 }
             }
+        except CircuitOpenError as e:
+            return {"error": f"Google search is temporarily unavailable: {e}", "status": 503}
         except requests.exceptions.RequestException as e:
             return {"error": f"Failed to fetch search results from Google: {e}", "status": 500}
 
@@ -128,15 +620,21 @@ def search(
         if not api_key:
             return {"error": "Bing search API is not properly configured.", "status": 500}
 
-        params = {'q': query, 'count': 10, 'mkt': 'en-US', 'safeSearch': 'Moderate'}
+        params = {'q': query, 'count': count, 'mkt': 'en-US', 'safeSearch': 'Moderate'}
+        if offset:
+            params['offset'] = offset
         freshness = get_bing_freshness(time_filter)
         if freshness:
             params['freshness'] = freshness
 
         headers = {'Ocp-Apim-Subscription-Key': api_key}
         try:
-            response = requests.get(BING_ENDPOINT, params=params, headers=headers, timeout=30)
+            response = get_provider('bing').call(
+                lambda: get_session().get(BING_ENDPOINT, params=params, headers=headers, timeout=30)
+            )
             response.raise_for_status()
             return response.json() # Bing's format is the default
+        except CircuitOpenError as e:
+            return {"error": f"Bing search is temporarily unavailable: {e}", "status": 503}
         except requests.exceptions.RequestException as e:
             return {"error": f"Failed to fetch search results from Bing: {e}", "status": 500}
\ No newline at end of file
@@ -4,6 +4,14 @@ import requests
 from typing import Dict, Any
 import argparse
 
+try:
+    from tooling.lib.http import get_session
+except ImportError:  # run as a script (e.g. `python3 tooling/research.py`), outside the package
+    _session = requests.Session()
+
+    def get_session() -> requests.Session:
+        return _session
+
 # --- Configuration (ported from lib/config.ts) ---
 CONFIG = {
     "search": {
@@ -56,7 +64,7 @@ def search_google(query: str, time_filter: str) -> str:
         params['dateRestrict'] = date_restrict
 
     try:
-        response = requests.get(GOOGLE_ENDPOINT, params=params)
+        response = get_session().get(GOOGLE_ENDPOINT, params=params)
         response.raise_for_status()
         return json.dumps(response.json())
     except requests.exceptions.RequestException as e:
@@ -80,7 +88,7 @@ def search_bing(query: str, time_filter: str) -> str:
     headers = {'Ocp-Apim-Subscription-Key': api_key}
 
     try:
-        response = requests.get(BING_ENDPOINT, params=params, headers=headers)
+        response = get_session().get(BING_ENDPOINT, params=params, headers=headers)
         response.raise_for_status()
         return json.dumps(response.json())
     except requests.exceptions.RequestException as e:
@@ -102,7 +110,7 @@ def search_exa(query: str) -> str:
     }
 
     try:
-        response = requests.post(EXA_ENDPOINT, headers=headers, json=payload)
+        response = get_session().post(EXA_ENDPOINT, headers=headers, json=payload)
         response.raise_for_status()
         return json.dumps(response.json())
     except requests.exceptions.RequestException as e:
@@ -1,9 +1,32 @@
 import unittest
 import json
-from unittest.mock import patch, MagicMock
+import threading
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import os
+import tempfile
+
+from tooling.lib.artifacts import get_artifact
+from tooling.lib.cache import ResultCache
+from tooling.lib.metrics import TASK_METRICS
+from tooling.lib.ratelimit import MemoryBackend, configure_rate_limit_backend, set_rate_limit, RATE_LIMITS
 
 # The function we are testing
-from tooling.deep_research import execute_research_protocol, TASK_DISPATCHER
+from tooling.deep_research import (
+    execute_research_protocol,
+    execute_research_protocol_async,
+    execute_many,
+    run_task,
+    run_task_async,
+    run_many,
+    configure_result_cache,
+    cache_stats,
+    coalescing_stats,
+    LazyTaskRegistry,
+    TASK_DISPATCHER,
+    TASK_CONCURRENCY_LIMITS,
+)
 
 class TestDeepResearchOrchestrator(unittest.TestCase):
 
@@ -87,5 +110,382 @@ class TestDeepResearchOrchestrator(unittest.TestCase):
         mock_download.assert_called_once_with(**expected_args)
 
 
+class TestNativeDispatch(unittest.TestCase):
+
+    def test_run_task_returns_result_object(self):
+        """Test that the in-process API returns the tool's own result without copying it."""
+        tool_result = {"status": 200, "content": "x" * 1024}
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': MagicMock(return_value=tool_result)}):
+            result = run_task({"task": "fetch_content", "url": "http://example.com"})
+
+        self.assertIs(result, tool_result)
+
+    def test_run_task_errors_are_dicts(self):
+        """Test that validation and tool failures are returned as error dictionaries."""
+        self.assertEqual(run_task({})["status"], 400)
+        with patch.dict(TASK_DISPATCHER, {'search': MagicMock(side_effect=Exception("boom"))}):
+            result = run_task({"task": "search", "query": "q"})
+        self.assertEqual(result["status"], 500)
+        self.assertIn("boom", result["error"])
+
+    def test_download_bytes_published_as_artifact(self):
+        """Test that binary content crosses the JSON boundary as an artifact handle."""
+        tool_result = {"status": 200, "content": b"\x00\xffbytes", "content_type": "application/pdf", "filename": "report.pdf"}
+        with patch.dict(TASK_DISPATCHER, {'download_report': MagicMock(return_value=tool_result)}):
+            native = run_task({"task": "download_report", "report": {}, "file_format": "pdf"})
+            encoded = json.loads(execute_research_protocol({"task": "download_report", "report": {}, "file_format": "pdf"}))
+
+        self.assertEqual(native["content"], b"\x00\xffbytes")
+        self.assertNotIn("content", encoded)
+        handle = encoded["artifact"]
+        self.assertEqual(handle["size"], 7)
+        self.assertEqual(handle["content_type"], "application/pdf")
+        self.assertEqual(get_artifact(handle["artifact_id"]).read(), b"\x00\xffbytes")
+
+    def test_bare_document_result_published_as_artifact(self):
+        """Test that tools returning raw bytes are wrapped in an artifact result."""
+        with patch.dict(TASK_DISPATCHER, {'generate_pdf': MagicMock(return_value=b"%PDF")}):
+            encoded = json.loads(execute_research_protocol({"task": "generate_pdf", "report": {}}))
+
+        self.assertEqual(encoded["status"], 200)
+        self.assertEqual(encoded["artifact"]["filename"], "report.pdf")
+        self.assertEqual(get_artifact(encoded["artifact"]["artifact_id"]).read(), b"%PDF")
+
+    def test_unserializable_result_is_a_task_error(self):
+        """Test that a result that cannot be encoded yields a 500 JSON error."""
+        with patch.dict(TASK_DISPATCHER, {'search': MagicMock(return_value={"status": 200, "value": object()})}):
+            result = json.loads(execute_research_protocol({"task": "search", "query": "q"}))
+        self.assertEqual(result["status"], 500)
+
+    def test_run_many(self):
+        """Test that the native batch API returns result objects in order."""
+        with patch.dict(TASK_DISPATCHER, {'search': lambda query: {"status": 200, "query": query}}):
+            results = run_many([{"task": "search", "query": "a"}, {"task": "search", "query": "b"}])
+        self.assertEqual([r["query"] for r in results], ["a", "b"])
+
+
+class TestResultCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmp_dir.name, "results.sqlite3"))
+        configure_result_cache(self.cache)
+
+    def tearDown(self):
+        configure_result_cache(None)
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_repeated_call_is_served_from_cache(self):
+        """Test that an identical cacheable call does not run the tool again."""
+        mock_optimize = MagicMock(return_value={"query": "q", "status": 200})
+        with patch.dict(TASK_DISPATCHER, {'optimize_research': mock_optimize}):
+            first = run_task({"task": "optimize_research", "prompt": "p", "platform_model": "openai__gpt-4"})
+            second = run_task({"task": "optimize_research", "platform_model": "openai__gpt-4", "prompt": "p"})
+
+        mock_optimize.assert_called_once()
+        self.assertEqual(first, second)
+        self.assertEqual(cache_stats()["hits"], 1)
+
+    def test_use_cache_false_bypasses_cache(self):
+        """Test that a call can opt out of the cache."""
+        mock_optimize = MagicMock(return_value={"query": "q", "status": 200})
+        with patch.dict(TASK_DISPATCHER, {'optimize_research': mock_optimize}):
+            run_task({"task": "optimize_research", "prompt": "p"})
+            run_task({"task": "optimize_research", "prompt": "p", "use_cache": False})
+
+        self.assertEqual(mock_optimize.call_count, 2)
+        mock_optimize.assert_called_with(prompt="p")
+
+    def test_errors_and_uncached_tasks_are_not_stored(self):
+        """Test that failures and tasks without a TTL always run."""
+        mock_optimize = MagicMock(return_value={"error": "Failed to optimize research", "status": 500})
+        mock_report = MagicMock(return_value={"title": "T", "status": 200})
+        with patch.dict(TASK_DISPATCHER, {'optimize_research': mock_optimize, 'generate_final_report': mock_report}):
+            for _ in range(2):
+                run_task({"task": "optimize_research", "prompt": "p"})
+                run_task({"task": "generate_final_report", "prompt": "p"})
+
+        self.assertEqual(mock_optimize.call_count, 2)
+        self.assertEqual(mock_report.call_count, 2)
+
+    def test_async_path_uses_cache(self):
+        """Test that the async dispatcher shares the same cache."""
+        mock_optimize = MagicMock(return_value={"query": "q", "status": 200})
+        with patch.dict(TASK_DISPATCHER, {'optimize_research': mock_optimize}):
+            run_many([{"task": "optimize_research", "prompt": "p"}])
+            results = run_many([{"task": "optimize_research", "prompt": "p"}])
+
+        mock_optimize.assert_called_once()
+        self.assertEqual(results[0], {"query": "q", "status": 200})
+
+    def test_self_caching_task_receives_use_cache(self):
+        """Test that search is left to its own cache and gets the use_cache flag."""
+        mock_search = MagicMock(return_value={"webPages": {"value": []}})
+        with patch.dict(TASK_DISPATCHER, {'search': mock_search}):
+            run_task({"task": "search", "query": "q"})
+            run_task({"task": "search", "query": "q", "use_cache": False})
+
+        self.assertEqual(mock_search.call_count, 2)
+        mock_search.assert_called_with(query="q", use_cache=False)
+
+    def test_fetch_content_is_left_to_its_content_store(self):
+        """Test that pages are not cached by the dispatcher, so the content store can revalidate them."""
+        mock_fetch = MagicMock(return_value={"content": "page", "status": 200})
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': mock_fetch}):
+            run_task({"task": "fetch_content", "url": "http://example.com"})
+            run_task({"task": "fetch_content", "url": "http://example.com", "use_cache": False})
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        mock_fetch.assert_called_with(url="http://example.com", use_cache=False)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        TASK_METRICS.reset()
+
+    def tearDown(self):
+        configure_result_cache(None)
+        TASK_METRICS.reset()
+
+    def test_calls_latency_bytes_and_errors_are_recorded(self):
+        """Test that every dispatched call is counted with its sizes and error status."""
+        mock_fetch = MagicMock(side_effect=[
+            {"content": "x" * 100, "status": 200},
+            {"error": "Failed to fetch content", "status": 404},
+        ])
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': mock_fetch}):
+            run_task({"task": "fetch_content", "url": "http://a.test"})
+            run_task({"task": "fetch_content", "url": "http://b.test"})
+
+        data = TASK_METRICS.snapshot()["fetch_content"]
+        self.assertEqual(data["calls"], 2)
+        self.assertEqual(data["errors"], {"404": 1})
+        self.assertEqual(data["latency_seconds"]["count"], 2)
+        self.assertEqual(data["request_bytes"], 2 * len("http://a.test"))
+        self.assertEqual(data["response_bytes"], 100 + len("Failed to fetch content"))
+
+    def test_cache_hits_are_recorded(self):
+        """Test that cache lookups are counted per task."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResultCache(os.path.join(tmp_dir, "results.sqlite3"))
+            configure_result_cache(cache)
+            with patch.dict(TASK_DISPATCHER, {'optimize_research': MagicMock(return_value={"query": "", "status": 200})}):
+                run_task({"task": "optimize_research", "prompt": "p"})
+                run_many([{"task": "optimize_research", "prompt": "p"}])
+            cache.close()
+
+        data = TASK_METRICS.snapshot()["optimize_research"]
+        self.assertEqual((data["cache_hits"], data["cache_misses"], data["calls"]), (1, 1, 2))
+
+
+class TestRequestCoalescing(unittest.TestCase):
+
+    def test_concurrent_identical_sync_calls_share_one_execution(self):
+        """Test that threads making the same call at once trigger a single tool run."""
+        release = threading.Event()
+        mock_search = MagicMock(side_effect=lambda query: release.wait(5) and {"status": 200, "query": query})
+        before = coalescing_stats()["coalesced"]
+
+        with patch.dict(TASK_DISPATCHER, {'search': mock_search}):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(run_task({"task": "search", "query": "popular"})))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.1)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        mock_search.assert_called_once_with(query="popular")
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(coalescing_stats()["coalesced"] - before, 3)
+
+    def test_concurrent_identical_async_calls_share_one_execution(self):
+        """Test that identical calls in one batch are coalesced while distinct ones are not."""
+        def slow_fetch(url):
+            time.sleep(0.1)
+            return {"status": 200, "content": url}
+
+        mock_fetch = MagicMock(side_effect=slow_fetch)
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': mock_fetch}):
+            results = run_many([
+                {"task": "fetch_content", "url": "http://popular"},
+                {"task": "fetch_content", "url": "http://popular"},
+                {"task": "fetch_content", "url": "http://other"},
+            ])
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(results[2]["content"], "http://other")
+
+    def test_coalesce_false_opts_out(self):
+        """Test that a call can insist on its own execution."""
+        def slow_fetch(url):
+            time.sleep(0.05)
+            return {"status": 200}
+
+        mock_fetch = MagicMock(side_effect=slow_fetch)
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': mock_fetch}):
+            run_many([{"task": "fetch_content", "url": "http://a", "coalesce": False}] * 2)
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        mock_fetch.assert_called_with(url="http://a")
+
+
+class TestLazyTaskRegistry(unittest.TestCase):
+
+    def test_import_path_resolved_on_first_lookup(self):
+        """Test that string entries are imported and cached on first access."""
+        registry = LazyTaskRegistry({"dumps": "json:dumps"})
+        self.assertIsInstance(dict.__getitem__(registry, "dumps"), str)
+
+        self.assertIs(registry["dumps"], json.dumps)
+        self.assertIs(dict.__getitem__(registry, "dumps"), json.dumps)
+        self.assertIs(registry.get("dumps"), json.dumps)
+        self.assertIsNone(registry.get("missing"))
+
+    @patch.dict(TASK_DISPATCHER, {'parse_document': 'tooling.missing_module:parse_document'})
+    def test_import_failure_is_a_task_error(self):
+        """Test that a tool whose module cannot be imported fails with a 500 result."""
+        result = json.loads(execute_research_protocol({"task": "parse_document", "file_content": b""}))
+
+        self.assertEqual(result["status"], 500)
+        self.assertIn("tooling.missing_module", result["error"])
+
+
+class TestAsyncExecutionEngine(unittest.IsolatedAsyncioTestCase):
+
+    async def test_async_matches_sync_result(self):
+        """Test that the async dispatcher returns the same JSON as the sync one."""
+        mock_search = MagicMock(return_value={"status": 200, "data": "search results"})
+        with patch.dict(TASK_DISPATCHER, {'search': mock_search}):
+            constraints = {"task": "search", "query": "test query"}
+            result_json = await execute_research_protocol_async(constraints)
+
+        self.assertEqual(json.loads(result_json), {"status": 200, "data": "search results"})
+        mock_search.assert_called_once_with(query="test query")
+
+    async def test_run_task_async_returns_result_object(self):
+        """Test that the async in-process API returns the tool's own result."""
+        tool_result = {"status": 200}
+        with patch.dict(TASK_DISPATCHER, {'search': MagicMock(return_value=tool_result)}):
+            self.assertIs(await run_task_async({"task": "search", "query": "q"}), tool_result)
+
+    async def test_async_unknown_task(self):
+        """Test that validation errors are reported without dispatching."""
+        result = json.loads(await execute_research_protocol_async({"task": "non_existent_task"}))
+        self.assertEqual(result["status"], 400)
+        self.assertIn("Unknown task", result["error"])
+
+    async def test_coroutine_tool_is_awaited(self):
+        """Test that native coroutine tools are awaited instead of sent to the thread pool."""
+        mock_fetch = AsyncMock(return_value={"status": 200, "content": "page"})
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': mock_fetch}):
+            result = json.loads(await execute_research_protocol_async({"task": "fetch_content", "url": "http://example.com"}))
+
+        mock_fetch.assert_awaited_once_with(url="http://example.com")
+        self.assertEqual(result["content"], "page")
+
+    async def test_async_tool_exception(self):
+        """Test that exceptions from tools are reported as task errors."""
+        with patch.dict(TASK_DISPATCHER, {'search': MagicMock(side_effect=Exception("Tool failed"))}):
+            result = json.loads(await execute_research_protocol_async({"task": "search", "query": "q"}))
+
+        self.assertEqual(result["status"], 500)
+        self.assertIn("Tool failed", result["error"])
+
+
+class TestExecuteMany(unittest.TestCase):
+
+    def test_results_preserve_order_and_run_concurrently(self):
+        """Test that a batch runs in parallel and returns results in input order."""
+        def slow_fetch(url):
+            time.sleep(0.2)
+            return {"status": 200, "content": url}
+
+        constraints_list = [{"task": "fetch_content", "url": f"http://example.com/{i}"} for i in range(5)]
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': slow_fetch}):
+            start = time.monotonic()
+            results = [json.loads(r) for r in execute_many(constraints_list)]
+            elapsed = time.monotonic() - start
+
+        self.assertEqual([r["content"] for r in results], [c["url"] for c in constraints_list])
+        self.assertLess(elapsed, 0.2 * len(constraints_list))
+
+    def test_per_task_concurrency_limit(self):
+        """Test that no more than the configured number of calls run at once."""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def tracked_search(query):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return {"status": 200, "query": query}
+
+        with patch.dict(TASK_DISPATCHER, {'search': tracked_search}), \
+                patch.dict(TASK_CONCURRENCY_LIMITS, {'search': 2}):
+            results = execute_many([{"task": "search", "query": str(i)} for i in range(6)])
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(state["peak"], 2)
+
+    def test_errors_are_isolated(self):
+        """Test that one failing task does not affect the rest of the batch."""
+        def flaky_search(query):
+            if query == "bad":
+                raise Exception("boom")
+            return {"status": 200, "query": query}
+
+        with patch.dict(TASK_DISPATCHER, {'search': flaky_search}):
+            results = [json.loads(r) for r in execute_many([
+                {"task": "search", "query": "good"},
+                {"task": "search", "query": "bad"},
+                {"task": "unknown_task"},
+            ])]
+
+        self.assertEqual(results[0]["status"], 200)
+        self.assertEqual(results[1]["status"], 500)
+        self.assertEqual(results[2]["status"], 400)
+
+
+class TestRateLimitedDispatch(unittest.TestCase):
+
+    def setUp(self):
+        configure_rate_limit_backend(MemoryBackend())
+        self.saved_limit = RATE_LIMITS["content_fetch"]
+        set_rate_limit("content_fetch", 2)
+
+    def tearDown(self):
+        set_rate_limit("content_fetch", self.saved_limit)
+        configure_rate_limit_backend(None)
+
+    def test_batch_is_limited(self):
+        """Test that calls beyond the budget are rejected once the wait would be too long."""
+        fetch = MagicMock(return_value={"status": 200, "content": "page"})
+        constraints_list = [{"task": "fetch_content", "url": f"http://example.com/{i}", "use_cache": False}
+                            for i in range(3)]
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': fetch}), \
+                patch('tooling.lib.ratelimit.RATE_LIMIT_MAX_WAIT', 0.1):
+            results = run_many(constraints_list, rate_limit=True)
+
+        self.assertEqual(sorted(r["status"] for r in results), [200, 200, 429])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_unlimited_by_default(self):
+        fetch = MagicMock(return_value={"status": 200, "content": "page"})
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': fetch}):
+            results = run_many([{"task": "fetch_content", "url": f"http://example.com/{i}", "use_cache": False}
+                                for i in range(3)])
+        self.assertEqual([r["status"] for r in results], [200, 200, 200])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import unittest
+from tooling.import_time_benchmark import parse_importtime, benchmark_import
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        85 |        300 |     encodings.aliases
+import time:       450 |        750 |   encodings
+import time:      1200 |       2100 | tooling.deep_research
+"""
+
+class TestImportTimeBenchmark(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        """Test that -X importtime lines are parsed with their nesting depth."""
+        entries = parse_importtime(SAMPLE_OUTPUT)
+
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(entries[1], {"module": "encodings.aliases", "self_us": 85, "cumulative_us": 300, "depth": 2})
+        self.assertEqual(entries[3]["module"], "tooling.deep_research")
+        self.assertEqual(entries[3]["depth"], 0)
+
+    def test_deep_research_import_stays_lazy(self):
+        """Test that importing the orchestrator does not load any heavy tool dependency."""
+        report = benchmark_import("tooling.deep_research", runs=1)
+
+        self.assertEqual(report["forbidden_loaded"], [])
+        self.assertGreater(report["median_ms"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import time
+from unittest.mock import patch, MagicMock
+
+from tooling.deep_research import TASK_DISPATCHER
+from tooling.pipeline import Pipeline, Stage, Ref, build_research_pipeline, collect_sources
+
+
+class TestPipelineValidation(unittest.TestCase):
+
+    def test_unknown_reference(self):
+        """Test that referencing a missing stage is rejected."""
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", function=lambda x: x, inputs={"x": "missing.value"})])
+
+    def test_duplicate_stage_name(self):
+        """Test that stage names must be unique."""
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", function=lambda: 1), Stage("a", function=lambda: 2)])
+
+    def test_task_or_function_required(self):
+        """Test that a stage must define exactly one of task or function."""
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a")])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", task="search", function=lambda: 1)])
+
+    def test_cycle_detection(self):
+        """Test that dependency cycles are rejected."""
+        with self.assertRaises(ValueError):
+            Pipeline([
+                Stage("a", function=lambda x: x, inputs={"x": "b"}),
+                Stage("b", function=lambda x: x, inputs={"x": "a"}),
+            ])
+
+
+class TestPipelineExecution(unittest.TestCase):
+
+    def test_references_resolve_through_results(self):
+        """Test that inputs resolve dotted paths, list indexes and defaults."""
+        pipeline = Pipeline([
+            Stage("source", function=lambda: {"items": [{"name": "first"}]}),
+            Stage("pick", function=lambda name, missing: (name, missing),
+                  inputs={"name": "source.items.0.name", "missing": Ref("source.nope", "fallback")}),
+        ])
+        outcome = pipeline.run()
+
+        self.assertTrue(outcome.ok)
+        self.assertEqual(outcome.results["pick"], ("first", "fallback"))
+        self.assertEqual(pipeline.order, ["source", "pick"])
+
+    def test_independent_stages_run_in_parallel(self):
+        """Test that stages without mutual dependencies overlap in time."""
+        def slow_search(query):
+            time.sleep(0.2)
+            return {"status": 200, "query": query}
+
+        with patch.dict(TASK_DISPATCHER, {'search': slow_search}):
+            pipeline = Pipeline([
+                Stage("one", task="search", args={"query": "a"}),
+                Stage("two", task="search", args={"query": "b"}),
+                Stage("both", function=lambda a, b: [a["query"], b["query"]], inputs={"a": "one", "b": "two"}),
+            ])
+            start = time.monotonic()
+            outcome = pipeline.run()
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(outcome.results["both"], ["a", "b"])
+        self.assertLess(elapsed, 0.4)
+
+    def test_fan_out_with_limit_and_isolated_errors(self):
+        """Test that for_each runs once per element and keeps per-item errors in place."""
+        def fake_fetch(url):
+            if url.endswith("bad"):
+                return {"error": "Failed to fetch content", "status": 404}
+            return {"content": f"content of {url}", "status": 200}
+
+        with patch.dict(TASK_DISPATCHER, {'fetch_content': fake_fetch}):
+            outcome = Pipeline([
+                Stage("hits", function=lambda: [{"url": "http://a"}, {"url": "http://bad"}, {"url": "http://c"}]),
+                Stage("fetch", task="fetch_content", for_each="hits", limit=2, inputs={"url": "item.url"}),
+            ]).run()
+
+        self.assertTrue(outcome.ok)
+        self.assertEqual(len(outcome.results["fetch"]), 2)
+        self.assertEqual(outcome.results["fetch"][0]["content"], "content of http://a")
+        self.assertEqual(outcome.results["fetch"][1]["status"], 404)
+
+    def test_failed_stage_skips_dependents(self):
+        """Test that an error result fails the stage and skips everything downstream."""
+        downstream = MagicMock()
+        with patch.dict(TASK_DISPATCHER, {'search': MagicMock(return_value={"error": "quota", "status": 500})}):
+            outcome = Pipeline([
+                Stage("search", task="search", args={"query": "q"}),
+                Stage("after", function=downstream, inputs={"hits": "search"}),
+                Stage("independent", function=lambda: "ran"),
+            ]).run()
+
+        self.assertFalse(outcome.ok)
+        self.assertIn("quota", outcome.errors["search"])
+        self.assertIn("Skipped", outcome.errors["after"])
+        self.assertEqual(outcome.results["independent"], "ran")
+        downstream.assert_not_called()
+
+
+class TestResearchPipeline(unittest.TestCase):
+
+    def test_collect_sources(self):
+        """Test that hits are paired with fetched content and failures dropped."""
+        hits = [{"url": "http://a", "name": "A"}, {"url": "http://b", "name": "B"}]
+        pages = [{"content": "text", "status": 200}, {"error": "nope", "status": 500}]
+        self.assertEqual(collect_sources(hits, pages), [{"url": "http://a", "title": "A", "content": "text"}])
+
+    def test_full_workflow(self):
+        """Test the standard research DAG end to end with mocked tools."""
+        tools = {
+            "optimize_research": MagicMock(return_value={"query": "q", "optimizedPrompt": "p", "status": 200}),
+            "search": MagicMock(return_value={"webPages": {"value": [
+                {"url": "http://a", "name": "A"}, {"url": "http://b", "name": "B"},
+            ]}}),
+            "fetch_content": MagicMock(side_effect=lambda url: {"content": url, "status": 200}),
+            "analyze_results": MagicMock(return_value={"rankings": [], "status": 200}),
+            "generate_final_report": MagicMock(return_value={"title": "T", "sections": [], "status": 200}),
+            "download_report": MagicMock(side_effect=lambda report, file_format: {"filename": f"report.{file_format}", "status": 200}),
+        }
+        with patch.dict(TASK_DISPATCHER, tools):
+            outcome = build_research_pipeline("topic", "openai__gpt-4", max_sources=1, file_formats=("docx", "pdf")).run()
+
+        self.assertTrue(outcome.ok, outcome.errors)
+        tools["search"].assert_called_once_with(query="q", provider="google")
+        tools["fetch_content"].assert_called_once_with(url="http://a")
+        self.assertEqual(outcome.results["sources"], [{"url": "http://a", "title": "A", "content": "http://a"}])
+        self.assertEqual(outcome.results["export_pdf"]["filename"], "report.pdf")
+        self.assertEqual(tools["download_report"].call_count, 2)
+
+    def test_near_duplicate_sources_are_analyzed_once(self):
+        """Test that a mirrored article reaches analysis and the report only once."""
+        article = ("Researchers found that the new training method cuts compute cost by half across every benchmark "
+                   "they tested, from image classification to machine translation. The team attributes the savings "
+                   "to a schedule that skips redundant gradient updates early in training, when the model changes "
+                   "quickly, and spends the budget later, when fine distinctions matter. Independent groups have "
+                   "not yet reproduced the results, and the authors caution that very large models may behave "
+                   "differently, but the code and checkpoints have been released for others to evaluate.")
+        pages = {"http://a": article, "http://mirror": article + "Republished with permission.", "http://b": "A different story."}
+        tools = {
+            "optimize_research": MagicMock(return_value={"query": "q", "optimizedPrompt": "p", "status": 200}),
+            "search": MagicMock(return_value={"webPages": {"value": [{"url": url, "name": url} for url in pages]}}),
+            "fetch_content": MagicMock(side_effect=lambda url: {"content": pages[url], "status": 200}),
+            "analyze_results": MagicMock(return_value={"rankings": [], "status": 200}),
+            "generate_final_report": MagicMock(return_value={"title": "T", "sections": [], "status": 200}),
+        }
+        with patch.dict(TASK_DISPATCHER, tools):
+            outcome = build_research_pipeline("topic", "openai__gpt-4", file_formats=()).run()
+
+        self.assertTrue(outcome.ok, outcome.errors)
+        analyzed = tools["analyze_results"].call_args.kwargs["results"]
+        self.assertEqual([doc["url"] for doc in analyzed], ["http://a", "http://b"])
+        self.assertEqual(tools["generate_final_report"].call_args.kwargs["selected_results"], analyzed)
+        self.assertEqual(len(outcome.results["sources"]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import io
+import os
+import socket
+import tempfile
+from unittest.mock import patch
+from tooling.lib import artifacts
+from tooling.lib.artifacts import Artifact, ArtifactStore, publish, get_artifact
+
+class TestArtifact(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data = bytes(range(256)) * 100
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_from_bytes_is_zero_copy(self):
+        """Test that in-memory chunks are views over the original buffer."""
+        artifact = Artifact.from_bytes(self.data, "application/pdf", "report.pdf")
+        chunks = list(artifact.iter_chunks(chunk_size=1000))
+
+        self.assertIsInstance(chunks[0], memoryview)
+        self.assertIs(chunks[0].obj, self.data)
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertEqual(artifact.size, len(self.data))
+
+    def test_write_to_path_and_file(self):
+        """Test streaming to a filesystem path and a binary file object."""
+        artifact = Artifact.from_bytes(self.data)
+        path = os.path.join(self.tmp_dir.name, "out.bin")
+
+        self.assertEqual(artifact.write_to(path), len(self.data))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+        buffer = io.BytesIO()
+        artifact.write_to(buffer, chunk_size=999)
+        self.assertEqual(buffer.getvalue(), self.data)
+
+    def test_write_to_socket(self):
+        """Test streaming to a connected socket from memory and from disk."""
+        for artifact in (Artifact.from_bytes(b"in memory"), self._file_artifact(b"on disk")):
+            sender, receiver = socket.socketpair()
+            with sender, receiver:
+                sent = artifact.write_to(sender)
+                sender.shutdown(socket.SHUT_WR)
+                received = b"".join(iter(lambda: receiver.recv(4096), b""))
+            self.assertEqual(received, artifact.read())
+            self.assertEqual(sent, artifact.size)
+
+    def test_spooled_artifact(self):
+        """Test incremental writes to a spooled artifact that spills to disk."""
+        artifact = Artifact.spooled("text/plain", "log.txt", max_memory=10)
+        artifact.write(b"first ")
+        artifact.write(b"and second")
+
+        self.assertEqual(artifact.size, 16)
+        self.assertEqual(artifact.read(), b"first and second")
+
+    def test_persist_and_handle(self):
+        """Test that persisting switches to a file backing exposed in the handle."""
+        artifact = Artifact.from_bytes(self.data, filename="report.docx")
+        path = artifact.persist(self.tmp_dir.name)
+        handle = artifact.to_json()
+
+        self.assertEqual(handle["path"], path)
+        self.assertEqual(handle["size"], len(self.data))
+        self.assertEqual(artifact.read(), self.data)
+
+    def test_requires_exactly_one_source(self):
+        """Test that an artifact must have exactly one backing."""
+        with self.assertRaises(ValueError):
+            Artifact()
+        with self.assertRaises(ValueError):
+            Artifact(buffer=b"x", path="/tmp/x")
+
+    def _file_artifact(self, data):
+        path = os.path.join(self.tmp_dir.name, "artifact.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+        return Artifact.from_path(path)
+
+
+class TestArtifactStore(unittest.TestCase):
+
+    def test_evicts_oldest_in_memory_artifacts(self):
+        """Test that the store stays within its byte budget."""
+        store = ArtifactStore(max_bytes=10)
+        first = store.put(Artifact.from_bytes(b"123456"))
+        second = store.put(Artifact.from_bytes(b"789012"))
+
+        self.assertIsNone(store.get(first.id))
+        self.assertIs(store.get(second.id), second)
+
+    def test_release(self):
+        """Test that released artifacts can no longer be looked up."""
+        store = ArtifactStore()
+        artifact = store.put(Artifact.from_bytes(b"data"))
+        store.release(artifact.id)
+        self.assertIsNone(store.get(artifact.id))
+        self.assertEqual(len(store), 0)
+
+    def test_closed_artifact(self):
+        """Test that a closed artifact reports that it is closed instead of failing obscurely."""
+        for artifact in (Artifact.from_bytes(b"data"), Artifact.spooled()):
+            artifact.close()
+            self.assertTrue(artifact.closed)
+            for use in (lambda: artifact.size, artifact.read, artifact.to_json, lambda: artifact.write(b"x")):
+                with self.assertRaisesRegex(ValueError, "artifact is closed"):
+                    use()
+
+    def test_publish_to_artifact_dir(self):
+        """Test that publishing writes to the configured directory for other processes."""
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.object(artifacts, "ARTIFACT_DIR", tmp_dir):
+            handle = publish(Artifact.from_bytes(b"shared", filename="report.txt"))
+            self.assertTrue(handle["path"].startswith(tmp_dir))
+            with open(handle["path"], "rb") as f:
+                self.assertEqual(f.read(), b"shared")
+            self.assertEqual(get_artifact(handle["artifact_id"]).read(), b"shared")
+
+if __name__ == '__main__':
+    unittest.main()
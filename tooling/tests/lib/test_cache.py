@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from tooling.lib.cache import ResultCache, cache_key
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_key_is_stable_across_argument_order(self):
+        """Test that canonicalization makes argument order irrelevant."""
+        self.assertEqual(
+            cache_key("search", {"query": "ai", "provider": "google"}),
+            cache_key("search", {"provider": "google", "query": "ai"}),
+        )
+
+    def test_key_depends_on_namespace_and_values(self):
+        """Test that different tasks or arguments produce different keys."""
+        key = cache_key("search", {"query": "ai"})
+        self.assertNotEqual(key, cache_key("fetch_content", {"query": "ai"}))
+        self.assertNotEqual(key, cache_key("search", {"query": "AI"}))
+
+    def test_bytes_arguments_are_hashed(self):
+        """Test that binary arguments are keyed by content."""
+        self.assertEqual(cache_key("parse", {"data": b"abc"}), cache_key("parse", {"data": b"abc"}))
+        self.assertNotEqual(cache_key("parse", {"data": b"abc"}), cache_key("parse", {"data": b"abd"}))
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache", "results.sqlite3")
+        self.cache = ResultCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_set_and_get(self):
+        """Test a round trip and the hit/miss statistics."""
+        self.assertIsNone(self.cache.get("missing", namespace="search"))
+        self.cache.set("k", {"webPages": {"value": [1, 2]}}, ttl=60, namespace="search")
+
+        self.assertEqual(self.cache.get("k", namespace="search"), {"webPages": {"value": [1, 2]}})
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (1, 1, 1))
+        self.assertEqual(stats["namespaces"]["search"]["hits"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        self.cache.set("k", "value", ttl=10)
+        with patch("tooling.lib.cache.time.time", return_value=time.time() + 11):
+            self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_corrupt_entry_is_a_miss(self):
+        """Test that an unreadable entry is dropped and counted as a miss."""
+        self.cache.set("k", "value")
+        with self.cache._conn:
+            self.cache._conn.execute("UPDATE entries SET value = ? WHERE key = ?", (b"\x78\x9c\x00", "k"))
+
+        self.assertEqual(self.cache.get("k", default="fallback"), "fallback")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (0, 1, 0))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResultCache(os.path.join(self.tmp_dir.name, "small.sqlite3"), max_entries=2)
+        with patch("tooling.lib.cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+    def test_survives_restart(self):
+        """Test that entries persist across cache instances."""
+        self.cache.set("k", {"content": "page"})
+        self.cache.close()
+
+        self.cache = ResultCache(self.path)
+        self.assertEqual(self.cache.get("k"), {"content": "page"})
+
+if __name__ == '__main__':
+    unittest.main()
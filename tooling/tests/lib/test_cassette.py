@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, as in cassette.py
+    httpx = None
+
+from tooling.lib.cassette import Cassette, CassetteMiss, RECORD, REPLAY, REDACTED
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _respond(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/binary"):
+            self._respond(bytes(range(256)), "application/octet-stream")
+        else:
+            self._respond(f"hello {self.path.split('?')[0]}".encode(), "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self._respond(b'{"echo": ' + body + b'}', "application/json")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cassette.json")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def _record(self):
+        with Cassette(self.path, RECORD) as cassette:
+            requests.get(f"{self.url}/page", params={"q": "x", "key": "secret"},
+                         headers={"Authorization": "Bearer secret"}, timeout=5)
+            requests.post(f"{self.url}/api", json={"a": 1}, timeout=5)
+            requests.get(f"{self.url}/binary", timeout=5)
+        self.server.shutdown()
+        return cassette
+
+    def test_record_then_replay_without_network(self):
+        self.assertEqual(self._record().stats()["interactions"], 3)
+
+        with Cassette(self.path, REPLAY) as cassette:
+            page = requests.get(f"{self.url}/page", params={"key": "other", "q": "x"}, timeout=5)
+            echo = requests.post(f"{self.url}/api", json={"a": 1}, timeout=5)
+            binary = requests.get(f"{self.url}/binary", timeout=5)
+
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page.text, "hello /page")
+        self.assertEqual(echo.json(), {"echo": {"a": 1}})
+        self.assertEqual(binary.content, bytes(range(256)))
+        self.assertEqual(cassette.stats()["replayed"], 3)
+
+    def test_credentials_are_not_recorded(self):
+        self._record()
+        with open(self.path, encoding="utf-8") as f:
+            raw = f.read()
+        self.assertNotIn("secret", raw)
+        self.assertIn(f"key={REDACTED}", json.loads(raw)["interactions"][0]["request"]["url"])
+
+    def test_unknown_request_fails_like_a_connection_error(self):
+        self._record()
+        with Cassette(self.path, REPLAY) as cassette:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                requests.post(f"{self.url}/api", json={"a": 2}, timeout=5)
+        self.assertEqual(cassette.misses, 1)
+
+    def test_synthetic_and_recorded_latency(self):
+        self._record()
+        with Cassette(self.path, REPLAY, latency=0.1):
+            start = time.monotonic()
+            requests.get(f"{self.url}/binary", timeout=5)
+            self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+        cassette = Cassette(self.path, REPLAY, latency="recorded")
+        interaction = cassette.interactions[0]
+        self.assertEqual(cassette._delay(interaction), interaction["elapsed"])
+
+    def test_patches_are_removed_on_exit(self):
+        original = requests.Session.send
+        with Cassette(self.path, RECORD):
+            self.assertIsNot(requests.Session.send, original)
+        self.assertIs(requests.Session.send, original)
+
+    @unittest.skipUnless(httpx, "httpx is not installed")
+    def test_httpx_clients_are_recorded_and_replayed(self):
+        with Cassette(self.path, RECORD):
+            with httpx.Client() as client:
+                client.post(f"{self.url}/api", json={"prompt": "hi"})
+        self.server.shutdown()
+
+        async def replay_async():
+            async with httpx.AsyncClient() as client:
+                return await client.post(f"{self.url}/api", json={"prompt": "hi"})
+
+        with Cassette(self.path, REPLAY):
+            with httpx.Client() as client:
+                sync_response = client.post(f"{self.url}/api", json={"prompt": "hi"})
+                with self.assertRaises(httpx.ConnectError):
+                    client.get(f"{self.url}/missing")
+            async_response = asyncio.run(replay_async())
+
+        self.assertEqual(sync_response.json(), {"echo": {"prompt": "hi"}})
+        self.assertEqual(async_response.json(), {"echo": {"prompt": "hi"}})
+
+    def test_cassette_miss_is_a_lookup_error(self):
+        self._record()
+        with self.assertRaises(CassetteMiss):
+            Cassette(self.path, REPLAY)._next("GET", f"{self.url}/nowhere", None)
+
+
+if __name__ == '__main__':
+    unittest.main()
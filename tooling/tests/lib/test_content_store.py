@@ -0,0 +1,61 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from tooling.lib.content_store import ContentStore, conditional_headers, ttl_from_headers
+
+class TestContentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ContentStore(os.path.join(self.tmp_dir.name, "content.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_round_trip_by_normalized_url(self):
+        """Test that a page stored under one spelling of a URL is found under another."""
+        self.store.put("https://Example.com/a?utm_source=x#top", "page", etag='"v1"')
+        entry = self.store.get("https://example.com/a")
+        self.assertEqual(entry["content"], "page")
+        self.assertEqual(entry["etag"], '"v1"')
+        self.assertTrue(entry["fresh"])
+        self.assertIsNone(self.store.get("https://example.com/a", mode="direct"))
+
+    def test_expired_page_is_kept_only_with_validators(self):
+        self.store.put("https://a.com", "a", ttl=-1, last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+        self.store.put("https://b.com", "b", ttl=-1)
+        entry = self.store.get("https://a.com")
+        self.assertFalse(entry["fresh"])
+        self.assertEqual(conditional_headers(entry), {"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        self.assertIsNone(self.store.get("https://b.com"))
+        self.assertEqual(self.store.stats()["pages"], 1)
+
+    def test_revalidation_extends_lifetime(self):
+        self.store.put("https://a.com", "a", ttl=-1, etag='"v1"')
+        self.store.revalidated("https://a.com", ttl=60)
+        entry = self.store.get("https://a.com")
+        self.assertTrue(entry["fresh"])
+        self.assertEqual(entry["etag"], '"v1"')
+
+    def test_evicts_least_recently_used_beyond_size_limit(self):
+        now = time.time()
+        with patch("tooling.lib.content_store.time.time", side_effect=[now - 3, now - 2, now - 1]):
+            self.store.put("https://a.com", "a" * 1000)
+            self.store.put("https://b.com", "b" * 1000)
+            self.store.get("https://a.com")  # a is now more recently used than b
+        self.store.max_bytes = self.store.stats()["bytes"]
+        self.store.put("https://c.com", "c" * 1000)
+        self.assertIsNone(self.store.get("https://b.com"))
+        self.assertIsNotNone(self.store.get("https://a.com"))
+        self.assertEqual(self.store.stats()["evictions"], 1)
+
+    def test_ttl_from_headers(self):
+        self.assertEqual(ttl_from_headers({"Cache-Control": "public, max-age=600"}, default=5), 600)
+        self.assertEqual(ttl_from_headers({}, default=5), 5)
+        self.assertIsNone(ttl_from_headers({"Cache-Control": "no-store"}))
+
+if __name__ == '__main__':
+    unittest.main()
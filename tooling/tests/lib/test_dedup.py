@@ -0,0 +1,61 @@
+import unittest
+import random
+from unittest.mock import patch
+from tooling.lib import dedup
+from tooling.lib.dedup import dedup_documents, near_duplicates, simhash
+
+ARTICLE = (
+    "The central bank raised interest rates by a quarter point on Wednesday, citing persistent inflation in "
+    "services and a labor market that remains tight despite slowing job growth. Policymakers signalled that "
+    "further increases were possible if price pressures failed to ease over the coming months, although two "
+    "members of the committee voted to hold rates steady. Markets had largely expected the move, and bond "
+    "yields rose modestly after the announcement while equities ended the session little changed. Analysts "
+    "said the statement placed more weight on wage growth than in previous meetings, suggesting officials "
+    "remain concerned that higher pay could keep core inflation elevated. The governor told reporters that "
+    "the economy had proved more resilient than forecast, with consumer spending holding up and business "
+    "investment recovering in the second quarter. Mortgage lenders are expected to pass the increase on to "
+    "borrowers within days, adding to pressure on households that refinanced at low fixed rates several "
+    "years ago and now face substantially higher monthly payments."
+)
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def test_copies_and_mirrors_are_grouped(self):
+        texts = [
+            ARTICLE,
+            "A completely unrelated piece about gardening, soil quality and when to plant tomatoes in spring.",
+            ARTICLE + "This article originally appeared on another site.",
+            ARTICLE,
+            "",
+        ]
+        self.assertEqual(near_duplicates(texts), {2: 0, 3: 0})
+
+    def test_threshold_is_tunable(self):
+        rewritten = ARTICLE.replace("Wednesday", "Thursday").replace("quarter point", "half point")
+        self.assertEqual(near_duplicates([ARTICLE, rewritten], threshold=1.0), {})
+        self.assertEqual(near_duplicates([ARTICLE, rewritten], threshold=0.5), {1: 0})
+        with self.assertRaises(ValueError):
+            near_duplicates([ARTICLE], threshold=0)
+
+    def test_vectorized_and_fallback_fingerprints_agree(self):
+        if dedup.np is None:
+            self.skipTest("numpy is not installed")
+        fingerprint = simhash(ARTICLE)
+        with patch.object(dedup, "np", None):
+            self.assertEqual(simhash(ARTICLE), fingerprint)
+
+    def test_scales_to_thousands_of_documents(self):
+        rng = random.Random(7)
+        words = [f"word{i}" for i in range(3000)]
+        texts = [" ".join(rng.choices(words, k=150)) for _ in range(2000)]
+        texts += [text + " shared footer" for text in texts[:50]]
+        duplicates = near_duplicates(texts)
+        self.assertEqual(duplicates, {2000 + i: i for i in range(50)})
+
+    def test_dedup_documents_keeps_first_copy(self):
+        docs = [{"url": "https://a.com", "content": ARTICLE}, {"url": "https://b.com"},
+                {"url": "https://mirror.com", "content": ARTICLE}]
+        self.assertEqual([doc["url"] for doc in dedup_documents(docs)], ["https://a.com", "https://b.com"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from tooling.lib.extract import extract, extract_async, extract_markdown, looks_like_html, configure_extraction_executor
+
+ARTICLE = """<!doctype html><html><head><title>The Story &amp; More</title><script>track();</script></head>
+<body>
+<header><nav><a href="/">Home</a> <a href="/about">About</a></nav></header>
+<div class="sidebar"><p>Subscribe to our newsletter for the best stories, delivered every single week.</p></div>
+<article class="post">
+  <h1>The Story</h1>
+  <p>Researchers found that, in most cases, the approach works well, and it scales to large inputs.
+     <a href="/paper">Read the paper</a> for details.</p>
+  <p>A second paragraph with <strong>bold</strong> text, <em>emphasis</em> and <code>inline()</code> code.
+  <p>An unclosed paragraph that is long enough to count as part of the article body.
+  <ul><li>First point</li><li>Second point<ul><li>Nested point</li></ul></li></ul>
+  <pre>def f():
+    return 1</pre>
+  <table><tr><th>Name</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr></table>
+</article>
+<footer><p>Copyright 2024, all rights reserved, by the company that publishes this site.</p></footer>
+</body></html>"""
+
+class TestExtractMarkdown(unittest.TestCase):
+
+    def test_keeps_main_content_and_drops_boilerplate(self):
+        page = extract_markdown(ARTICLE, "https://example.com/post/1")
+        self.assertEqual(page["title"], "The Story & More")
+        content = page["content"]
+        self.assertTrue(content.startswith("# The Story"))
+        self.assertIn("An unclosed paragraph", content)
+        for boilerplate in ("Home", "newsletter", "Copyright", "track()"):
+            self.assertNotIn(boilerplate, content)
+
+    def test_renders_markdown(self):
+        content = extract_markdown(ARTICLE, "https://example.com/post/1")["content"]
+        self.assertIn("[Read the paper](https://example.com/paper)", content)
+        self.assertIn("**bold**", content)
+        self.assertIn("`inline()`", content)
+        self.assertIn("- First point\n- Second point\n   - Nested point", content)
+        self.assertIn("```\ndef f():\n    return 1\n```", content)
+        self.assertIn("| Name | Value |\n| --- | --- |\n| a | 1 |", content)
+
+    def test_link_heavy_blocks_lose_to_prose(self):
+        links = "".join(f'<p><a href="/{i}">Another related article number {i}, worth reading</a></p>' for i in range(10))
+        html = (f'<body><div id="links">{links}</div>'
+                '<div id="story"><p>The actual story, with enough words in it, goes here, and continues.</p></div></body>')
+        content = extract_markdown(html)["content"]
+        self.assertIn("The actual story", content)
+        self.assertNotIn("related article", content)
+
+    def test_untitled_page_uses_first_heading(self):
+        self.assertEqual(extract_markdown("<body><h1>Heading</h1><p>text</p></body>")["title"], "Heading")
+
+    def test_looks_like_html(self):
+        self.assertTrue(looks_like_html(ARTICLE))
+        self.assertFalse(looks_like_html("# Markdown\n\nSome <b>inline</b> text."))
+        self.assertFalse(looks_like_html('{"key": "value"}'))
+
+class TestExtractionPool(unittest.TestCase):
+
+    def tearDown(self):
+        configure_extraction_executor(None)
+
+    def test_large_pages_are_extracted_in_the_pool(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        configure_extraction_executor(executor)
+        large = ARTICLE.replace("<h1>", "<p>" + "filler, text " * 2000 + "</p><h1>")
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            self.assertEqual(extract(large)["title"], "The Story & More")
+            extract(ARTICLE)
+        submit.assert_called_once()
+        executor.shutdown()
+
+    def test_async_extraction(self):
+        page = asyncio.run(extract_async(ARTICLE, "https://example.com"))
+        self.assertEqual(page, extract_markdown(ARTICLE, "https://example.com"))
+
+if __name__ == '__main__':
+    unittest.main()
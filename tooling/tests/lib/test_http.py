@@ -0,0 +1,77 @@
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tooling.lib.http import HostPoolAdapter, configure_session, create_session, get_session, pool_stats
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        _KeepAliveHandler.connections.add(self.client_address)
+        body = b"pooled response"
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledSession(unittest.TestCase):
+
+    def setUp(self):
+        _KeepAliveHandler.connections = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        configure_session(None)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        session = create_session()
+        for _ in range(5):
+            self.assertEqual(session.get(self.url, timeout=5).text, "pooled response")
+        self.assertEqual(len(_KeepAliveHandler.connections), 1)
+        session.close()
+
+    def test_gzip_is_requested_and_decoded(self):
+        session = create_session()
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+        response = session.get(self.url, timeout=5)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.content, b"pooled response")
+        session.close()
+
+    def test_pool_size_is_chosen_per_host(self):
+        configure_session(create_session(host_pool_sizes={"127.0.0.1": 3}, default_pool_size=7))
+        for _ in range(3):
+            get_session().get(self.url, timeout=5)
+        stats = pool_stats()
+        self.assertEqual(len(stats), 1)
+        (pool,) = stats.values()
+        self.assertEqual(pool["maxsize"], 3)
+        self.assertEqual((pool["connections_opened"], pool["requests"]), (1, 3))
+
+    def test_shared_session_is_created_once(self):
+        configure_session(None)
+        session = get_session()
+        self.assertIs(get_session(), session)
+        self.assertIsInstance(session.get_adapter("https://r.jina.ai/"), HostPoolAdapter)
+
+
+if __name__ == '__main__':
+    unittest.main()
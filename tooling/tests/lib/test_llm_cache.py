@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from tooling.lib import llm_cache
+from tooling.lib.cache import ResultCache
+from tooling.lib.llm_cache import configure_llm_cache, is_cacheable, llm_cache_key, llm_cache_stats
+from tooling.lib.remote_helpers import PLATFORMS, configure_client, generate_with_model, register_platform
+
+class TestLLMCacheKey(unittest.TestCase):
+
+    def test_key_covers_platform_model_prompt_and_sampling(self):
+        key = llm_cache_key("openai", "gpt-4o", "prompt", {})
+        self.assertEqual(key, llm_cache_key("openai", "gpt-4o", "prompt", {}))
+        self.assertNotEqual(key, llm_cache_key("openrouter", "gpt-4o", "prompt", {}))
+        self.assertNotEqual(key, llm_cache_key("openai", "gpt-4o-mini", "prompt", {}))
+        self.assertNotEqual(key, llm_cache_key("openai", "gpt-4o", "prompt!", {}))
+        self.assertNotEqual(key, llm_cache_key("openai", "gpt-4o", "prompt", {"temperature": 0}))
+
+    def test_non_deterministic_settings_are_not_cacheable(self):
+        self.assertTrue(is_cacheable({"temperature": 0}))
+        self.assertFalse(is_cacheable({"temperature": 0.9}), "sampled output is not reused by default")
+        self.assertFalse(is_cacheable({}), "the provider's default temperature samples")
+        self.assertFalse(is_cacheable(None))
+        self.assertFalse(is_cacheable({"temperature": 0, "n": 3}))
+        self.assertTrue(is_cacheable({"temperature": 0.9}, max_temperature=1.0))
+        self.assertTrue(is_cacheable({}, max_temperature=1.0))
+        self.assertFalse(is_cacheable({"temperature": 1.5}, max_temperature=1.0))
+
+class TestCachedGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.dir.name, "llm.sqlite3"))
+        configure_llm_cache(self.cache)
+        self.generate = MagicMock(side_effect=lambda client, prompt, model: f"{model}:{prompt}")
+
+    def tearDown(self):
+        configure_llm_cache(None)
+        PLATFORMS.pop("echo", None)
+        self.cache.close()
+        self.dir.cleanup()
+
+    def test_repeated_prompt_is_answered_from_the_cache(self):
+        register_platform("echo", MagicMock, self.generate, {"temperature": 0})
+        self.assertEqual(generate_with_model("hi", "echo__v1"), "v1:hi")
+        self.assertEqual(generate_with_model("hi", "echo__v1"), "v1:hi")
+        self.assertEqual(self.generate.call_count, 1)
+
+        generate_with_model("hi", "echo__v2")
+        generate_with_model("hello", "echo__v1")
+        self.assertEqual(self.generate.call_count, 3)
+        self.assertEqual(llm_cache_stats()["namespaces"]["llm_echo"]["hits"], 1)
+
+    def test_cache_survives_a_new_cache_instance(self):
+        register_platform("echo", MagicMock, self.generate, {"temperature": 0})
+        generate_with_model("hi", "echo__v1")
+        configure_llm_cache(ResultCache(self.cache.path))
+        self.assertEqual(generate_with_model("hi", "echo__v1"), "v1:hi")
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_bypass(self):
+        register_platform("echo", MagicMock, self.generate)
+        generate_with_model("hi", "echo__v1")
+        generate_with_model("hi", "echo__v1")
+        self.assertEqual(self.generate.call_count, 2, "unknown sampling parameters are never cached")
+
+        register_platform("echo", MagicMock, self.generate, {"temperature": 2})
+        generate_with_model("hi", "echo__v1")
+        generate_with_model("hi", "echo__v1")
+        self.assertEqual(self.generate.call_count, 4)
+
+        register_platform("echo", MagicMock, self.generate, {"temperature": 0})
+        generate_with_model("hi", "echo__v1", use_cache=False)
+        generate_with_model("hi", "echo__v1", use_cache=False)
+        self.assertEqual(self.generate.call_count, 6)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_sampled_platforms_are_cached_only_on_request(self):
+        client = MagicMock()
+        client.messages.create.return_value = MagicMock(content=[MagicMock(text="a")])
+        configure_client("anthropic", client)
+        try:
+            generate_with_model("p", "anthropic__claude-3-5-sonnet-latest")
+            generate_with_model("p", "anthropic__claude-3-5-sonnet-latest")
+            self.assertEqual(client.messages.create.call_count, 2, "temperature 0.9 samples a new answer")
+            with patch.object(llm_cache, "MAX_CACHED_TEMPERATURE", 1.0):
+                generate_with_model("p", "anthropic__claude-3-5-sonnet-latest")
+                generate_with_model("p", "anthropic__claude-3-5-sonnet-latest")
+            self.assertEqual(client.messages.create.call_count, 3)
+        finally:
+            configure_client("anthropic", None)
+
+    @patch.object(llm_cache, "MAX_CACHED_TEMPERATURE", 1.0)
+    def test_failures_are_not_cached(self):
+        client = MagicMock()
+        client.messages.create.side_effect = [RuntimeError("overloaded"), MagicMock(content=[MagicMock(text="a")])]
+        configure_client("anthropic", client)
+        try:
+            with self.assertRaises(RuntimeError):
+                generate_with_model("p", "anthropic__claude-3-5-sonnet-latest")
+            self.assertEqual(generate_with_model("p", "anthropic__claude-3-5-sonnet-latest"), "a")
+            self.assertEqual(generate_with_model("p", "anthropic__claude-3-5-sonnet-latest"), "a")
+            self.assertEqual(client.messages.create.call_count, 2)
+        finally:
+            configure_client("anthropic", None)
+
+if __name__ == '__main__':
+    unittest.main()
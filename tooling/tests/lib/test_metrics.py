@@ -0,0 +1,76 @@
+import json
+import unittest
+
+from tooling.lib.metrics import Histogram, MetricsRegistry, payload_size
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe_and_quantile(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.cumulative(), [2, 3, 4])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
+        self.assertAlmostEqual(histogram.sum, 5.6)
+
+    def test_empty_quantile(self):
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry("test_task", "task", buckets=(0.1, 1.0))
+        self.registry.record_call("search", 0.05, status=200, request_bytes=10, response_bytes=200)
+        self.registry.record_call("search", 0.5, status=500, error=True, request_bytes=10)
+        self.registry.record_call("fetch", 2.0, error=True)
+        self.registry.record_cache("search", hit=True)
+        self.registry.record_cache("search", hit=False)
+
+    def test_snapshot_is_json_serializable(self):
+        snapshot = json.loads(json.dumps(self.registry.snapshot(), allow_nan=False))
+        search = snapshot["search"]
+        self.assertEqual(search["calls"], 2)
+        self.assertEqual(search["errors"], {"500": 1})
+        self.assertEqual(search["request_bytes"], 20)
+        self.assertEqual(search["response_bytes"], 200)
+        self.assertEqual((search["cache_hits"], search["cache_misses"]), (1, 1))
+        self.assertEqual(search["latency_seconds"]["buckets"], {"0.1": 1, "1.0": 2, "+Inf": 2})
+        self.assertEqual(snapshot["fetch"]["errors"], {"exception": 1})
+        self.assertEqual(search["latency_seconds"]["p50"], 0.1)
+        self.assertEqual(snapshot["fetch"]["latency_seconds"]["p99"], "+Inf", "slower than the last bucket")
+
+    def test_prometheus_text(self):
+        lines = self.registry.prometheus_lines()
+        self.assertIn("# TYPE test_task_latency_seconds histogram", lines)
+        self.assertIn('test_task_calls_total{task="search"} 2', lines)
+        self.assertIn('test_task_errors_total{task="search",status="500"} 1', lines)
+        self.assertIn('test_task_latency_seconds_bucket{task="fetch",le="+Inf"} 1', lines)
+        self.assertIn('test_task_latency_seconds_count{task="search"} 2', lines)
+        self.assertIn('test_task_cache_hits_total{task="search"} 1', lines)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry("x", "task")
+        registry.record_call('a"b', 0.1)
+        self.assertIn('x_calls_total{task="a\\"b"} 1', registry.prometheus_lines())
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry("x", "task")
+        registry.enabled = False
+        registry.record_call("search", 0.1)
+        self.assertEqual(registry.snapshot(), {})
+
+
+class TestPayloadSize(unittest.TestCase):
+
+    def test_nested_payload(self):
+        payload = {"a": "abc", "b": [b"12", {"c": "d"}], "n": 5, "m": memoryview(b"xyz")}
+        self.assertEqual(payload_size(payload), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
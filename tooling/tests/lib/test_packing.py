@@ -0,0 +1,70 @@
+import unittest
+from tooling.lib.packing import (
+    DROPPED_MARKER, TRUNCATION_MARKER, context_limit, estimate_tokens, pack_documents, source_budget,
+)
+from tooling.lib.records import FetchedDocument
+
+PARAGRAPH = "Solar output rose sharply this year. Grid operators added storage to smooth the evening peak.\n\n"
+
+class TestEstimates(unittest.TestCase):
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens(None), 0)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+        self.assertEqual(estimate_tokens("abcd日本語"), 4)
+
+    def test_context_limits(self):
+        self.assertEqual(context_limit("openai__gpt-4o-mini"), 128_000)
+        self.assertEqual(context_limit("openai__gpt-4"), 8_192)
+        self.assertEqual(context_limit("openrouter__anthropic/claude-3.5-sonnet"), 200_000)
+        self.assertEqual(context_limit("openrouter__meta-llama/llama-3.1-70b-instruct"), 131_072)
+        self.assertEqual(context_limit("deepseek__chat"), 64_000)
+        self.assertEqual(context_limit("google__gemini-exp"), 1_048_576)
+
+    def test_source_budget_leaves_room_for_the_response(self):
+        self.assertLess(source_budget("openai__gpt-4", 500), 8_192 - 2_048 - 500)
+        self.assertEqual(source_budget("openai__gpt-4", 10_000), 0)
+
+class TestPackDocuments(unittest.TestCase):
+
+    def test_documents_that_fit_are_unchanged(self):
+        documents = [{"url": "a", "content": PARAGRAPH}, FetchedDocument(url="b", content=PARAGRAPH)]
+        packed, report = pack_documents(documents, 10_000)
+        self.assertIsNone(report)
+        self.assertIs(packed[1], documents[1])
+
+    def test_long_documents_share_the_budget(self):
+        documents = [
+            {"url": "short", "content": PARAGRAPH},
+            {"url": "long", "content": PARAGRAPH * 200},
+            {"url": "longer", "content": PARAGRAPH * 400},
+        ]
+        packed, report = pack_documents(documents, 2_000)
+
+        self.assertEqual(packed[0], documents[0])
+        self.assertEqual([entry["url"] for entry in report["truncated"]], ["long", "longer"])
+        self.assertEqual(report["dropped"], [])
+        self.assertLessEqual(report["tokens"], 2_000)
+        self.assertEqual(packed[1]["content"], packed[2]["content"], "both get the same share")
+        self.assertTrue(packed[1]["content"].endswith("evening peak." + TRUNCATION_MARKER))
+        self.assertEqual(len(documents[2]["content"]), len(PARAGRAPH) * 400)
+
+    def test_lowest_value_content_is_dropped(self):
+        documents = [{"url": f"u{i}", "content": PARAGRAPH * 50, "score": score}
+                     for i, score in enumerate([0.2, 0.9, 0.5, 0.1, 0.7])]
+        packed, report = pack_documents(documents, 900)
+
+        self.assertEqual([entry["url"] for entry in report["dropped"]], ["u0", "u3"])
+        self.assertEqual(packed[3]["content"], DROPPED_MARKER)
+        self.assertEqual(packed[3]["url"], "u3")
+        self.assertEqual(len(packed), 5)
+        self.assertLessEqual(report["tokens"], 900)
+
+    def test_nothing_fits(self):
+        packed, report = pack_documents([{"url": "a", "content": PARAGRAPH * 10}], 20)
+        self.assertEqual(packed[0]["content"], DROPPED_MARKER)
+        self.assertEqual(len(report["dropped"]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
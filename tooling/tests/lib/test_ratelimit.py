@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from tooling.lib.ratelimit import (
+    RateLimiter, MemoryBackend, SQLiteBackend, backend_from_url, configure_rate_limit_backend,
+    get_limiter, set_rate_limit, RATE_LIMITS, PROVIDER_RATE_LIMITS, TOKEN_BUCKET,
+)
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_sliding_window_limit(self):
+        """Test that the sliding window allows `limit` calls and then reports a wait."""
+        limiter = RateLimiter(3, window=60)
+        self.assertTrue(all(limiter.try_acquire()[0] for _ in range(3)))
+        allowed, retry_after = limiter.try_acquire()
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 60)
+
+    def test_sliding_window_weights_previous_window(self):
+        """Test that calls from the previous window still count while it overlaps."""
+        limiter = RateLimiter(4, window=10)
+        with patch('tooling.lib.ratelimit.time.time', return_value=1009.0):
+            for _ in range(4):
+                self.assertTrue(limiter.try_acquire()[0])
+        # A quarter into the next window, 3 of the previous 4 calls still count.
+        with patch('tooling.lib.ratelimit.time.time', return_value=1012.5):
+            self.assertTrue(limiter.try_acquire()[0])
+            self.assertFalse(limiter.try_acquire()[0])
+
+    def test_token_bucket_refills(self):
+        """Test that the token bucket allows bursts and refills at the configured rate."""
+        limiter = RateLimiter(10, window=1, algorithm=TOKEN_BUCKET, burst=2)
+        self.assertTrue(limiter.try_acquire()[0])
+        self.assertTrue(limiter.try_acquire()[0])
+        allowed, retry_after = limiter.try_acquire()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.1, delta=0.01)
+        self.assertTrue(limiter.acquire(timeout=1))
+
+    def test_keys_are_independent(self):
+        limiter = RateLimiter(1, window=60)
+        self.assertTrue(limiter.try_acquire("a")[0])
+        self.assertTrue(limiter.try_acquire("b")[0])
+        self.assertFalse(limiter.try_acquire("a")[0])
+
+    def test_acquire_gives_up_after_timeout(self):
+        limiter = RateLimiter(1, window=60)
+        self.assertTrue(limiter.acquire())
+        start = time.monotonic()
+        self.assertFalse(limiter.acquire(timeout=0.1))
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_acquire_async_waits(self):
+        limiter = RateLimiter(20, window=1, algorithm=TOKEN_BUCKET, burst=1)
+
+        async def acquire_twice():
+            return [await limiter.acquire_async(timeout=1) for _ in range(2)]
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(acquire_twice()), [True, True])
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+        with self.assertRaises(ValueError):
+            RateLimiter(1, algorithm="leaky")
+
+
+class TestBackends(unittest.TestCase):
+
+    def test_sqlite_backend_is_shared(self):
+        """Test that two limiters on the same SQLite file share one budget."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "limits.sqlite3")
+            first, second = SQLiteBackend(path), SQLiteBackend(path)
+            try:
+                limiter_a = RateLimiter(2, window=60, backend=first, name="search")
+                limiter_b = RateLimiter(2, window=60, backend=second, name="search")
+                self.assertTrue(limiter_a.try_acquire()[0])
+                self.assertTrue(limiter_b.try_acquire()[0])
+                self.assertFalse(limiter_a.try_acquire()[0])
+            finally:
+                first.close()
+                second.close()
+
+    def test_shared_backend_is_not_updated_on_the_event_loop(self):
+        """Test that acquire_async does not block the loop on a slow shared backend."""
+        class SlowBackend:
+            def __init__(self):
+                self.inner = MemoryBackend()
+                self.threads = []
+
+            def update(self, key, transition, ttl):
+                self.threads.append(threading.current_thread())
+                time.sleep(0.1)
+                return self.inner.update(key, transition, ttl)
+
+        backend = SlowBackend()
+        limiter = RateLimiter(10, window=60, backend=backend)
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(limiter.acquire_async(), tick())
+
+        asyncio.run(run())
+        self.assertNotIn(threading.main_thread(), backend.threads)
+        self.assertLess(ticks[-1] - ticks[0], 0.09, "the loop kept running during the backend update")
+
+    def test_backend_from_url(self):
+        self.assertIsInstance(backend_from_url(None), MemoryBackend)
+        self.assertIsInstance(backend_from_url("memory"), MemoryBackend)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backend = backend_from_url(f"sqlite:///{tmp_dir}/limits.sqlite3")
+            self.assertIsInstance(backend, SQLiteBackend)
+            backend.close()
+        with self.assertRaises(ValueError):
+            backend_from_url("memcached://localhost")
+
+
+class TestSharedLimiters(unittest.TestCase):
+
+    def setUp(self):
+        configure_rate_limit_backend(MemoryBackend())
+        self.saved_limits = dict(RATE_LIMITS)
+
+    def tearDown(self):
+        RATE_LIMITS.clear()
+        RATE_LIMITS.update(self.saved_limits)
+        PROVIDER_RATE_LIMITS.clear()
+        configure_rate_limit_backend(None)
+
+    def test_limits_follow_the_web_app(self):
+        self.assertEqual(get_limiter("search").limit, 10)
+        self.assertEqual(get_limiter("report_generation").limit, 5)
+        self.assertIs(get_limiter("search", "exa"), get_limiter("search", "exa"))
+
+    def test_set_rate_limit_per_provider(self):
+        set_rate_limit("search", 30, provider="exa")
+        self.assertEqual(get_limiter("search", "exa").limit, 30)
+        self.assertEqual(get_limiter("search", "google").limit, 10)
+        set_rate_limit("search", 2)
+        self.assertEqual(get_limiter("search", "google").limit, 2)
+        self.assertEqual(get_limiter("search", "exa").limit, 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import pickle
+from tooling.lib.cache import cache_key
+from tooling.lib.metrics import payload_size
+from tooling.lib.records import (
+    SearchHit, FetchedDocument, Ranking, ReportSection, hits_from_result, hits_to_result, to_dicts,
+)
+from tooling.lib.serialization import encode_json, iter_json
+
+class TestRecords(unittest.TestCase):
+
+    HIT = {"id": "1", "url": "https://a.com", "name": "A", "snippet": "about a", "displayUrl": "a.com",
+           "deepLinks": [{"name": "Docs", "url": "https://a.com/docs"}]}
+
+    def test_round_trip(self):
+        """Test that a dict survives conversion to a record and back, including unknown keys."""
+        hit = SearchHit.from_dict(self.HIT)
+        self.assertEqual(hit.url, "https://a.com")
+        self.assertEqual(hit.displayUrl, "a.com", "common Bing fields have their own slots")
+        self.assertEqual(hit.extra, {"deepLinks": [{"name": "Docs", "url": "https://a.com/docs"}]})
+        self.assertEqual(hit.to_dict(), self.HIT)
+        self.assertIs(SearchHit.from_dict(hit), hit)
+
+    def test_mapping_access(self):
+        """Test that records can be read like the dicts they replace."""
+        hit = SearchHit.from_dict(self.HIT)
+        self.assertEqual(hit["name"], "A")
+        self.assertEqual(hit.get("displayUrl"), "a.com")
+        self.assertIsNone(hit.get("rank"))
+        self.assertNotIn("rank", hit)
+        hit.rank = 3
+        self.assertEqual(hit["rank"], 3)
+        self.assertEqual({**hit}["rank"], 3)
+        self.assertEqual(hit, {**self.HIT, "rank": 3})
+        with self.assertRaises(KeyError):
+            hit["missing"]
+
+    def test_records_have_no_instance_dict(self):
+        for record in (SearchHit(), FetchedDocument(), Ranking(), ReportSection()):
+            self.assertFalse(hasattr(record, "__dict__"), type(record).__name__)
+
+    def test_edges_convert_to_dicts(self):
+        """Test that JSON encoding, cache keys and size estimates treat records as their dicts."""
+        doc = FetchedDocument(url="https://a.com", title="A", content="text")
+        as_dict = {"url": "https://a.com", "title": "A", "content": "text"}
+        self.assertEqual(json.loads(encode_json({"results": [doc]})), {"results": [as_dict]})
+        self.assertEqual(json.loads("".join(iter_json([doc]))), [as_dict])
+        self.assertEqual(cache_key("t", {"results": [doc]}), cache_key("t", {"results": [as_dict]}))
+        self.assertEqual(payload_size(doc), payload_size(as_dict))
+        self.assertEqual(pickle.loads(pickle.dumps(doc)), doc)
+
+    def test_result_helpers(self):
+        result = {"webPages": {"value": [self.HIT, {"url": "https://b.com"}]}}
+        hits = hits_from_result(result)
+        self.assertEqual([hit.url for hit in hits], ["https://a.com", "https://b.com"])
+        self.assertEqual(hits_to_result(hits)["webPages"]["value"][0], self.HIT)
+        self.assertEqual(to_dicts([Ranking(url="u", score=0.5, reasoning="r"), {"url": "v"}]),
+                         [{"url": "u", "score": 0.5, "reasoning": "r"}, {"url": "v"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from tooling.lib import remote_helpers
+from tooling.lib.remote_helpers import (
+    PLATFORMS, configure_client, extract_and_parse_json, generate_with_model, get_client, register_platform,
+)
+
+def chat_completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class TestPlatformRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        for platform in PLATFORMS:
+            configure_client(platform, None)
+
+    def test_platforms_mirror_the_web_app(self):
+        self.assertEqual(set(PLATFORMS), {"google", "openai", "deepseek", "anthropic", "ollama", "openrouter"})
+
+    def test_client_is_created_once_and_reused(self):
+        """Test that the SDK client is built lazily on first use and shared by later calls."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = chat_completion("hello")
+        create = MagicMock(return_value=client)
+        with patch.object(PLATFORMS["openai"], "create_client", create):
+            self.assertEqual(generate_with_model("prompt", "openai__gpt-4o"), "hello")
+            generate_with_model("prompt", "openai__gpt-4o")
+        create.assert_called_once_with()
+        client.chat.completions.create.assert_called_with(
+            model="gpt-4o", messages=[{"role": "user", "content": "prompt"}])
+
+    def test_platform_specific_requests(self):
+        deepseek, anthropic, ollama = MagicMock(), MagicMock(), MagicMock()
+        deepseek.chat.completions.create.return_value = chat_completion("d")
+        anthropic.messages.create.return_value = SimpleNamespace(content=[SimpleNamespace(text="a")])
+        ollama.chat.return_value = {"message": {"content": "o"}}
+        configure_client("deepseek", deepseek)
+        configure_client("anthropic", anthropic)
+        configure_client("ollama", ollama)
+
+        self.assertEqual(generate_with_model("p", "deepseek__chat"), "d")
+        self.assertEqual(deepseek.chat.completions.create.call_args.kwargs["model"], "deepseek-chat")
+        self.assertEqual(generate_with_model("p", "anthropic__claude-3-5-sonnet-latest"), "a")
+        self.assertEqual(anthropic.messages.create.call_args.kwargs["max_tokens"], 3500)
+        self.assertEqual(generate_with_model("p", "ollama__llama3"), "o")
+        self.assertEqual(ollama.chat.call_args.kwargs["model"], "llama3")
+
+    def test_gemini_models_are_cached_per_name(self):
+        genai = MagicMock()
+        genai.GenerativeModel.return_value.generate_content.return_value = SimpleNamespace(text="g")
+        with patch.object(remote_helpers, "_require", return_value=genai):
+            client = remote_helpers.GeminiClient()
+        configure_client("google", client)
+        self.assertEqual(generate_with_model("p", "google__gemini-flash"), "g")
+        generate_with_model("p", "google__gemini-flash")
+        genai.GenerativeModel.assert_called_once()
+        self.assertEqual(genai.GenerativeModel.call_args.args[0], "gemini-2.0-flash")
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "Invalid platform"):
+            generate_with_model("p", "nonsense__model")
+        client = MagicMock()
+        client.chat.completions.create.return_value = chat_completion(None)
+        configure_client("openrouter", client)
+        with self.assertRaisesRegex(RuntimeError, "No response content from OpenRouter"):
+            generate_with_model("p", "openrouter__meta-llama/llama-3-70b")
+
+    def test_registered_platform(self):
+        register_platform("echo", lambda: "client", lambda client, prompt, model: f"{client}:{model}:{prompt}")
+        try:
+            self.assertEqual(generate_with_model("hi", "echo__v1"), "client:v1:hi")
+            self.assertEqual(get_client("echo"), "client")
+        finally:
+            PLATFORMS.pop("echo")
+
+class TestExtractAndParseJson(unittest.TestCase):
+
+    def test_plain_json(self):
+        self.assertEqual(extract_and_parse_json('{"a": 1}'), {"a": 1})
+
+    def test_code_block_with_trailing_comma(self):
+        self.assertEqual(extract_and_parse_json('Here you go:\n```json\n{"a": [1, 2,],}\n```'), {"a": [1, 2]})
+
+    def test_embedded_object(self):
+        response = 'Sure! {not json} and then {"query": "q", "nested": {"b": "}"}} trailing'
+        self.assertEqual(extract_and_parse_json(response), {"query": "q", "nested": {"b": "}"}})
+
+    def test_no_json(self):
+        with self.assertRaises(ValueError):
+            extract_and_parse_json("no json here")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from tooling.lib.resilience import (
+    CircuitBreaker, CircuitOpenError, HedgePolicy, LatencyTracker, configure_provider, hedged_call,
+    CLOSED, OPEN, HALF_OPEN,
+)
+from tooling.lib.metrics import PROVIDER_METRICS
+from tooling.remote import fetch_content as fetch_content_module
+from tooling.remote import search as search_module
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out on purpose close the connection mid-response.
+        pass
+
+
+class FakeServer:
+    """A local HTTP server that replays a script of (delay, status) responses."""
+
+    def __init__(self):
+        self.script = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    delay, status = server.script.pop(0) if server.script else (0, 200)
+                time.sleep(delay)
+                body = b'{"items": [{"title": "Fake", "link": "http://fake.test", "snippet": "s"}]}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _QuietServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold_and_recovers(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        # Only one trial call is let through while half-open.
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()["rejected"], 2)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+
+class TestHedging(unittest.TestCase):
+
+    def test_policy_delay_uses_percentile_once_warm(self):
+        policy = HedgePolicy(percentile=90, min_delay=0.01, max_delay=1.0, initial_delay=0.5, min_samples=10)
+        latencies = LatencyTracker()
+        self.assertEqual(policy.delay(latencies), 0.5)
+        for i in range(1, 11):
+            latencies.record(i / 100)
+        self.assertAlmostEqual(policy.delay(latencies), 0.09)
+        latencies.record(5.0)
+        self.assertEqual(HedgePolicy(percentile=100, max_delay=1.0, min_samples=1).delay(latencies), 1.0)
+
+    def test_fast_call_is_not_hedged(self):
+        calls = []
+        result = hedged_call(lambda: calls.append(1) or "ok", delay=1.0)
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 1)
+
+    def test_hedge_wins_over_slow_primary(self):
+        delays = [0.5, 0.0]
+
+        def call():
+            delay = delays.pop(0)
+            time.sleep(delay)
+            return delay
+
+        start = time.monotonic()
+        self.assertEqual(hedged_call(call, delay=0.05), 0.0)
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_error_of_one_attempt_is_masked_by_the_other(self):
+        attempts = []
+
+        def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                time.sleep(0.1)
+                raise RuntimeError("primary failed")
+            time.sleep(0.2)
+            return "hedge"
+
+        self.assertEqual(hedged_call(call, delay=0.01), "hedge")
+
+    def test_failing_response_does_not_win_over_a_successful_hedge(self):
+        class Response:
+            def __init__(self, status_code):
+                self.status_code = status_code
+                self.closed = False
+
+            def close(self):
+                self.closed = True
+
+        responses = []
+
+        def call():
+            response = Response(503 if not responses else 200)
+            responses.append(response)
+            time.sleep(0.05 if response.status_code == 503 else 0.15)
+            return response
+
+        result = hedged_call(call, delay=0.01)
+        self.assertEqual(result.status_code, 200)
+        self.assertTrue(responses[0].closed, "the losing response releases its connection")
+        self.assertFalse(result.closed)
+
+    def test_losing_response_is_closed_when_it_finishes_late(self):
+        closed = threading.Event()
+
+        class Response:
+            status_code = 200
+
+            def close(self):
+                closed.set()
+
+        delays = [0.3, 0.0]
+
+        def call():
+            time.sleep(delays.pop(0))
+            return Response()
+
+        hedged_call(call, delay=0.05)
+        self.assertTrue(closed.wait(1.0))
+
+    def test_non_idempotent_calls_are_hedged_only_on_request(self):
+        calls = []
+
+        def call():
+            calls.append(1)
+            time.sleep(0.1)
+            return "ok"
+
+        provider = configure_provider("exa", hedge=HedgePolicy(initial_delay=0.01))
+        try:
+            self.assertEqual(provider.call(call, idempotent=False), "ok")
+            self.assertEqual((len(calls), provider.hedges_fired), (1, 0))
+
+            provider = configure_provider("exa", hedge=HedgePolicy(initial_delay=0.01, hedge_non_idempotent=True))
+            provider.call(call, idempotent=False)
+            self.assertEqual(provider.hedges_fired, 1)
+        finally:
+            configure_provider("exa")
+
+
+class TestRemoteToolsAgainstFakeServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeServer()
+        PROVIDER_METRICS.reset()
+
+    def tearDown(self):
+        self.server.close()
+        configure_provider("google")
+        configure_provider("jina")
+
+    @patch.dict(os.environ, {"GOOGLE_SEARCH_API_KEY": "fake_key", "GOOGLE_SEARCH_CX": "fake_cx"})
+    def test_search_hedges_slow_response(self):
+        provider = configure_provider("google", hedge=HedgePolicy(initial_delay=0.05))
+        self.server.script = [(1.0, 200), (0, 200)]
+
+        with patch.object(search_module, "GOOGLE_ENDPOINT", self.server.url):
+            start = time.monotonic()
+            result = search_module.search("slow query", provider="google")
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(result["webPages"]["value"][0]["name"], "Fake")
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(provider.hedges_fired, 1)
+        self.assertEqual(self.server.requests, 2)
+
+    @patch.dict(os.environ, {"GOOGLE_SEARCH_API_KEY": "fake_key", "GOOGLE_SEARCH_CX": "fake_cx"})
+    def test_search_circuit_opens_on_server_errors(self):
+        configure_provider("google", breaker=CircuitBreaker("google", failure_threshold=2, reset_timeout=60))
+        self.server.script = [(0, 503), (0, 503)]
+
+        with patch.object(search_module, "GOOGLE_ENDPOINT", self.server.url):
+            self.assertEqual(search_module.search("q", provider="google")["status"], 500)
+            self.assertEqual(search_module.search("q", provider="google")["status"], 500)
+            result = search_module.search("q", provider="google")
+
+        self.assertEqual(result["status"], 503)
+        self.assertIn("temporarily unavailable", result["error"])
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(PROVIDER_METRICS.snapshot()["google"]["errors"], {"503": 3})
+
+    def test_fetch_content_fails_fast_after_timeouts(self):
+        configure_provider("jina", breaker=CircuitBreaker("jina", failure_threshold=1, reset_timeout=60))
+        self.server.script = [(0.5, 200)]
+        real_get = requests.Session.get
+
+        with patch.object(fetch_content_module, "JINA_READER_ENDPOINT", self.server.url), \
+                patch.object(requests.Session, "get",
+                             lambda session, url, timeout, **kwargs: real_get(session, url, timeout=0.1, **kwargs)):
+            self.assertEqual(fetch_content_module.fetch_content("http://example.com")["status"], 500)
+            start = time.monotonic()
+            result = fetch_content_module.fetch_content("http://example.com")
+
+        self.assertEqual(result["status"], 503)
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_circuit_open_error_is_raised_by_provider(self):
+        provider = configure_provider("jina", breaker=CircuitBreaker("jina", failure_threshold=1))
+        provider.breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            provider.call(lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
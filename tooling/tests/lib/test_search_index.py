@@ -0,0 +1,77 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from tooling.lib import search_index
+from tooling.lib.search_index import LocalSearchIndex, index_document, tokenize
+
+class TestLocalSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = LocalSearchIndex(os.path.join(self.tmp_dir.name, "index.sqlite3"))
+        self.index.add("https://a.com", "Title: Solar power\n\nSolar panels convert sunlight into electricity.")
+        self.index.add("https://b.com", "Wind turbines generate electricity from wind. Wind farms are large.")
+        self.index.add("https://c.com", "A recipe for bread with flour, water and yeast.")
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Wind-turbines of 2024!"), ["wind", "turbines", "2024"])
+
+    def test_bm25_ranking(self):
+        """Test that documents are ranked by relevance and unrelated ones are not returned."""
+        hits = self.index.search("wind electricity")
+        self.assertEqual([hit["url"] for hit in hits], ["https://b.com", "https://a.com"])
+        self.assertGreater(hits[0]["score"], hits[1]["score"])
+        self.assertEqual(self.index.search("solar")[0]["name"], "Solar power")
+        self.assertEqual(self.index.search("quantum"), [])
+        self.assertEqual(len(self.index.search("electricity", limit=1)), 1)
+
+    def test_snippet_shows_the_match(self):
+        hit = self.index.search("yeast")[0]
+        self.assertIn("yeast", hit["snippet"])
+        self.assertEqual(hit["source"], "page")
+
+    def test_readding_replaces_the_document(self):
+        self.assertFalse(self.index.add("https://c.com", "A recipe for bread with flour, water and yeast."))
+        self.assertTrue(self.index.add("https://c.com", "Sourdough starter care."))
+        self.assertEqual(self.index.search("yeast"), [])
+        self.assertEqual(self.index.search("sourdough")[0]["url"], "https://c.com")
+        self.assertEqual(self.index.stats()["documents"], 3)
+
+    def test_unchanged_document_is_not_tokenized_again(self):
+        with patch.object(search_index, "tokenize", wraps=tokenize) as tokenize_spy:
+            self.assertFalse(self.index.add("https://c.com", "A recipe for bread with flour, water and yeast."))
+            tokenize_spy.assert_not_called()
+            self.assertTrue(self.index.add("https://c.com", "Rye bread."))
+            tokenize_spy.assert_called()
+
+    def test_index_document_never_raises(self):
+        """Test that a failure to create the shared index does not reach the caller."""
+        with patch.object(search_index, "get_local_index", side_effect=PermissionError("read-only cache dir")):
+            index_document("https://d.com", "content")
+
+    def test_remove(self):
+        self.index.remove("https://a.com")
+        self.assertEqual([hit["url"] for hit in self.index.search("electricity")], ["https://b.com"])
+
+    def test_add_directory(self):
+        knowledge_dir = os.path.join(self.tmp_dir.name, "knowledge_core")
+        os.makedirs(knowledge_dir)
+        with open(os.path.join(knowledge_dir, "logic.md"), "w", encoding="utf-8") as f:
+            f.write("# Resource-Aware Logic\n\nPolynomial time computation.")
+        with open(os.path.join(knowledge_dir, "meta.json"), "w", encoding="utf-8") as f:
+            f.write('{"polynomial": true}')
+
+        self.assertEqual(self.index.add_directory(knowledge_dir), 1)
+        self.assertEqual(self.index.add_directory(knowledge_dir), 0)
+        hits = self.index.search("polynomial")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["name"], "Resource-Aware Logic")
+        self.assertEqual(hits[0]["source"], "knowledge_core")
+
+if __name__ == '__main__':
+    unittest.main()
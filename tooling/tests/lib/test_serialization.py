@@ -0,0 +1,44 @@
+import unittest
+import io
+import json
+from unittest.mock import patch
+from tooling.lib import serialization
+from tooling.lib.serialization import encode_json, iter_json, write_json
+
+class TestSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.payload = {"status": 200, "content": "é" * 5000, "items": [1, 2.5, None, True]}
+
+    def test_encode_json_round_trip(self):
+        """Test that encoding produces JSON equivalent to the standard library."""
+        self.assertEqual(json.loads(encode_json(self.payload)), self.payload)
+
+    def test_encode_json_without_orjson(self):
+        """Test the standard library fallback when orjson is unavailable."""
+        with patch.object(serialization, "orjson", None):
+            self.assertEqual(encode_json({"a": 1}), json.dumps({"a": 1}))
+
+    def test_encode_json_falls_back_on_unsupported_values(self):
+        """Test that values orjson rejects are still encoded."""
+        self.assertEqual(json.loads(encode_json({"big": 2 ** 70})), {"big": 2 ** 70})
+
+    def test_iter_json_chunks(self):
+        """Test that large payloads are streamed in bounded chunks."""
+        chunks = list(iter_json(self.payload, chunk_size=1024))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 2 * 1024 for chunk in chunks))
+        self.assertEqual(json.loads("".join(chunks)), self.payload)
+
+    def test_write_json_text_and_binary(self):
+        """Test streaming to both text and binary file objects."""
+        text_fp, binary_fp = io.StringIO(), io.BytesIO()
+        write_json(self.payload, text_fp, chunk_size=512)
+        write_json(self.payload, binary_fp, chunk_size=512)
+
+        self.assertEqual(json.loads(text_fp.getvalue()), self.payload)
+        self.assertEqual(json.loads(binary_fp.getvalue().decode("utf-8")), self.payload)
+
+if __name__ == '__main__':
+    unittest.main()
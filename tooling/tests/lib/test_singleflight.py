@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+import threading
+import time
+from tooling.lib.singleflight import SingleFlight, AsyncSingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_exception_is_shared(self):
+        """Test that every waiting caller receives the leader's exception."""
+        flight = SingleFlight()
+        started, errors = threading.Event(), []
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("backend down")
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(errors, ["backend down", "backend down"])
+        self.assertEqual(flight.stats(), {"calls": 2, "executions": 1, "coalesced": 1, "in_flight": 0})
+
+    def test_sequential_calls_run_separately(self):
+        """Test that calls are only shared while one is in flight."""
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+        self.assertEqual(flight.stats()["executions"], 2)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_identical_calls_share_one_execution(self):
+        """Test that concurrent identical coroutines run once."""
+        flight, runs = AsyncSingleFlight(), []
+
+        async def fetch():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return {"content": "page"}
+
+        results = await asyncio.gather(*(flight.do("url", fetch) for _ in range(5)))
+
+        self.assertEqual(len(runs), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.stats()["coalesced"], 4)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_cancelling_one_caller_does_not_cancel_others(self):
+        """Test that the shared execution survives a cancelled caller."""
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("url", fetch))
+        second = asyncio.ensure_future(flight.do("url", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        self.assertEqual(await second, "done")
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+if __name__ == '__main__':
+    unittest.main()
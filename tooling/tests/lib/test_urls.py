@@ -0,0 +1,29 @@
+import unittest
+
+from tooling.lib.urls import normalize_url, dedup_key
+
+
+class TestNormalizeUrl(unittest.TestCase):
+
+    def test_canonical_form(self):
+        self.assertEqual(
+            normalize_url("HTTPS://Example.COM:443/a/b/?utm_source=x&z=1&a=2#section"),
+            "https://example.com/a/b?a=2&z=1",
+        )
+        self.assertEqual(normalize_url("http://example.com"), "http://example.com/")
+        self.assertEqual(normalize_url("http://example.com:8080/"), "http://example.com:8080/")
+
+    def test_path_quoting_is_consistent(self):
+        self.assertEqual(normalize_url("https://e.com/a b"), normalize_url("https://e.com/a%20b"))
+
+    def test_invalid_urls(self):
+        for url in ("", "mailto:a@b.c", "/relative/path", "https://", "http://host:notaport/"):
+            self.assertIsNone(normalize_url(url), url)
+
+    def test_dedup_key_ignores_scheme_and_www(self):
+        self.assertEqual(dedup_key("http://www.example.com/page/"), dedup_key("https://example.com/page?gclid=1"))
+        self.assertNotEqual(dedup_key("https://example.com/page"), dedup_key("https://example.com/other"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -42,7 +42,7 @@ class TestPortedAnalyzeResults(unittest.TestCase):
         self.assertIn("rankings", result)
         self.assertEqual(result["analysis"], "Test analysis of search results")
 
-    @patch('tooling.ported.analyze_results.generate_with_model')
+    @patch('tooling.remote.analyze_results.generate_with_model')
     def test_analysis_success(self, mock_generate_with_model):
         """Test a successful analysis with a mocked LLM response."""
         mock_response_json = {
@@ -60,7 +60,7 @@ class TestPortedAnalyzeResults(unittest.TestCase):
         self.assertEqual(len(result["rankings"]), 1)
         mock_generate_with_model.assert_called_once()
 
-    @patch('tooling.ported.analyze_results.generate_with_model', side_effect=Exception("LLM is down"))
+    @patch('tooling.remote.analyze_results.generate_with_model', side_effect=Exception("LLM is down"))
     def test_analysis_failure_model_error(self, mock_generate_with_model):
         """Test a failure when the LLM model raises an exception."""
         result = analyze_results(prompt=self.sample_prompt, results=self.sample_results, platform_model="openai__gpt-4")
@@ -68,5 +68,31 @@ class TestPortedAnalyzeResults(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("Failed to analyze results", result["error"])
 
+    def test_invalid_platform_model(self):
+        """Test that a missing platform_model is reported as an error rather than raised."""
+        result = analyze_results(prompt=self.sample_prompt, results=self.sample_results, platform_model=None)
+        self.assertEqual(result["status"], 500)
+        self.assertIn("Failed to analyze results", result["error"])
+
+    @patch('tooling.remote.analyze_results.generate_with_model')
+    def test_long_content_is_packed_into_the_context_window(self, mock_generate_with_model):
+        """Test that content beyond the model's context is cut, lowest-value results first."""
+        mock_generate_with_model.return_value = '{"rankings": [], "analysis": "ok"}'
+        results = [
+            {"url": f"http://example.com/page-{i}", "title": f"Page {i}", "snippet": "s", "content": "Word " * 4000}
+            for i in range(40)
+        ]
+
+        result = analyze_results(prompt=self.sample_prompt, results=results, platform_model="ollama__llama3")
+
+        self.assertEqual(result["status"], 200)
+        dropped = [entry["url"] for entry in result["packing"]["dropped"]]
+        self.assertTrue(dropped)
+        self.assertEqual(dropped[-1], "http://example.com/page-39")
+        self.assertNotIn("http://example.com/page-0", dropped)
+        system_prompt = mock_generate_with_model.call_args.args[0]
+        self.assertIn("Result 40:", system_prompt)
+        self.assertIn("[Content omitted to fit the context window]", system_prompt)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
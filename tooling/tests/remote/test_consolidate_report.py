@@ -31,7 +31,7 @@ class TestPortedConsolidateReport(unittest.TestCase):
         self.assertIn("error", result)
         self.assertEqual(result["error"], "Reports are required")
 
-    @patch('tooling.ported.consolidate_report.generate_with_model')
+    @patch('tooling.remote.consolidate_report.generate_with_model')
     def test_consolidation_success_json_response(self, mock_generate):
         """Test a successful consolidation with a valid JSON response."""
         mock_response_json = {
@@ -52,7 +52,7 @@ class TestPortedConsolidateReport(unittest.TestCase):
         self.assertEqual(result["sources"][1]["id"], "src2")
         mock_generate.assert_called_once()
 
-    @patch('tooling.ported.consolidate_report.generate_with_model')
+    @patch('tooling.remote.consolidate_report.generate_with_model')
     def test_consolidation_fallback_parsing(self, mock_generate):
         """Test the fallback parsing when the LLM response is not valid JSON."""
         mock_response_text = "This is a plain text report.\n\nIt has multiple paragraphs."
@@ -66,7 +66,7 @@ class TestPortedConsolidateReport(unittest.TestCase):
         # Check that sources are still added correctly
         self.assertEqual(len(result["sources"]), 2)
 
-    @patch('tooling.ported.consolidate_report.generate_with_model', side_effect=Exception("LLM is down"))
+    @patch('tooling.remote.consolidate_report.generate_with_model', side_effect=Exception("LLM is down"))
     def test_consolidation_failure_model_error(self, mock_generate):
         """Test a failure when the LLM model raises an exception."""
         result = consolidate_report(reports=self.sample_reports, platform_model="openai__gpt-4")
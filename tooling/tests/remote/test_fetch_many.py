@@ -0,0 +1,89 @@
+import unittest
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from tooling.remote.fetch_content import fetch_many, fetch_many_async
+
+class TestFetchMany(unittest.TestCase):
+
+    def tracked_fetch(self, delay=0.05, failing=()):
+        lock = threading.Lock()
+        self.active, self.peak, self.peak_per_host = {}, 0, {}
+
+        def fetch(url, mode="reader"):
+            host = url.split("/")[2]
+            with lock:
+                self.active[host] = self.active.get(host, 0) + 1
+                self.peak = max(self.peak, sum(self.active.values()))
+                self.peak_per_host[host] = max(self.peak_per_host.get(host, 0), self.active[host])
+            time.sleep(delay)
+            with lock:
+                self.active[host] -= 1
+            if url in failing:
+                raise RuntimeError("connection reset")
+            return {"content": url, "status": 200}
+        return fetch
+
+    def test_concurrency_and_per_host_limits(self):
+        """Test that fetches run in parallel within the overall and per-host limits."""
+        urls = [f"http://{host}.com/{i}" for host in ("a", "b", "c") for i in range(4)]
+        with patch('tooling.remote.fetch_content.fetch_content', self.tracked_fetch()):
+            start = time.monotonic()
+            results = dict(fetch_many(urls, max_concurrency=4, per_host_limit=2))
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(set(results), set(urls))
+        self.assertEqual(self.peak, 4)
+        self.assertEqual(max(self.peak_per_host.values()), 2)
+        self.assertLess(elapsed, 0.05 * len(urls) / 2)
+
+    def test_results_arrive_as_they_complete(self):
+        def fetch(url, mode="reader"):
+            time.sleep(0.2 if url.endswith("slow") else 0.0)
+            return {"content": url, "status": 200}
+
+        with patch('tooling.remote.fetch_content.fetch_content', fetch):
+            order = [url for url, _ in fetch_many(["http://a.com/slow", "http://b.com/fast"])]
+        self.assertEqual(order, ["http://b.com/fast", "http://a.com/slow"])
+
+    def test_errors_are_isolated(self):
+        urls = ["http://a.com/1", "http://a.com/2", "http://a.com/1"]
+        with patch('tooling.remote.fetch_content.fetch_content', self.tracked_fetch(0, failing=("http://a.com/2",))):
+            results = dict(fetch_many(urls))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results["http://a.com/1"]["status"], 200)
+        self.assertEqual(results["http://a.com/2"]["status"], 500)
+
+    def test_direct_fetch(self):
+        with patch('tooling.remote.fetch_content.fetch_content', return_value={"content": "page", "status": 200}) as fetch:
+            results = list(fetch_many(["http://a.com"], mode="direct"))
+        fetch.assert_called_once_with("http://a.com", mode="direct")
+        self.assertEqual(results, [("http://a.com", {"content": "page", "status": 200})])
+
+    def test_async(self):
+        urls = [f"http://a.com/{i}" for i in range(5)]
+
+        async def collect():
+            return [url async for url, _ in fetch_many_async(urls, per_host_limit=2)]
+
+        with patch('tooling.remote.fetch_content.fetch_content', self.tracked_fetch()):
+            self.assertEqual(sorted(asyncio.run(collect())), urls)
+        self.assertEqual(self.peak_per_host["a.com"], 2)
+
+    def test_async_early_exit_leaves_no_fetch_running(self):
+        urls = [f"http://{host}.com/" for host in "abcdefgh"]
+
+        async def first():
+            results = fetch_many_async(urls, max_concurrency=3)
+            async for url, _ in results:
+                break
+            await results.aclose()
+            return sum(self.active.values())
+
+        with patch('tooling.remote.fetch_content.fetch_content', self.tracked_fetch()):
+            self.assertEqual(asyncio.run(first()), 0)
+        self.assertEqual(len(self.active), 3, "no fetches start after the consumer stops")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import io
+import os
+import tempfile
+from unittest.mock import patch, Mock
+import requests
+from tooling.lib.content_store import ContentStore, configure_content_store
+from tooling.lib.metrics import TASK_METRICS
+from tooling.remote.fetch_content import fetch_content
+
+def make_response(body: bytes, status: int = 200, headers=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    response.encoding = "utf-8"
+    response.headers.update(headers or {})
+    return response
+
+class TestContentStoreFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ContentStore(os.path.join(self.tmp_dir.name, "content.sqlite3"))
+        configure_content_store(self.store)
+        self.session = Mock()
+        self.session_patch = patch('tooling.remote.fetch_content.get_session', return_value=self.session)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+        configure_content_store(None)
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_fresh_page_is_not_downloaded_again(self):
+        self.session.get.return_value = make_response(b"page")
+        fetch_content("https://example.com/a")
+        result = fetch_content("https://example.com/a?utm_campaign=x")
+        self.assertEqual(result, {"content": "page", "status": 200})
+        self.session.get.assert_called_once()
+
+    def test_expired_page_is_revalidated(self):
+        """Test that an expired page with an ETag is confirmed with a conditional request."""
+        self.session.get.return_value = make_response(b"page", headers={"ETag": '"v1"', "Cache-Control": "max-age=0"})
+        fetch_content("https://example.com/a", mode="direct")
+        self.session.get.return_value = make_response(b"", status=304)
+        result = fetch_content("https://example.com/a", mode="direct")
+        self.assertEqual(result, {"content": "page", "status": 200})
+        self.assertEqual(self.session.get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(self.store.stats()["revalidations"], 1)
+
+    def test_store_hits_reach_the_task_metrics(self):
+        """Test that fresh and revalidated pages count as cache hits of fetch_content, downloads as misses."""
+        TASK_METRICS.reset()
+        self.session.get.return_value = make_response(b"page", headers={"ETag": '"v1"', "Cache-Control": "max-age=0"})
+        fetch_content("https://example.com/a")
+        self.session.get.return_value = make_response(b"", status=304)
+        fetch_content("https://example.com/a")
+        self.session.get.return_value = make_response(b"page")
+        fetch_content("https://example.com/b")
+        fetch_content("https://example.com/b")
+        data = TASK_METRICS.snapshot()["fetch_content"]
+        self.assertEqual((data["cache_hits"], data["cache_misses"]), (2, 2))
+
+    def test_changed_page_replaces_stored_copy(self):
+        self.session.get.return_value = make_response(b"old", headers={"ETag": '"v1"', "Cache-Control": "max-age=0"})
+        fetch_content("https://example.com/a", mode="direct")
+        self.session.get.return_value = make_response(b"new", headers={"ETag": '"v2"'})
+        self.assertEqual(fetch_content("https://example.com/a", mode="direct")["content"], "new")
+        self.assertEqual(self.store.get("https://example.com/a", mode="direct")["etag"], '"v2"')
+
+    def test_errors_no_store_and_use_cache_false_are_not_stored(self):
+        self.session.get.side_effect = [
+            make_response(b"missing", status=404),
+            make_response(b"private", headers={"Cache-Control": "no-store"}),
+            make_response(b"page"),
+        ]
+        fetch_content("https://example.com/missing", mode="direct")
+        fetch_content("https://example.com/private", mode="direct")
+        fetch_content("https://example.com/a", use_cache=False, mode="direct")
+        self.assertEqual(self.store.stats()["pages"], 0)
+
+    def test_truncated_copy_is_not_served_to_a_larger_cap(self):
+        self.session.get.side_effect = [make_response(b"x" * 100), make_response(b"x" * 100)]
+        fetch_content("https://example.com/a", max_chars=10)
+        self.assertEqual(fetch_content("https://example.com/a", max_chars=5),
+                         {"content": "x" * 5, "status": 200, "truncated": True})
+        self.assertEqual(fetch_content("https://example.com/a", max_chars=None)["content"], "x" * 100)
+        self.assertEqual(self.session.get.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
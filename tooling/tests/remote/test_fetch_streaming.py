@@ -0,0 +1,103 @@
+import unittest
+import io
+from unittest.mock import patch, Mock
+import requests
+from tooling.remote.fetch_content import ContentStream, fetch_content, stream_content
+
+def make_response(body: bytes, status: int = 200, encoding: str = "utf-8") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    response.encoding = encoding
+    return response
+
+class TestContentStream(unittest.TestCase):
+
+    def test_reads_in_chunks(self):
+        """Test that the body is yielded chunk by chunk, decoded across chunk boundaries."""
+        body = ("héllo wörld " * 10).encode("utf-8")
+        stream = ContentStream(make_response(body), chunk_size=7)
+        chunks = list(stream)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), body.decode("utf-8"))
+        self.assertFalse(stream.truncated)
+        self.assertEqual(stream.bytes_read, len(body))
+
+    def test_character_cap(self):
+        stream = ContentStream(make_response(b"a" * 1000), max_chars=100, chunk_size=64)
+        self.assertEqual(stream.read(), "a" * 100)
+        self.assertTrue(stream.truncated)
+        self.assertLess(stream.bytes_read, 1000)  # Reading stopped early.
+
+    def test_byte_cap_does_not_split_characters(self):
+        stream = ContentStream(make_response("éé".encode("utf-8")), max_bytes=3)
+        self.assertEqual(stream.read(), "é")
+        self.assertTrue(stream.truncated)
+
+    def test_charset_declared_in_the_page(self):
+        """Test that text/html without a header charset is decoded as its <meta> charset, not ISO-8859-1."""
+        def html_response(body, content_type="text/html"):
+            response = make_response(body)
+            response.headers["Content-Type"] = content_type
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            return response
+
+        page = '<html><head><meta charset="utf-8"></head><body>Café – naïve</body></html>'
+        self.assertEqual(ContentStream(html_response(page.encode("utf-8"))).read(), page)
+        latin = '<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">Café'
+        self.assertEqual(ContentStream(html_response(latin.encode("cp1252"))).read(), latin)
+        self.assertEqual(ContentStream(html_response("Café".encode("utf-8"))).read(), "Café")
+        self.assertEqual(ContentStream(html_response(page.encode("utf-8").replace(b"utf-8", b"latin-1"),
+                                                     "text/html; charset=utf-8")).read(),
+                         page.replace("utf-8", "latin-1"), "a header charset wins over the page")
+
+    def test_closes_the_response(self):
+        response = make_response(b"abc")
+        with patch.object(response, "close") as close:
+            ContentStream(response).read()
+        close.assert_called()
+
+class TestStreamingFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.session = Mock()
+        self.session_patch = patch('tooling.remote.fetch_content.get_session', return_value=self.session)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+
+    def test_fetch_content_truncates(self):
+        self.session.get.return_value = make_response(b"x" * 500)
+        result = fetch_content("http://example.com/big", max_chars=50)
+        self.assertEqual(result, {"content": "x" * 50, "status": 200, "truncated": True})
+        self.assertTrue(self.session.get.call_args.kwargs["stream"])
+
+    def test_fetch_content_complete(self):
+        self.session.get.return_value = make_response(b"small page")
+        self.assertEqual(fetch_content("http://example.com/small"), {"content": "small page", "status": 200})
+
+    def test_direct_mode_extracts_locally(self):
+        """Test that mode='direct' fetches the origin page and extracts it without the reader."""
+        html = b"<html><head><title>Page</title></head><body><nav>Menu</nav><p>The article text, long enough to count.</p></body></html>"
+        self.session.get.return_value = make_response(html)
+        result = fetch_content("http://example.com/page", mode="direct")
+        self.assertEqual(self.session.get.call_args.args[0], "http://example.com/page")
+        self.assertEqual(result["content"], "Title: Page\n\nURL Source: http://example.com/page\n\n"
+                                            "Markdown Content:\nThe article text, long enough to count.")
+        self.assertEqual(fetch_content("http://example.com/page", mode="archive")["status"], 400)
+
+    def test_error_response(self):
+        self.session.get.return_value = make_response(b"not found", status=404)
+        result = fetch_content("http://example.com/missing", mode="direct")
+        self.assertEqual(result["status"], 404)
+        self.assertEqual(result["details"], "not found")
+
+    def test_stream_content_directly(self):
+        self.session.get.return_value = make_response(b"streamed")
+        with stream_content("http://example.com", reader=False) as stream:
+            self.assertEqual(list(stream), ["streamed"])
+        self.assertEqual(self.session.get.call_args.args[0], "http://example.com")
+
+if __name__ == '__main__':
+    unittest.main()
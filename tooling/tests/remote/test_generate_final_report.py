@@ -37,7 +37,7 @@ class TestPortedGenerateFinalReport(unittest.TestCase):
         self.assertEqual(result_no_results["status"], 400)
         self.assertIn("error", result_no_results)
 
-    @patch('tooling.ported.generate_final_report.generate_with_model')
+    @patch('tooling.remote.generate_final_report.generate_with_model')
     def test_report_generation_success(self, mock_generate):
         """Test a successful report generation with a mocked LLM response."""
         mock_response_json = {
@@ -63,7 +63,7 @@ class TestPortedGenerateFinalReport(unittest.TestCase):
         self.assertEqual(result["sources"], self.sample_sources)
         mock_generate.assert_called_once()
 
-    @patch('tooling.ported.generate_final_report.generate_with_model', side_effect=Exception("LLM is down"))
+    @patch('tooling.remote.generate_final_report.generate_with_model', side_effect=Exception("LLM is down"))
     def test_report_generation_failure_model_error(self, mock_generate):
         """Test a failure when the LLM model raises an exception."""
         result = generate_final_report(
@@ -76,5 +76,46 @@ class TestPortedGenerateFinalReport(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("Failed to generate final report", result["error"])
 
+    def test_invalid_platform_model(self):
+        """Test that a missing platform_model is reported as an error rather than raised."""
+        result = generate_final_report(
+            prompt=self.sample_prompt,
+            selected_results=self.sample_results,
+            sources=self.sample_sources,
+            platform_model=None
+        )
+        self.assertEqual(result["status"], 500)
+        self.assertIn("Failed to generate final report", result["error"])
+
+    @patch('tooling.remote.generate_final_report.generate_with_model')
+    def test_long_articles_are_packed_into_the_context_window(self, mock_generate):
+        """Test that articles beyond gpt-4's 8K context are cut and the cut is reported."""
+        mock_generate.return_value = json.dumps({"title": "T", "summary": "S", "sections": [], "usedSources": [1]})
+        articles = [
+            {"url": f"http://example.com/{i}", "title": f"Article {i}", "content": "AI art is evolving. " * 2000}
+            for i in range(3)
+        ]
+
+        result = generate_final_report(
+            prompt=self.sample_prompt, selected_results=articles, sources=self.sample_sources,
+            platform_model="openai__gpt-4"
+        )
+
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(len(result["packing"]["truncated"]), 3)
+        self.assertLessEqual(result["packing"]["tokens"], result["packing"]["budget"])
+        system_prompt = mock_generate.call_args.args[0]
+        self.assertLess(len(system_prompt), 8192 * 4)
+        self.assertIn("[3] Title: Article 2", system_prompt)
+        self.assertEqual(len(articles[0]["content"]), 40000, "the caller's articles are not modified")
+
+        mock_generate.reset_mock()
+        result = generate_final_report(
+            prompt=self.sample_prompt, selected_results=articles, sources=self.sample_sources,
+            platform_model="google__gemini-flash"
+        )
+        self.assertNotIn("packing", result)
+        self.assertIn("AI art is evolving. " * 2000, mock_generate.call_args.args[0])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -22,7 +22,7 @@ class TestPortedGenerateQuestion(unittest.TestCase):
         self.assertEqual(result["status"], 400)
         self.assertEqual(result["error"], "Report is required")
 
-    @patch('tooling.ported.generate_question.generate_with_model')
+    @patch('tooling.remote.generate_question.generate_with_model')
     def test_generation_success_json_response(self, mock_generate):
         """Test successful generation with a valid JSON response from the LLM."""
         mock_response = '{"searchTerms": ["term 1", "term 2", "term 3"]}'
@@ -35,7 +35,7 @@ class TestPortedGenerateQuestion(unittest.TestCase):
         self.assertEqual(result["searchTerms"], ["term 1", "term 2", "term 3"])
         mock_generate.assert_called_once()
 
-    @patch('tooling.ported.generate_question.generate_with_model')
+    @patch('tooling.remote.generate_question.generate_with_model')
     def test_generation_success_fallback_parsing(self, mock_generate):
         """Test the fallback line-based parsing when the LLM response is not valid JSON."""
         mock_response = 'Here are the terms:\n"term one"\n"term two"\n"term three"'
@@ -47,7 +47,7 @@ class TestPortedGenerateQuestion(unittest.TestCase):
         self.assertEqual(len(result["searchTerms"]), 3)
         self.assertEqual(result["searchTerms"], ['Here are the terms:', 'term one', 'term two'])
 
-    @patch('tooling.ported.generate_question.generate_with_model', side_effect=Exception("Model unavailable"))
+    @patch('tooling.remote.generate_question.generate_with_model', side_effect=Exception("Model unavailable"))
     def test_generation_failure_model_error(self, mock_generate):
         """Test a generation failure when the model raises an exception."""
         result = generate_question(report=self.sample_report, platform_model="openai__gpt-4")
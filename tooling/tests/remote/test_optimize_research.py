@@ -19,7 +19,7 @@ class TestPortedOptimizeResearch(unittest.TestCase):
         self.assertEqual(result["explanation"], "Test optimization strategy")
         self.assertEqual(len(result["suggestedStructure"]), 2)
 
-    @patch('tooling.ported.optimize_research.generate_with_model')
+    @patch('tooling.remote.optimize_research.generate_with_model')
     def test_optimization_success(self, mock_generate):
         """Test a successful optimization with a mocked LLM response."""
         mock_response_json = {
@@ -36,7 +36,7 @@ class TestPortedOptimizeResearch(unittest.TestCase):
         self.assertEqual(len(result["suggestedStructure"]), 1)
         mock_generate.assert_called_once()
 
-    @patch('tooling.ported.optimize_research.generate_with_model', side_effect=Exception("LLM is down"))
+    @patch('tooling.remote.optimize_research.generate_with_model', side_effect=Exception("LLM is down"))
     def test_optimization_failure_model_error(self, mock_generate):
         """Test a failure when the LLM model raises an exception."""
         result = optimize_research(prompt="original prompt", platform_model="openai__gpt-4")
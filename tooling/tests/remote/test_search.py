@@ -1,7 +1,18 @@
 import unittest
+import asyncio
 from unittest.mock import patch, Mock
 import os
-from tooling.remote.search import search, get_bing_freshness, get_google_date_restrict
+import tempfile
+import time
+from tooling.lib.metrics import TASK_METRICS
+from tooling.lib.cache import ResultCache
+from tooling.remote.search import (
+    search, get_bing_freshness, get_google_date_restrict, fuse_results, multi_search,
+    normalize_query, configure_search_cache, search_cache_stats, search_many, SEARCH_CACHE_TTLS,
+    iter_search_hits, iter_search_hits_async, result_pages, SearchError,
+)
+from tooling.lib.search_index import LocalSearchIndex, configure_local_index
+from tooling.lib.ratelimit import MemoryBackend, configure_rate_limit_backend, set_rate_limit, PROVIDER_RATE_LIMITS
 
 class TestPortedSearch(unittest.TestCase):
 
@@ -111,5 +122,227 @@ class TestPortedSearch(unittest.TestCase):
             self.assertIn("not properly configured", result["error"])
             self.assertEqual(result["status"], 500)
 
+class TestMultiProviderSearch(unittest.TestCase):
+
+    HITS = {
+        "google": [{"url": "https://www.a.com/", "name": "A"}, {"url": "https://b.com/x", "name": "B"}],
+        "bing": [{"url": "http://b.com/x/", "name": "B (bing)"}, {"url": "https://c.com", "name": "C"}],
+        "exa": [{"url": "https://d.com", "name": "D"}],
+    }
+
+    def fake_search(self, delays, failing=()):
+        def search_one(query, time_filter='all', provider='google', **kwargs):
+            time.sleep(delays.get(provider, 0))
+            if provider in failing:
+                return {"error": f"{provider} is down", "status": 500}
+            return {"webPages": {"value": self.HITS[provider]}}
+        return search_one
+
+    def test_fuse_results_dedups_and_ranks(self):
+        fused = fuse_results({"google": self.HITS["google"], "bing": self.HITS["bing"]})
+        self.assertEqual([hit["name"] for hit in fused], ["B", "A", "C"])
+        self.assertEqual(fused[0]["providers"], ["google", "bing"])
+        self.assertGreater(fused[0]["score"], fused[1]["score"])
+
+    def test_merge_waits_for_all_providers(self):
+        with patch('tooling.remote.search.search', self.fake_search({"bing": 0.05}, failing=("exa",))):
+            result = multi_search("q", providers=["google", "bing", "exa"])
+        self.assertEqual(len(result["webPages"]["value"]), 3)
+        self.assertEqual(result["providers"]["exa"]["status"], 500)
+        self.assertEqual(result["providers"]["bing"]["count"], 2)
+
+    def test_quorum_returns_before_slow_provider(self):
+        with patch('tooling.remote.search.search', self.fake_search({"google": 0.5, "bing": 0.0, "exa": 0.0})):
+            start = time.monotonic()
+            result = multi_search("q", providers=["google", "bing", "exa"], quorum=2)
+            elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(result["providers"]["google"], {"status": "pending"})
+        self.assertEqual({hit["name"] for hit in result["webPages"]["value"]}, {"B (bing)", "C", "D"})
+
+    def test_first_k_results(self):
+        with patch('tooling.remote.search.search', self.fake_search({"google": 0.5, "exa": 0.5})):
+            result = multi_search("q", providers=["google", "bing", "exa"], first_k=2)
+        self.assertEqual(len(result["webPages"]["value"]), 2)
+
+    def test_all_providers_failing(self):
+        with patch('tooling.remote.search.search', self.fake_search({}, failing=("google", "bing"))):
+            result = multi_search("q", providers=["google", "bing"])
+        self.assertEqual(result["status"], 502)
+
+    def test_unknown_and_unconfigured_providers(self):
+        self.assertEqual(multi_search("q", providers=["altavista"])["status"], 400)
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(search("q", provider="multi")["status"], 500)
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmp_dir.name, "search.sqlite3"))
+        configure_search_cache(self.cache)
+        self.provider_search = patch('tooling.remote.search._search_provider',
+                                     return_value={"webPages": {"value": [{"url": "https://a.com"}]}})
+        self.mock_provider = self.provider_search.start()
+
+    def tearDown(self):
+        self.provider_search.stop()
+        configure_search_cache(None)
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Machine   LEARNING "), "learning machine")
+        self.assertEqual(normalize_query("learning machine"), normalize_query("Machine learning"))
+        # Word order is kept for questions, phrases, operators and long queries.
+        self.assertEqual(normalize_query("Why is the sky blue?"), "why is the sky blue?")
+        self.assertEqual(normalize_query('"deep learning" pytorch'), '"deep learning" pytorch')
+        self.assertEqual(normalize_query("site:arxiv.org transformers"), "site:arxiv.org transformers")
+        self.assertEqual(normalize_query("cats OR dogs"), "cats or dogs")
+        self.assertEqual(normalize_query("g f e d c b a"), "g f e d c b a")
+
+    def test_equivalent_queries_hit_the_cache(self):
+        first = search("Deep  Learning", provider="google")
+        second = search("learning deep", provider="google")
+        self.assertEqual(first, second)
+        self.mock_provider.assert_called_once()
+        self.assertEqual(search_cache_stats()["namespaces"]["google"]["hits"], 1)
+
+    def test_cache_hits_reach_the_task_metrics(self):
+        """Test that search, which the dispatcher does not cache, records its own cache hits."""
+        TASK_METRICS.reset()
+        search("q", provider="google")
+        search("q", provider="google")
+        data = TASK_METRICS.snapshot()["search"]
+        self.assertEqual((data["cache_hits"], data["cache_misses"]), (1, 1))
+
+    def test_provider_time_filter_and_bypass_are_distinct(self):
+        search("q", provider="google")
+        search("q", provider="exa")
+        search("q", provider="google", time_filter="24h")
+        search("q", provider="google", use_cache=False)
+        self.assertEqual(self.mock_provider.call_count, 4)
+
+    def test_ttl_depends_on_time_filter(self):
+        search("q", provider="google", time_filter="24h")
+        search("q", provider="google", time_filter="all")
+        rows = self.cache._conn.execute("SELECT expires_at - accessed_at FROM entries ORDER BY 1").fetchall()
+        self.assertAlmostEqual(rows[0][0], SEARCH_CACHE_TTLS["24h"], delta=1)
+        self.assertAlmostEqual(rows[1][0], SEARCH_CACHE_TTLS["all"], delta=1)
+
+    def test_errors_are_not_cached(self):
+        self.mock_provider.return_value = {"error": "down", "status": 500}
+        search("q", provider="google")
+        search("q", provider="google")
+        self.assertEqual(self.mock_provider.call_count, 2)
+
+class TestSearchMany(unittest.TestCase):
+
+    def setUp(self):
+        configure_rate_limit_backend(MemoryBackend())
+        set_rate_limit("search", 2, provider="google")
+        self.provider_search = patch('tooling.remote.search._search_provider',
+                                     side_effect=lambda query, time_filter, provider, **kwargs: {"query": query})
+        self.mock_provider = self.provider_search.start()
+
+    def tearDown(self):
+        self.provider_search.stop()
+        PROVIDER_RATE_LIMITS.clear()
+        configure_rate_limit_backend(None)
+
+    def test_results_preserve_order(self):
+        results = search_many(["a", "b"], provider="google", use_cache=False)
+        self.assertEqual(results, [{"query": "a"}, {"query": "b"}])
+
+    def test_requests_beyond_the_budget_are_rejected(self):
+        with patch('tooling.lib.ratelimit.RATE_LIMIT_MAX_WAIT', 0.1):
+            results = search_many(["a", "b", "c"], provider="google", use_cache=False)
+        self.assertEqual(sum(1 for r in results if r.get("status") == 429), 1)
+        self.assertEqual(self.mock_provider.call_count, 2)
+
+    def test_limits_are_per_provider(self):
+        with patch('tooling.lib.ratelimit.RATE_LIMIT_MAX_WAIT', 0.1):
+            search_many(["a", "b"], provider="google", use_cache=False)
+            results = search_many(["a", "b"], provider="exa", use_cache=False)
+        self.assertNotIn("error", results[0])
+        self.assertEqual(self.mock_provider.call_count, 4)
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        configure_search_cache(None)
+        self.provider_search = patch('tooling.remote.search._search_provider', side_effect=self.fake_page)
+        self.mock_provider = self.provider_search.start()
+
+    def tearDown(self):
+        self.provider_search.stop()
+
+    @staticmethod
+    def fake_page(query, time_filter, provider, offset=0, count=10):
+        # Later pages answer first, and page 2 repeats the last hit of page 1.
+        time.sleep(0.05 if offset == 0 else 0.0)
+        start = offset - 1 if offset else 0
+        return {"webPages": {"value": [{"url": f"https://example.com/{i}"} for i in range(start, offset + count)]}}
+
+    def test_result_pages(self):
+        self.assertEqual(result_pages('google', 10), [(0, 10)])
+        self.assertEqual(result_pages('google', 25), [(0, 10), (10, 10), (20, 5)])
+        self.assertEqual(len(result_pages('google', 500)), 10)
+        self.assertEqual(result_pages('bing', 120), [(0, 50), (50, 50), (100, 20)])
+        self.assertEqual(result_pages('exa', 40), [(0, 40)])
+
+    def test_search_merges_pages_in_rank_order(self):
+        result = search("q", provider="google", max_results=30)
+        urls = [hit["url"] for hit in result["webPages"]["value"]]
+        self.assertEqual(urls, [f"https://example.com/{i}" for i in range(30)])
+        self.assertEqual(sorted(call.kwargs["offset"] for call in self.mock_provider.call_args_list), [0, 10, 20])
+
+    def test_stream_yields_hits_as_pages_arrive(self):
+        hits = list(iter_search_hits("q", provider="google", max_results=20))
+        self.assertEqual(hits[0]["rank"], 11)  # The second page arrived first.
+        self.assertEqual(sorted(hit["url"] for hit in hits), sorted(f"https://example.com/{i}" for i in range(20)))
+
+    def test_async_stream(self):
+        async def collect():
+            return [hit async for hit in iter_search_hits_async("q", provider="google", max_results=20)]
+        self.assertEqual(len(asyncio.run(collect())), 20)
+
+    def test_stream_skips_failed_pages(self):
+        def flaky_page(query, time_filter, provider, offset=0, count=10):
+            return {"error": "down", "status": 500} if offset else self.fake_page(query, time_filter, provider, offset, count)
+        self.mock_provider.side_effect = flaky_page
+        self.assertEqual(len(list(iter_search_hits("q", provider="google", max_results=20))), 10)
+
+        self.mock_provider.side_effect = lambda *args, **kwargs: {"error": "down", "status": 500}
+        with self.assertRaises(SearchError):
+            list(iter_search_hits("q", provider="google", max_results=20))
+
+class TestLocalProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = LocalSearchIndex(os.path.join(self.tmp_dir.name, "index.sqlite3"))
+        self.index.add("https://a.com", "Transformers use attention layers.")
+        self.index.add("https://b.com", "Convolutional networks use filters.")
+        configure_local_index(self.index)
+
+    def tearDown(self):
+        configure_local_index(None)
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_local_search(self):
+        result = search("attention transformers", provider="local")
+        self.assertEqual([hit["url"] for hit in result["webPages"]["value"]], ["https://a.com"])
+
+    def test_local_stream_and_multi(self):
+        self.assertEqual([hit.rank for hit in iter_search_hits("networks filters", provider="local")], [1])
+        result = multi_search("attention", providers=["local"])
+        self.assertEqual(result["providers"]["local"]["count"], 1)
+
+    def test_not_configured(self):
+        configure_local_index(None)
+        self.assertEqual(search("attention", provider="local")["status"], 500)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file